@@ -0,0 +1,219 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 18:31:12 2026
+
+Incrementally maintained aggregates over the daily tracker.
+
+DailyAggregates subscribes to a CachedStore and keeps, per metric:
+
+    - per-day sum/count
+    - rolling 7- and 30-day sum/count for every day they cover
+    - weekly and monthly sum/count
+    - for yes/no habits, the run of consecutive days done
+
+Each row's contribution is remembered by ID and REV, so an append, edit
+or delete only touches the days, weeks and months that row falls in, and
+a full reload only re-applies rows whose REV changed. The state is saved
+to a JSON file, so after a restart the dashboard reads it back instead of
+recomputing all history. Saving is off the write path: changes only mark
+the state dirty, and a background thread writes it at most every
+TRACKER_AGGREGATES_SAVE seconds, plus once more at exit.
+
+@author: shyamdk
+"""
+import atexit
+import json
+import logging
+import os
+import re
+import threading
+import time
+from datetime import date, timedelta
+
+from row_index import ID_COLUMN, REV_COLUMN, apply_reload
+
+logger = logging.getLogger(__name__)
+
+# === CONFIGURATION ===
+SAVE_INTERVAL = float(os.environ.get("TRACKER_AGGREGATES_SAVE", "30"))  # seconds between saves of changed state
+
+WINDOWS = (7, 30)
+METRIC_ALIASES = {"current_weight": "weight", "calories in": "calories"}
+YES = {"yes", "y", "true", "done"}
+NO = {"no", "n", "false"}
+
+
+def metric_name(parameter):
+    # "Weight (kg)" -> "weight", "Calories In" -> "calories"
+    name = re.sub(r"\s*\(.*?\)", "", str(parameter)).strip().lower()
+    return METRIC_ALIASES.get(name, name)
+
+
+def to_number(value):
+    """Float for numbers, 1.0/0.0 for yes/no, None for anything else."""
+    text = str(value).strip().lower()
+    if text in YES:
+        return 1.0
+    if text in NO:
+        return 0.0
+    try:
+        return float(text)
+    except ValueError:
+        return None
+
+
+def long_format_rows(record):
+    """(metric, day, value, is_habit) for a DATE/PARAMETER/VALUE row, or None to skip it."""
+    value = to_number(record.get("VALUE", ""))
+    if value is None or not record.get("PARAMETER"):
+        return None
+    try:
+        day = date.fromisoformat(str(record["DATE"])[:10])
+    except ValueError:
+        return None
+    is_habit = str(record["VALUE"]).strip().lower() in YES | NO
+    return metric_name(record["PARAMETER"]), day, value, is_habit
+
+
+class DailyAggregates:
+    def __init__(self, extract=long_format_rows, path=None, save_interval=SAVE_INTERVAL):
+        self.extract = extract
+        self.path = path
+        self.lock = threading.Lock()
+        self._save_lock = threading.Lock()  # one writer of the file at a time
+        self._dirty = False
+        self.rows = {}     # entry_id -> [rev, metric, day, value]
+        self.habits = set()
+        self.daily = {}    # metric -> {day: [sum, count]}
+        self.rolling = {}  # "metric:window" -> {day: [sum, count]} over the window ending that day
+        self.weekly = {}   # metric -> {monday: [sum, count]}
+        self.monthly = {}  # metric -> {"YYYY-MM": [sum, count]}
+        if path and os.path.exists(path):
+            self._load()
+        if path:
+            atexit.register(self.save)
+            if save_interval > 0:
+                threading.Thread(target=self._run, args=(save_interval,), name="aggregates-save", daemon=True).start()
+
+    # === PERSISTENCE ===
+    def _load(self):
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                state = json.load(f)
+        except (OSError, ValueError):
+            logger.exception("Could not read %s; rebuilding aggregates", self.path)
+            return
+        self.rows = state["rows"]
+        self.habits = set(state["habits"])
+        self.daily, self.rolling = state["daily"], state["rolling"]
+        self.weekly, self.monthly = state["weekly"], state["monthly"]
+
+    def save(self):
+        """Write the state to `path` if it changed since the last save."""
+        if not self.path:
+            return
+        with self._save_lock:
+            with self.lock:
+                if not self._dirty:
+                    return
+                text = json.dumps({"rows": self.rows, "habits": sorted(self.habits), "daily": self.daily,
+                                   "rolling": self.rolling, "weekly": self.weekly, "monthly": self.monthly})
+                self._dirty = False
+            tmp = self.path + ".tmp"
+            with open(tmp, "w", encoding="utf-8") as f:
+                f.write(text)
+            os.replace(tmp, self.path)
+
+    def _run(self, interval):
+        while True:
+            time.sleep(interval)
+            try:
+                self.save()
+            except Exception:
+                logger.exception("Saving %s failed", self.path)
+                with self.lock:
+                    self._dirty = True  # try again next time
+
+    # === UPDATES ===
+    @staticmethod
+    def _bump(buckets, key, value, sign):
+        cell = buckets.setdefault(key, [0.0, 0])
+        cell[0] += sign * value
+        cell[1] += sign
+        if cell[1] == 0:
+            del buckets[key]
+
+    def _apply(self, metric, day, value, sign):
+        self._dirty = True
+        day = date.fromisoformat(day)
+        self._bump(self.daily.setdefault(metric, {}), day.isoformat(), value, sign)
+        for window in WINDOWS:
+            rolling = self.rolling.setdefault(f"{metric}:{window}", {})
+            for k in range(window):
+                self._bump(rolling, (day + timedelta(days=k)).isoformat(), value, sign)
+        monday = day - timedelta(days=day.weekday())
+        self._bump(self.weekly.setdefault(metric, {}), monday.isoformat(), value, sign)
+        self._bump(self.monthly.setdefault(metric, {}), day.strftime("%Y-%m"), value, sign)
+
+    def _remove(self, entry_id):
+        old = self.rows.pop(entry_id, None)
+        if old is not None:
+            self._apply(old[1], old[2], old[3], -1)
+
+    def _add(self, record):
+        entry_id = record[ID_COLUMN]
+        extracted = self.extract(record)
+        if extracted is None:
+            return
+        metric, day, value, is_habit = extracted
+        self.rows[entry_id] = [str(record.get(REV_COLUMN, "")), metric, day.isoformat(), value]
+        if is_habit:
+            self.habits.add(metric)
+        self._apply(metric, day.isoformat(), value, 1)
+
+    def on_event(self, event, *args):
+        with self.lock:
+            if event == "reload":
+                # Rows unchanged since we last counted them are left alone.
+                apply_reload(args[0], self.rows, lambda i: self.rows[i][0], self._remove, self._add)
+            elif event == "append":
+                self._add(args[0])
+            elif event == "update":
+                self._remove(args[0][ID_COLUMN])
+                self._add(args[1])
+            elif event == "delete":
+                self._remove(args[0][ID_COLUMN])
+
+    # === QUERIES ===
+    def metrics(self):
+        with self.lock:
+            return sorted(self.daily)
+
+    def latest_day(self, metric):
+        with self.lock:
+            days = self.daily.get(metric)
+            return max(days) if days else None
+
+    def rolling_mean(self, metric, window, day=None):
+        day = day or self.latest_day(metric)
+        with self.lock:
+            cell = self.rolling.get(f"{metric}:{window}", {}).get(str(day))
+            return cell[0] / cell[1] if cell else None
+
+    def totals(self, metric, period="week"):
+        """[(period start, total, entries)] in date order; period is "week" or "month"."""
+        buckets = self.weekly if period == "week" else self.monthly
+        with self.lock:
+            return [(key, cell[0], cell[1]) for key, cell in sorted(buckets.get(metric, {}).items())]
+
+    def streak(self, habit, as_of=None):
+        """Consecutive days up to as_of (default: the latest entry) on which the habit was done."""
+        as_of = date.fromisoformat(str(as_of or self.latest_day(habit) or date.today()))
+        with self.lock:
+            days = self.daily.get(habit, {})
+            count = 0
+            while days.get(as_of.isoformat(), [0.0])[0] > 0:
+                count += 1
+                as_of -= timedelta(days=1)
+            return count
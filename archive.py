@@ -0,0 +1,176 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 23:08:41 2026
+
+Move old Completed tasks out of the task sheet into an archive table.
+
+Every page reads the whole task sheet, and most of it is finished work the
+dashboard filters out again. Archiver moves Completed tasks whose target
+date is more than TRACKER_ARCHIVE_AFTER days old into an archive table on
+the same backend (a "task_archive" worksheet, or a SQLite table), in
+batches of TRACKER_ARCHIVE_BATCH:
+
+    1. copy the batch to the archive with one append_rows() call, skipping
+       IDs already there (left by a run that stopped after step 1)
+    2. delete the batch from the task sheet with delete_rows(), one call
+       per run of adjacent rows
+
+Rows keep their ID and REV. The archive is never loaded whole or cached:
+page() reads one page with a single ranged read, and find() scans page by
+page only until it has enough matches.
+
+It runs on a daemon thread every TRACKER_ARCHIVE_INTERVAL seconds, from
+the Archive page, or from the command line:
+
+    python archive.py --dry-run
+
+@author: shyamdk
+"""
+import argparse
+import logging
+import os
+import threading
+import time
+from datetime import date, timedelta
+
+from row_index import ID_COLUMN, META_COLUMNS
+from search import parse_date, tokenize
+from storage import BACKEND, DB_PATH, LazyStore, SheetStore, SQLiteStore
+
+logger = logging.getLogger(__name__)
+
+# === CONFIGURATION ===
+ARCHIVE_AFTER = int(os.environ.get("TRACKER_ARCHIVE_AFTER", "90"))  # days past the target date; 0 turns it off
+ARCHIVE_BATCH = int(os.environ.get("TRACKER_ARCHIVE_BATCH", "200"))  # rows per append/delete
+ARCHIVE_INTERVAL = float(os.environ.get("TRACKER_ARCHIVE_INTERVAL", "3600"))  # seconds
+PAGE_SIZE = 50
+
+
+def open_archive(table, headers, open_worksheet):
+    """The archive table, on the same backend as the rest; opened on first use and never cached."""
+    headers = list(headers) + META_COLUMNS
+    if BACKEND == "sqlite":
+        return LazyStore(lambda: SQLiteStore(DB_PATH, table, headers))
+    return LazyStore(lambda: SheetStore(open_worksheet(), headers))
+
+
+class Archiver:
+    def __init__(self, hot, archive, status_column, done, date_column, date_format,
+                 after_days=ARCHIVE_AFTER, batch=ARCHIVE_BATCH):
+        self.hot = hot
+        self.archive = archive
+        self.status_column = status_column
+        self.done = set(done)
+        self.date_column = date_column
+        self.date_format = date_format
+        self.after_days = after_days
+        self.batch = batch
+        self.lock = threading.Lock()  # one run at a time
+        self.last_run = None  # (finished at, rows moved)
+
+    # === MOVING ===
+    def due(self, today=None):
+        """Records in the hot table that are ready to be archived."""
+        if self.after_days <= 0:
+            return []
+        cutoff = (today or date.today()) - timedelta(days=self.after_days)
+        out = []
+        for record in self.hot.get_all_records():
+            if str(record.get(self.status_column, "")) not in self.done:
+                continue
+            day = parse_date(str(record.get(self.date_column, "")), self.date_format)
+            if day is not None and day < cutoff:
+                out.append(record)
+        return out
+
+    def run(self, today=None, progress=None):
+        """Archive everything that is due, a batch at a time; returns the number of rows moved."""
+        with self.lock:
+            todo = self.due(today)
+            moved = 0
+            for i in range(0, len(todo), self.batch):
+                chunk = todo[i:i + self.batch]
+                rows = [[r.get(h, "") for h in self.archive.headers] for r in chunk
+                        if not self.archive.has_row(r[ID_COLUMN])]
+                if rows:
+                    self.archive.append_rows(rows)
+                self.hot.delete_rows([r[ID_COLUMN] for r in chunk])
+                moved += len(chunk)
+                if progress is not None:
+                    progress(moved, len(todo))
+            self.last_run = (time.time(), moved)
+            if moved:
+                logger.info("Archived %d tasks", moved)
+            return moved
+
+    def start(self, interval=ARCHIVE_INTERVAL):
+        """Run the archiver every `interval` seconds on a daemon thread."""
+        if interval <= 0 or self.after_days <= 0:
+            return
+
+        def loop():
+            while True:
+                time.sleep(interval)
+                try:
+                    self.run()
+                except Exception:
+                    logger.exception("Archiving failed")
+
+        threading.Thread(target=loop, name="archiver", daemon=True).start()
+
+    # === READING ===
+    def count(self):
+        return self.archive.count_rows()
+
+    def page(self, number, size=PAGE_SIZE):
+        """Page `number` of the archive, 1 being the most recently archived; newest first."""
+        stop = max(self.count() - (number - 1) * size, 0)
+        return self.archive.get_rows(max(stop - size, 0), stop)[::-1]
+
+    def pages(self, size=PAGE_SIZE):
+        number = 1
+        while True:
+            records = self.page(number, size)
+            if not records:
+                return
+            yield records
+            number += 1
+
+    def find(self, text, columns=("TASK", "COMMENTS"), limit=PAGE_SIZE, size=500):
+        """Archived records containing every word of `text`, newest first, reading only as many pages as needed."""
+        terms = set(tokenize(text))
+        found = []
+        for records in self.pages(size):
+            for record in records:
+                if terms <= {t for col in columns for t in tokenize(record.get(col, ""))}:
+                    found.append(record)
+                    if len(found) >= limit:
+                        return found
+        return found
+
+
+# === COMMAND LINE ===
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Archive old completed tasks.")
+    parser.add_argument("--after", type=int, default=ARCHIVE_AFTER, help="days past the target date")
+    parser.add_argument("--dry-run", action="store_true", help="count, move nothing")
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+
+    import task_tracker
+    from write_queue import QUEUES
+    archiver = task_tracker.get_task_archiver()
+    archiver.after_days = args.after
+    if args.dry_run:
+        logger.info("%d tasks would be archived", len(archiver.due()))
+        return
+    archiver.run(progress=lambda done, total: logger.info("%d of %d archived", done, total))
+    for queue in QUEUES.values():
+        while queue.flush():
+            pass
+    logger.info("Archive now holds %d tasks", archiver.count())
+
+
+if __name__ == "__main__":
+    main()
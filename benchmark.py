@@ -0,0 +1,315 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 19:22:14 2026
+
+Offline benchmark: render the apps' pages against in-memory sheets.
+
+Each scenario runs main.py or wmanage-main.py under Streamlit's AppTest
+with gspread replaced by fake_sheets, seeded with N rows. It renders the
+page once cold (fresh process, empty caches), then reruns it --renders
+times and reports:
+
+    cold ms / cold calls   first render, including opening and loading the sheets
+                           and importing what the page needs (pandas, matplotlib)
+    calls/render           API calls per warm rerun
+    p50 / p99 ms           warm rerun latency
+    peak MB                peak RSS of the scenario's process
+
+Every scenario runs in its own subprocess so caches, module state and
+peak memory don't leak between them.
+
+    python benchmark.py --sizes 100,10000 --latency 0.05 --output bench_output.txt
+
+--imports profiles startup instead: it imports what main.py imports before
+its first paint in a fresh `python -X importtime` process, reports the total
+and the slowest modules, and exits non-zero if any of DEFERRED (pandas,
+gspread, matplotlib, ...) was loaded, or if the total is over --budget ms.
+
+    python benchmark.py --imports --budget 800
+
+@author: shyamdk
+"""
+import argparse
+import json
+import os
+import random
+import resource
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+from unittest import mock
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_SIZES = "100,10000,100000"
+
+# === SCENARIOS ===
+# name -> (script, navigation steps, action per measured render)
+# A step is (widget kind, index, value); an action is None (plain rerun) or
+# ({text_input index: value}, submit button index).
+SCENARIOS = {
+    "daily dashboard": ("main.py", [], None),
+    "daily add entry": ("main.py", [("radio", 1, "Add Entry")], ({0: "weight", 1: "71.5"}, 0)),
+    "daily update entry": ("main.py", [("radio", 1, "Update Entry")], None),
+    "task dashboard": ("main.py", [("radio", 0, "Task Tracker")], None),
+    "task add": ("main.py", [("radio", 0, "Task Tracker"), ("radio", 1, "➕ Add Task")], ({0: "bench task"}, 0)),
+    "task modify": ("main.py", [("radio", 0, "Task Tracker"), ("radio", 1, "✏️ Modify Task")], None),
+    "wmanage dashboard": ("wmanage-main.py", [], None),
+    "wmanage task dashboard": ("wmanage-main.py", [("selectbox", 0, "📝 Task Tracker")], None),
+    "wmanage add task": ("wmanage-main.py", [("selectbox", 0, "📝 Task Tracker"), ("radio", 0, "➕ Add Task")],
+                         ({0: "bench task", 1: "Office"}, 0)),
+}
+
+
+# === IMPORT TIME ===
+STARTUP_MODULES = ["streamlit", "prefetch", "profiling", "daily_tracker", "task_tracker", "write_queue"]
+# Loaded by the code paths that need them, never on import.
+DEFERRED = ["pandas", "numpy", "pyarrow", "matplotlib", "gspread", "oauth2client"]
+
+
+def import_profile(modules=STARTUP_MODULES, repeat=3):
+    """Best of `repeat` fresh `python -X importtime` runs: total ms, slowest modules, deferred ones loaded."""
+    best = None
+    for _ in range(repeat):
+        proc = subprocess.run([sys.executable, "-X", "importtime", "-c", "import " + ", ".join(modules)],
+                              cwd=HERE, capture_output=True, text=True)
+        if proc.returncode != 0:
+            raise RuntimeError(proc.stderr.strip().splitlines()[-1])
+        rows = []  # (name, self us, cumulative us, depth)
+        for line in proc.stderr.splitlines():
+            if not line.startswith("import time:") or "|" not in line or "self [us]" in line:
+                continue
+            own, cumulative, name = line[len("import time:"):].split("|")
+            rows.append((name.strip(), int(own), int(cumulative), (len(name) - len(name.lstrip())) // 2))
+        total = sum(cumulative for _, _, cumulative, depth in rows if depth == 0) / 1000
+        if best is None or total < best["total_ms"]:
+            loaded = {name.split(".")[0] for name, _, _, _ in rows}
+            best = {
+                "total_ms": total,
+                "modules": len(rows),
+                "slowest": [(name, cumulative / 1000) for name, _, cumulative, depth in
+                            sorted(rows, key=lambda r: -r[2]) if depth <= 1][:10],
+                "deferred_loaded": [m for m in DEFERRED if m in loaded],
+            }
+    return best
+
+
+def format_import_profile(profile):
+    lines = [f"startup imports: {profile['total_ms']:.0f} ms, {profile['modules']} modules"]
+    lines += [f"  {name:<40}{ms:>8.1f} ms" for name, ms in profile["slowest"]]
+    if profile["deferred_loaded"]:
+        lines.append(f"loaded at startup but should be deferred: {', '.join(profile['deferred_loaded'])}")
+    return lines
+
+
+# === FAKE DATA ===
+def _day(i):
+    return date(2020, 1, 1) + timedelta(days=i)
+
+
+def make_client(n_rows, latency=0.0, quota=None):
+    import daily_tracker
+    import task_tracker
+    from fake_sheets import FakeClient, FakeSpreadsheet, FakeWorksheet, RequestStats
+    from row_index import META_COLUMNS, new_id, new_rev
+
+    wm = _wmanage_constants()
+    rng = random.Random(n_rows)
+    params = ["Weight (kg)", "Steps", "Yoga", "Water (L)"]
+    long_rows = [
+        [_day(i // len(params)).isoformat(), params[i % 4],
+         [round(rng.uniform(68, 75), 1), rng.randint(2000, 12000), rng.choice(["Yes", "No"]), 2.5][i % 4],
+         "", new_id(), new_rev()]
+        for i in range(n_rows)
+    ]
+    statuses = ["Pending", "In Progress", "Completed"]
+    task_rows = [
+        [_day(i % 2000).strftime("%d-%m-%y"), f"task {i}", _day(i % 2000 + 7).strftime("%d-%m-%y"),
+         statuses[i % 3], ["Personal", "Office"][i % 2], ["Urgent", "Important"][i % 2], "", new_id(), new_rev()]
+        for i in range(n_rows)
+    ]
+    wide_rows = [
+        [_day(i).isoformat(), 70, round(rng.uniform(68, 75), 1), rng.randint(2000, 12000),
+         rng.choice(["Yes", "No"]), rng.choice(["Yes", "No"]), "120/80", 95, "", "", new_id(), new_rev()]
+        for i in range(n_rows)
+    ]
+    wm_task_rows = [
+        [_day(i % 2000).isoformat(), f"task {i}", _day(i % 2000 + 7).isoformat(), ["Personal", "Office"][i % 2],
+         "Important", ["Pending", "In Progress", "Done"][i % 3], "", new_id(), new_rev()]
+        for i in range(n_rows)
+    ]
+
+    stats = RequestStats(latency=latency, quota_per_minute=quota)
+    daily_book = FakeSpreadsheet({"Sheet1": FakeWorksheet([daily_tracker.DAILY_HEADERS + META_COLUMNS] + long_rows)})
+    wide_book = FakeSpreadsheet({
+        "Sheet1": FakeWorksheet([wm["DAILY_HEADERS"] + META_COLUMNS] + wide_rows),
+        "Task Tracker": FakeWorksheet([wm["TASK_HEADERS"] + META_COLUMNS] + wm_task_rows, title="Task Tracker"),
+    })
+    task_book = FakeSpreadsheet({
+        "task_tracker": FakeWorksheet([task_tracker.TASK_HEADERS + META_COLUMNS] + task_rows, title="task_tracker"),
+    })
+    # daily_tracker and wmanage-main.py share a spreadsheet URL but expect different layouts.
+    return {
+        "main.py": FakeClient({daily_tracker.SHEET_URL: daily_book, task_tracker.TASK_SHEET_URL: task_book}, stats),
+        "wmanage-main.py": FakeClient({wm["SHEET_URL"]: wide_book}, stats),
+    }, stats
+
+
+def _wmanage_constants():
+    # Read the constants without running the Streamlit script.
+    source = open(os.path.join(HERE, "wmanage-main.py"), encoding="utf-8").read()
+    consts = {}
+    for name in ("SHEET_URL", "DAILY_HEADERS", "TASK_HEADERS"):
+        start = source.index(f"\n{name} = ") + len(name) + 4
+        end = source.index("\n", source.index("]", start) if source[start] == "[" else start)
+        consts[name] = eval(source[start:end])
+    return consts
+
+
+# === ONE SCENARIO ===
+def _render(at, action):
+    if action is not None:
+        inputs, button = action
+        for index, value in inputs.items():
+            at.text_input[index].input(value)
+        at.button[button].click()
+    start = time.perf_counter()
+    at.run()
+    return time.perf_counter() - start
+
+
+def run_scenario(name, n_rows, renders, latency, quota):
+    from streamlit.testing.v1 import AppTest
+
+    script, steps, action = SCENARIOS[name]
+    clients, stats = make_client(n_rows, latency, quota)
+
+    with mock.patch("oauth2client.service_account.ServiceAccountCredentials.from_json_keyfile_dict"), \
+            mock.patch("oauth2client.service_account.ServiceAccountCredentials.from_json_keyfile_name"), \
+            mock.patch("gspread.authorize", return_value=clients[script]):
+        at = AppTest.from_file(os.path.join(HERE, script), default_timeout=600)
+        stats.reset()
+        start = time.perf_counter()
+        at.run()
+        for kind, index, value in steps:
+            getattr(at.sidebar, kind)[index].set_value(value)
+            at.run()
+        cold = time.perf_counter() - start
+        cold_calls = stats.total()
+        errors = [e.value for e in at.exception]
+
+        stats.reset()
+        times = [_render(at, action) for _ in range(renders)]
+        errors += [e.value for e in at.exception]
+
+        from write_queue import QUEUES
+        for queue in QUEUES.values():
+            queue.flush()
+        warm_calls = stats.total()
+
+    peak_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    cuts = statistics.quantiles(times, n=100, method="inclusive") if len(times) > 1 else times * 99
+    return {
+        "scenario": name, "rows": n_rows, "cold_ms": cold * 1000, "cold_calls": cold_calls,
+        "calls_per_render": warm_calls / max(renders, 1),
+        "p50_ms": cuts[49] * 1000, "p99_ms": cuts[98] * 1000,
+        "peak_mb": peak_kb / 1024, "throttled": stats.calls["429"], "errors": errors,
+    }
+
+
+# === HARNESS ===
+def _child_env(workdir, quota=None):
+    env = dict(os.environ)
+    env.update({
+        "TRACKER_BACKEND": "sheets",
+        "TRACKER_AGGREGATES": os.path.join(workdir, "daily_aggregates.json"),
+        "TRACKER_FLUSH_DELAY": "3600",  # flush at the end, so writes are counted once
+    })
+    env.pop("TRACKER_JOURNAL_DIR", None)
+    if quota is not None:
+        # The fake's quota covers reads and writes together.
+        env["TRACKER_READ_QUOTA"] = env["TRACKER_WRITE_QUOTA"] = str(max(quota // 2, 1))
+    return env
+
+
+def run_all(scenarios, sizes, renders, latency, quota):
+    for n_rows in sizes:
+        for name in scenarios:
+            with tempfile.TemporaryDirectory() as workdir:
+                cmd = [sys.executable, os.path.abspath(__file__), "--child", name, "--sizes", str(n_rows),
+                       "--renders", str(renders), "--latency", str(latency)]
+                if quota is not None:
+                    cmd += ["--quota", str(quota)]
+                proc = subprocess.run(cmd, cwd=workdir, env=_child_env(workdir, quota), capture_output=True, text=True)
+            if proc.returncode != 0:
+                yield {"scenario": name, "rows": n_rows, "errors": proc.stderr.strip().splitlines()[-1:]}
+            else:
+                yield json.loads(proc.stdout.strip().splitlines()[-1])
+
+
+def format_row(r):
+    if "cold_ms" not in r:
+        return f"{r['scenario']:<24}{r['rows']:>8}  FAILED: {r['errors']}"
+    line = (f"{r['scenario']:<24}{r['rows']:>8}{r['cold_ms']:>10.0f}{r['cold_calls']:>7}"
+            f"{r['calls_per_render']:>9.2f}{r['p50_ms']:>9.1f}{r['p99_ms']:>9.1f}{r['peak_mb']:>9.0f}")
+    if r["throttled"]:
+        line += f"  429s: {r['throttled']}"
+    if r["errors"]:
+        line += f"  errors: {r['errors']}"
+    return line
+
+
+HEADER = (f"{'scenario':<24}{'rows':>8}{'cold ms':>10}{'calls':>7}"
+          f"{'calls/r':>9}{'p50 ms':>9}{'p99 ms':>9}{'peak MB':>9}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[1])
+    parser.add_argument("--sizes", default=DEFAULT_SIZES, help="comma-separated row counts")
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS), help="comma-separated scenario names")
+    parser.add_argument("--renders", type=int, default=20, help="warm reruns per scenario")
+    parser.add_argument("--latency", type=float, default=0.0, help="simulated seconds per API request")
+    parser.add_argument("--quota", type=int, default=None, help="API requests allowed per minute")
+    parser.add_argument("--output", help="also write the report to this file")
+    parser.add_argument("--json", action="store_true", help="print one JSON object per scenario")
+    parser.add_argument("--imports", action="store_true", help="profile startup imports instead of pages")
+    parser.add_argument("--budget", type=float, default=None, help="with --imports: fail above this many ms")
+    parser.add_argument("--child", help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+    sizes = [int(s) for s in args.sizes.split(",")]
+
+    if args.child:
+        sys.path.insert(0, HERE)
+        result = run_scenario(args.child, sizes[0], args.renders, args.latency, args.quota)
+        print(json.dumps(result, default=str))
+        return
+
+    if args.imports:
+        profile = import_profile()
+        lines = [json.dumps(profile)] if args.json else format_import_profile(profile)
+        print("\n".join(lines), flush=True)
+        if args.output:
+            with open(args.output, "w", encoding="utf-8") as f:
+                f.write("\n".join(lines) + "\n")
+        over = args.budget is not None and profile["total_ms"] > args.budget
+        if over:
+            print(f"over the {args.budget:.0f} ms budget", flush=True)
+        sys.exit(1 if over or profile["deferred_loaded"] else 0)
+
+    lines = [] if args.json else [HEADER]
+    if not args.json:
+        print(HEADER, flush=True)
+    for result in run_all(args.scenarios.split(","), sizes, args.renders, args.latency, args.quota):
+        line = json.dumps(result, default=str) if args.json else format_row(result)
+        lines.append(line)
+        print(line, flush=True)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write("\n".join(lines) + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,303 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 11:04:52 2026
+
+Process-wide read-through cache in front of a storage backend.
+
+The cache lives at module level, so every Streamlit session in the process
+shares it. Reads are served from memory until the TTL expires; writes go
+to the backend and then patch the cached rows in place, so a read right
+after a write costs nothing. Rows are found through an ID -> position
+index, so patching never scans the table.
+
+When the TTL expires and the backend supports it, the cache syncs
+incrementally: only rows whose REV stamp changed and rows appended since
+the last read are fetched. A full read still happens every FULL_SYNC
+seconds, to pick up edits made by hand in the sheet (those don't touch REV).
+
+Anything that maintains its own view of a table (aggregates, indexes) can
+subscribe(listener) to be told about each change instead of rescanning:
+
+    listener("reload", records)    full set of rows after a full read
+    listener("append", record)
+    listener("update", old, new)
+    listener("delete", old)
+
+@author: shyamdk
+"""
+import logging
+import os
+import threading
+import time
+from collections import deque
+
+from profiling import timed
+from row_index import ID_COLUMN, META_COLUMNS, REV_COLUMN, ConflictError, RowIndex, new_id, new_rev
+from schema import load_frame
+
+logger = logging.getLogger(__name__)
+
+# === CONFIGURATION ===
+CACHE_TTL = float(os.environ.get("TRACKER_CACHE_TTL", "300"))  # seconds
+FULL_SYNC = float(os.environ.get("TRACKER_FULL_SYNC", "3600"))  # seconds
+
+
+class CachedStore:
+    def __init__(self, store, name="", schema=None, ttl=CACHE_TTL, full_sync=FULL_SYNC):
+        self.store = store
+        self.name = name
+        self.schema = schema
+        self.headers = store.headers
+        self.ttl = ttl
+        self.full_sync = full_sync
+        self.lock = threading.RLock()
+        self.version = 0  # bumped on every reload or patch
+        self._records = None
+        self._index = None
+        self._frame = None
+        self._derived = {}  # key -> (version, value), see derived()
+        self._listeners = []
+        self._refused = deque()  # current rows of edits the backend refused, see on_conflict()
+        self._loaded_at = 0.0
+        self._full_loaded_at = 0.0
+
+    def _changed(self):
+        self.version += 1
+        self._frame = None
+
+    def subscribe(self, listener):
+        """
+        Send listener every change from now on, starting with a "reload" of
+        the rows already loaded. The store is shared by every session, so a
+        view subscribed once per process stays current for all of them.
+        """
+        with self.lock:
+            self._listeners.append(listener)
+            if self._records is not None:
+                listener("reload", list(self._records))
+
+    def _emit(self, event, *args):
+        for listener in self._listeners:
+            try:
+                listener(event, *args)
+            except Exception:
+                logger.exception("Listener failed on %s for %s", event, self.name)
+
+    def _full_row(self, row, entry_id):
+        # UI rows carry only the data columns; ID and a fresh REV go last.
+        n_data = len(self.headers) - len(META_COLUMNS)
+        row = list(row)[:n_data]
+        return row + [""] * (n_data - len(row)) + [entry_id, new_rev()]
+
+    def invalidate(self):
+        with self.lock:
+            self._records = None
+            self._index = None
+            self._changed()
+
+    # === READS ===
+    def get_all_records(self):
+        with self.lock:
+            self._apply_refused()
+            now = time.monotonic()
+            try:
+                if self._records is None or now - self._full_loaded_at > self.full_sync:
+                    self._reload()
+                elif now - self._loaded_at > self.ttl:
+                    self._sync()
+            except Exception:
+                if self._records is None:
+                    raise
+                # Backend unreachable: keep serving what we have and retry after another TTL.
+                logger.exception("Refreshing %s failed; serving cached rows", self.name)
+                self._loaded_at = now
+            return list(self._records)
+
+    def _reload(self):
+        with timed(f"first read {self.name}"):
+            self._records = self.store.get_all_records()
+        self._index = RowIndex((r[ID_COLUMN] for r in self._records), first_row=0)
+        self._loaded_at = self._full_loaded_at = time.monotonic()
+        self._changed()
+        self._emit("reload", list(self._records))
+
+    def _sync(self):
+        sync = getattr(self.store, "sync", None)
+        delta = sync(self._records) if sync is not None else None
+        if delta is None:
+            self._reload()
+            return
+        updated, appended = delta
+        for i, record in updated.items():
+            old, self._records[i] = self._records[i], record
+            self._emit("update", old, record)
+        for record in appended:
+            self._records.append(record)
+            self._index.on_append(record[ID_COLUMN])
+            self._emit("append", record)
+        self._loaded_at = time.monotonic()
+        if updated or appended:
+            self._changed()
+
+    def _shared_frame(self):
+        records = self.get_all_records()
+        if self._frame is None:
+            # Typed once per version. REV is bookkeeping for sync; pages only need the data and ID.
+            columns = [h for h in self.headers if h != REV_COLUMN]
+            self._frame = load_frame(records, columns, self.schema)
+        return self._frame
+
+    def get_frame(self):
+        # Callers get their own copy so they can add or overwrite columns freely.
+        with self.lock:
+            return self._shared_frame().copy()
+
+    def derived(self, key, build):
+        """Memoize build(frame) until the data changes; build must not modify the frame."""
+        with self.lock:
+            frame = self._shared_frame()
+            hit = self._derived.get(key)
+            if hit is None or hit[0] != self.version:
+                hit = (self.version, build(frame))
+                self._derived[key] = hit
+            return hit[1]
+
+    def get_record(self, entry_id):
+        with self.lock:
+            self.get_all_records()
+            return dict(self._records[self._index.position(entry_id)])
+
+    def cached_record(self, entry_id):
+        """The row as the cache holds it, without refreshing; None if it isn't loaded."""
+        with self.lock:
+            self._apply_refused()
+            if self._records is None or entry_id not in self._index:
+                return None
+            return dict(self._records[self._index.position(entry_id)])
+
+    # === WRITES ===
+    def append_row(self, row):
+        """Append a data row and return the ID it was given."""
+        entry_id = new_id()
+        row = self._full_row(row, entry_id)
+        with self.lock:
+            self.store.append_row(row)
+            if self._records is not None:
+                record = dict(zip(self.headers, row))
+                self._records.append(record)
+                self._index.on_append(entry_id)
+                self._emit("append", record)
+            self._changed()
+        return entry_id
+
+    def append_rows(self, rows):
+        """Append several data rows with one backend call; returns their new IDs."""
+        ids = [new_id() for _ in rows]
+        rows = [self._full_row(row, entry_id) for row, entry_id in zip(rows, ids)]
+        with self.lock:
+            self.store.append_rows(rows)
+            if self._records is not None:
+                for entry_id, row in zip(ids, rows):
+                    record = dict(zip(self.headers, row))
+                    self._records.append(record)
+                    self._index.on_append(entry_id)
+                    self._emit("append", record)
+            self._changed()
+        return ids
+
+    def _replace(self, record):
+        i = self._index.position(record[ID_COLUMN])
+        old, self._records[i] = self._records[i], record
+        self._emit("update", old, record)
+        self._changed()
+
+    def on_conflict(self, entry_id, current):
+        """Called when the backend refused a queued edit; the row is put back as it really is."""
+        if current:
+            self._refused.append(current)  # applied on the next read, under the lock
+
+    def _apply_refused(self):
+        while self._refused:
+            record = self._refused.popleft()
+            if self._records is not None and record[ID_COLUMN] in self._index:
+                self._replace(record)
+
+    def update_row(self, entry_id, row, expected_rev=None):
+        """
+        Overwrite a row. With expected_rev (the REV the edit was based on), the
+        write is refused with ConflictError if the row has changed since; the
+        cache then holds the current row.
+        """
+        row = self._full_row(row, entry_id)
+        with self.lock:
+            if expected_rev is not None and self._records is not None and entry_id in self._index:
+                cached = self._records[self._index.position(entry_id)]
+                if str(cached[REV_COLUMN]) != str(expected_rev):
+                    raise ConflictError(entry_id, dict(cached))
+            try:
+                self.store.update_row(entry_id, row, expected_rev)
+            except ConflictError as e:
+                if e.current and self._records is not None and entry_id in self._index:
+                    self._replace(dict(e.current))
+                raise
+            if self._records is not None and entry_id in self._index:
+                self._replace(dict(zip(self.headers, row)))
+            else:
+                self._changed()
+
+    def batch_update(self, updates, expected=None):
+        """
+        Overwrite several rows ({entry_id: row}) with one backend call. Rows
+        whose REV no longer matches `expected` ({entry_id: REV}) are left
+        alone and returned as {entry_id: current record}; the cache then
+        holds them as they are.
+        """
+        expected = expected or {}
+        rows = {entry_id: self._full_row(row, entry_id) for entry_id, row in updates.items()}
+        with self.lock:
+            refused = {}
+            for entry_id in rows:
+                if expected.get(entry_id) is not None and self._records is not None and entry_id in self._index:
+                    cached = self._records[self._index.position(entry_id)]
+                    if str(cached[REV_COLUMN]) != str(expected[entry_id]):
+                        refused[entry_id] = dict(cached)
+            send = {entry_id: row for entry_id, row in rows.items() if entry_id not in refused}
+            if send:
+                # A write queue only checks at flush time; its refusals arrive through on_conflict().
+                refused.update(self.store.batch_update(send, {i: expected[i] for i in send if i in expected}) or {})
+            for entry_id, row in send.items():
+                if self._records is None or entry_id not in self._index:
+                    continue
+                if entry_id not in refused:
+                    self._replace(dict(zip(self.headers, row)))
+                elif refused[entry_id]:
+                    self._replace(dict(refused[entry_id]))
+            self._changed()
+            return refused
+
+    def delete_row(self, entry_id):
+        with self.lock:
+            self.store.delete_row(entry_id)
+            if self._records is not None and entry_id in self._index:
+                old = self._records.pop(self._index.on_delete(entry_id))
+                self._emit("delete", old)
+            self._changed()
+
+    def delete_rows(self, entry_ids):
+        """Delete several rows; the backend groups them into as few calls as it can."""
+        entry_ids = list(entry_ids)
+        with self.lock:
+            try:
+                self.store.delete_rows(entry_ids)
+            except Exception:
+                self.invalidate()  # some may be gone already; read afresh next time
+                raise
+            if self._records is not None:
+                known = [entry_id for entry_id in entry_ids if entry_id in self._index]
+                old = [self._records[self._index.position(entry_id)] for entry_id in known]
+                gone = set(self._index.on_delete_many(known))
+                self._records = [r for i, r in enumerate(self._records) if i not in gone]
+                for record in old:
+                    self._emit("delete", record)
+            self._changed()
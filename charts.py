@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 17:44:50 2026
+
+Cached, downsampled chart rendering.
+
+Charts are rendered once to PNG and cached under a hash of the plotted
+values, so a rerun with unchanged data just re-sends the image. Series
+longer than MAX_POINTS are reduced with Largest-Triangle-Three-Buckets
+(LTTB), which keeps peaks, dips and the overall shape.
+
+@author: shyamdk
+"""
+import hashlib
+import io
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+MAX_POINTS = 500
+
+
+def lttb(x, y, threshold):
+    """Indices of the points LTTB keeps when reducing (x, y) to `threshold` points."""
+    n = len(x)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+
+    keep = np.empty(threshold, dtype=np.int64)
+    keep[0], keep[-1] = 0, n - 1
+    # Buckets span the points between the fixed first and last ones.
+    edges = np.linspace(1, n - 1, threshold - 1).astype(np.int64)
+    a = 0
+    for i in range(threshold - 2):
+        start, end = edges[i], edges[i + 1]
+        # The next bucket's mean is the third corner of the triangle.
+        nxt_end = edges[i + 2] if i + 2 < len(edges) else n
+        avg_x = x[end:nxt_end].mean()
+        avg_y = y[end:nxt_end].mean()
+        area = np.abs(
+            (x[a] - avg_x) * (y[start:end] - y[a]) - (x[a] - x[start:end]) * (avg_y - y[a])
+        )
+        a = start + int(np.argmax(area))
+        keep[i + 1] = a
+    return keep
+
+
+def downsample(dates, values, max_points=MAX_POINTS):
+    mask = values.notna().to_numpy()
+    dates, values = dates[mask], values[mask].astype(float)
+    x = dates.to_numpy(dtype="datetime64[ns]").astype(np.int64).astype(float)
+    idx = lttb(x, values.to_numpy(), max_points)
+    return dates.iloc[idx], values.iloc[idx]
+
+
+def data_hash(df):
+    return hashlib.sha1(pd.util.hash_pandas_object(df, index=False).values.tobytes()).hexdigest()
+
+
+@st.cache_data(max_entries=32, show_spinner=False)
+def _render_weight_chart(key, _df):
+    # Only `key` is hashed by Streamlit; _df is the data it was computed from.
+    from matplotlib.figure import Figure  # loaded on the first chart not served from the cache
+    fig = Figure()
+    ax = fig.subplots()
+    for col, label, style in [("TARGET_WEIGHT", "Target Weight", {"linestyle": "--"}),
+                              ("CURRENT_WEIGHT", "Current Weight", {"marker": "o"})]:
+        dates, values = downsample(_df["DATE"], _df[col])
+        ax.plot(dates, values, label=label, **style)
+    ax.set_xlabel("Date")
+    ax.set_ylabel("Weight (kg)")
+    ax.set_title("Progress vs Target")
+    ax.legend()
+    fig.autofmt_xdate()
+    buf = io.BytesIO()
+    fig.savefig(buf, format="png", bbox_inches="tight")
+    return buf.getvalue()
+
+
+def weight_chart_png(df):
+    """PNG of target vs current weight; df needs DATE, TARGET_WEIGHT, CURRENT_WEIGHT, sorted by DATE."""
+    plotted = df[["DATE", "TARGET_WEIGHT", "CURRENT_WEIGHT"]]
+    return _render_weight_chart(data_hash(plotted), plotted)
+
+
+@st.cache_data(max_entries=32, show_spinner=False)
+def _render_metrics_chart(key, _df):
+    from matplotlib.figure import Figure
+    fig = Figure()
+    ax = fig.subplots()
+    for col in _df.columns:
+        dates, values = downsample(_df.index.to_series(), _df[col])
+        ax.plot(dates, values, label=col)
+    ax.set_xlabel("Date")
+    ax.legend()
+    fig.autofmt_xdate()
+    buf = io.BytesIO()
+    fig.savefig(buf, format="png", bbox_inches="tight")
+    return buf.getvalue()
+
+
+def metrics_chart_png(df):
+    """PNG with one line per column of a date-indexed frame, such as DailyPivot.frame()."""
+    return _render_metrics_chart(data_hash(df.reset_index()) + "|".join(map(str, df.columns)), df)
@@ -6,27 +6,23 @@ streamlit-tracker-bot@tracker-app-467707.iam.gserviceaccount.com
 
 @author: shyamdk
 """
+import os
+
 import streamlit as st
-import pandas as pd
-import gspread
-from oauth2client.service_account import ServiceAccountCredentials
 from datetime import date
 
+import prefetch
+from aggregates import DailyAggregates
+from profiling import timed_page
+from row_index import REV_COLUMN, ConflictError
+from storage import authorize_gspread, get_store
+
 # === SHEET CONFIGURATION ===
 SHEET_URL = "https://docs.google.com/spreadsheets/d/1ah_-_4cDJx-jKgBbSKBroyesnInBPxi0ow-dssnFVRg/edit#gid=0"
-
-# === AUTHORIZATION ===
-@st.cache_resource
-def authorize_gspread():
-    try:
-        scope = ["https://spreadsheets.google.com/feeds", "https://www.googleapis.com/auth/drive"]
-        creds_dict = st.secrets["gcp_service_account"]
-        creds = ServiceAccountCredentials.from_json_keyfile_dict(creds_dict, scope)
-        return gspread.authorize(creds)
-    except Exception:
-        scope = ["https://spreadsheets.google.com/feeds", "https://www.googleapis.com/auth/drive"]
-        creds = ServiceAccountCredentials.from_json_keyfile_name("gspread_service_account.json", scope)
-        return gspread.authorize(creds)
+DAILY_HEADERS = ["DATE", "PARAMETER", "VALUE", "NOTES"]
+DAILY_SCHEMA = {"dates": {"DATE": "%Y-%m-%d"}, "categories": ["PARAMETER"]}
+AGGREGATES_PATH = os.environ.get("TRACKER_AGGREGATES", "daily_aggregates.json")
+DASHBOARD_METRICS = ["weight", "steps", "calories", "water"]
 
 # === WORKSHEET ACCESS ===
 @st.cache_resource
@@ -35,21 +31,89 @@ def get_daily_tracker_sheet():
     sheet = gc.open_by_url(SHEET_URL)
     return sheet.worksheet("Sheet1")  # rename if your sheet is not Sheet1
 
-worksheet = get_daily_tracker_sheet()
+daily_store = get_store("daily_tracker", DAILY_HEADERS, get_daily_tracker_sheet, index_on=["DATE"], schema=DAILY_SCHEMA)
+
+def get_entries():
+    prefetch.wait("daily_tracker")
+    return daily_store.get_frame()
+
+@st.cache_resource
+def get_daily_aggregates():
+    aggregates = DailyAggregates(path=AGGREGATES_PATH)
+    daily_store.subscribe(aggregates.on_event)
+    return aggregates
+
+@st.cache_resource
+def get_daily_pivot():
+    # The date x metric matrix, patched by the store's change events instead of re-pivoted.
+    from pivot import DailyPivot  # numpy and pandas load with the first dashboard, not on import
+    pivot = DailyPivot()
+    daily_store.subscribe(pivot.on_event)
+    return pivot
+
+def show_comparison(pivot):
+    from charts import metrics_chart_png  # matplotlib only loads once a chart is drawn
+    from pivot import select
+
+    metrics = pivot.metrics()
+    if not metrics:
+        return
+    with st.expander("Compare metrics"):
+        chosen = st.multiselect("Metrics", metrics, default=[m for m in DASHBOARD_METRICS if m in metrics][:2])
+        span = st.date_input("Dates", value=(), format="YYYY-MM-DD")
+        start, end = (tuple(span) + (None, None))[:2]
+        if not chosen:
+            return
+        frame = pivot.frame(chosen, start, end)
+        if st.checkbox("Scale each metric to 0–1", value=len(chosen) > 1):
+            low, high = frame.min(), frame.max()
+            frame = (frame - low) / (high - low).where(high > low, 1)
+        st.image(metrics_chart_png(frame))
+        # The summary only changes with the data or the selection, not on every rerun.
+        stats = pivot.derived(("stats", tuple(chosen), start, end),
+                              lambda matrix: select(matrix, chosen, start, end).agg(["mean", "min", "max", "count"]).T)
+        st.dataframe(stats)
+
+def show_trends(aggregates):
+    import pandas as pd
+
+    metrics = [m for m in DASHBOARD_METRICS if m in aggregates.metrics()]
+    if metrics:
+        cols = st.columns(len(metrics))
+        for col, metric in zip(cols, metrics):
+            week = aggregates.rolling_mean(metric, 7)
+            month = aggregates.rolling_mean(metric, 30)
+            col.metric(f"{metric.title()} · 7-day avg", f"{week:,.1f}",
+                       delta=f"{week - month:+,.1f} vs 30-day" if month is not None else None)
+
+    for habit in sorted(aggregates.habits):
+        st.write(f"🔥 {habit.title()} streak: {aggregates.streak(habit)} days")
+
+    if metrics:
+        with st.expander("Weekly and monthly totals"):
+            metric = st.selectbox("Metric", metrics)
+            period = st.radio("Period", ["week", "month"], horizontal=True)
+            totals = pd.DataFrame(aggregates.totals(metric, period), columns=[period.title(), "Total", "Entries"])
+            st.dataframe(totals, hide_index=True)
 
 # === SECTION: DASHBOARD ===
+@prefetch.fragment("daily_tracker")
+@timed_page
 def daily_dashboard():
     st.subheader("📊 Daily Tracker Dashboard")
-    data = worksheet.get_all_records()
-    df = pd.DataFrame(data)
+    aggregates = get_daily_aggregates()
+    df = get_entries()
     if not df.empty:
-        df['DATE'] = pd.to_datetime(df['DATE'])
+        show_trends(aggregates)
+        show_comparison(get_daily_pivot())
         st.dataframe(df)
         st.write("Total Entries:", len(df))
     else:
         st.info("No entries found.")
 
 # === SECTION: ADD ENTRY ===
+@prefetch.fragment()
+@timed_page
 def add_entry():
     st.subheader("➕ Add Entry")
     with st.form("add_form"):
@@ -59,22 +123,32 @@ def add_entry():
         notes = st.text_area("Notes")
         submitted = st.form_submit_button("Add")
         if submitted:
-            worksheet.append_row([str(date_val), param, value, notes])
+            daily_store.append_row([str(date_val), param, value, notes])
             st.success("Entry added successfully!")
 
 # === SECTION: UPDATE ENTRY ===
+@prefetch.fragment("daily_tracker")
+@timed_page
 def update_entry():
     st.subheader("✏️ Update Entry")
-    data = worksheet.get_all_records()
-    df = pd.DataFrame(data)
+    df = get_entries()
     if df.empty:
         st.info("No entries to update.")
         return
 
-    row_to_edit = st.selectbox("Select entry to update", df.index)
-    selected_row = df.iloc[row_to_edit]
+    labels = dict(zip(df["ID"], df["DATE"].astype(str) + " · " + df["PARAMETER"].astype(str)))
+    entry_id = st.selectbox("Select entry to update", list(labels), format_func=labels.get)
+    update_form(entry_id)
+
+@prefetch.fragment()
+def update_form(entry_id):
+    selected_row = daily_store.cached_record(entry_id)
+    if selected_row is None:
+        st.info("This entry no longer exists.")
+        return
 
     with st.form("update_form"):
+        import pandas as pd
         date_val = st.date_input("Date", value=pd.to_datetime(selected_row['DATE']).date())
         param = st.text_input("Parameter", value=selected_row['PARAMETER'])
         value = st.text_input("Value", value=selected_row['VALUE'])
@@ -82,22 +156,56 @@ def update_entry():
         submitted = st.form_submit_button("Update")
 
         if submitted:
-            worksheet.update(f"A{row_to_edit+2}", [[str(date_val), param, value, notes]])
-            st.success("Entry updated successfully!")
+            try:
+                # Saved only if nobody changed the entry since this form was shown.
+                daily_store.update_row(entry_id, [str(date_val), param, value, notes],
+                                       st.session_state.get("shown_entry_rev", {}).get(entry_id))
+                st.success("Entry updated successfully!")
+            except ConflictError:
+                st.warning("This entry was changed by someone else, so your edit was not saved. "
+                           "Review the current version and try again.")
+    # The next submit is checked against the REV now cached; None if the entry was deleted meanwhile.
+    current = daily_store.cached_record(entry_id)
+    st.session_state["shown_entry_rev"] = {entry_id: current[REV_COLUMN]} if current is not None else {}
 
 # === SECTION: DELETE ENTRY ===
+@prefetch.fragment("daily_tracker")
+@timed_page
 def delete_entry():
     st.subheader("🗑️ Delete Entry")
-    data = worksheet.get_all_records()
-    df = pd.DataFrame(data)
+    df = get_entries()
     if df.empty:
         st.info("No entries to delete.")
         return
 
-    row_to_delete = st.selectbox("Select entry to delete", df.index)
-    selected_row = df.iloc[row_to_delete]
+    labels = dict(zip(df["ID"], df["DATE"].astype(str) + " · " + df["PARAMETER"].astype(str)))
+    entry_id = st.selectbox("Select entry to delete", list(labels), format_func=labels.get)
+    selected_row = daily_store.get_record(entry_id)
     st.write(selected_row)
 
     if st.button("Delete"):
-        worksheet.delete_rows(row_to_delete + 2)
+        daily_store.delete_row(entry_id)
         st.success("Entry deleted successfully!")
+
+# === SECTION: IMPORT CSV ===
+@prefetch.fragment("daily_tracker")
+@timed_page
+def import_entries():
+    st.subheader("📥 Import CSV")
+    st.caption("Columns like 63_day_weight_loss_tracker.csv: Date, Weight (kg), Steps, Mood, Notes, ...")
+    uploaded = st.file_uploader("CSV file", type="csv")
+    if uploaded is not None and st.button("Import"):
+        bar = st.progress(0.0)
+        total = max(uploaded.size, 1)
+        from importer import import_csv
+        try:
+            result = import_csv(uploaded, daily_store, "long",
+                                progress=lambda r: bar.progress(min(uploaded.tell() / total, 1.0)))
+        except ValueError as e:
+            st.error(f"Could not import this file: {e}")
+            return
+        bar.progress(1.0)
+        st.success(f"Imported {result.imported} entries from {result.read} lines "
+                   f"({result.existing} already present, {result.empty} blank).")
+        if result.rejected:
+            st.warning(f"{result.rejected} lines had an invalid date or number and were skipped.")
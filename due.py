@@ -0,0 +1,174 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 22:31:54 2026
+
+Open tasks ordered by due date, for overdue / this week / next N views.
+
+DueDates follows a CachedStore's change events and keeps every open task
+with a readable target date in one sorted list of
+
+    (target date, type rank, ID)
+
+so the most pressing task comes first: earliest date, then the most
+urgent type. The list is kept sorted as tasks are added, edited, closed
+or deleted, so a view is a binary search plus a slice of the rows it
+returns; nothing is parsed or sorted per rerun. Tasks without a readable
+target date are counted but not scheduled.
+
+Optionally a background thread checks every TRACKER_OVERDUE_CHECK seconds
+for tasks that have just become overdue (e.g. at midnight) and records
+them in `notices`, which the UI shows as toasts.
+
+@author: shyamdk
+"""
+import bisect
+import logging
+import os
+import threading
+import time
+from collections import deque
+from datetime import date, timedelta
+
+from row_index import ID_COLUMN, REV_COLUMN, apply_reload
+from search import parse_date
+
+logger = logging.getLogger(__name__)
+
+# === CONFIGURATION ===
+OVERDUE_CHECK = float(os.environ.get("TRACKER_OVERDUE_CHECK", "600"))  # seconds; 0 turns the check off
+
+
+class DueDates:
+    def __init__(self, date_column, date_format, status_column, closed=(), type_column=None, type_order=()):
+        self.date_column = date_column
+        self.date_format = date_format
+        self.status_column = status_column
+        self.closed = set(closed)
+        self.type_column = type_column
+        self.type_rank = {t: i for i, t in enumerate(type_order)}  # unknown types sort after these
+        self.lock = threading.Lock()
+        self.entries = []   # sorted (target date, type rank, ID) of open, dated tasks
+        self.keys = {}      # ID -> its entry
+        self.records = {}   # ID -> record, for every task seen
+        self.undated = set()
+        self.flagged = set()  # IDs already reported as overdue
+        self.notices = deque(maxlen=20)  # (seq, day, [records]) of tasks that became overdue
+        self._seq = 0
+
+    # === UPDATES ===
+    def _entry(self, record):
+        if str(record.get(self.status_column, "")) in self.closed:
+            return None
+        day = parse_date(str(record.get(self.date_column, "")), self.date_format)
+        if day is None:
+            return False
+        rank = self.type_rank.get(str(record.get(self.type_column, "")), len(self.type_rank))
+        return (day, rank, record[ID_COLUMN])
+
+    def _add(self, record, bulk=False):
+        entry_id = record[ID_COLUMN]
+        self.records[entry_id] = record
+        entry = self._entry(record)
+        if entry is False:
+            self.undated.add(entry_id)
+        elif entry is not None:
+            self.keys[entry_id] = entry
+            if bulk:
+                self.entries.append(entry)  # sorted once after the reload
+            else:
+                bisect.insort(self.entries, entry)
+        if not entry or entry[0] >= date.today():
+            self.flagged.discard(entry_id)  # closed or moved out: it can be flagged again later
+        elif bulk:
+            self.flagged.add(entry_id)  # already overdue when loaded, so not news
+
+    def _remove(self, entry_id):
+        self.records.pop(entry_id, None)
+        self.undated.discard(entry_id)
+        entry = self.keys.pop(entry_id, None)
+        if entry is not None:
+            del self.entries[bisect.bisect_left(self.entries, entry)]
+
+    def on_event(self, event, *args):
+        with self.lock:
+            if event == "reload":
+                if apply_reload(args[0], self.records, lambda i: self.records[i].get(REV_COLUMN, ""),
+                                self._remove, lambda record: self._add(record, bulk=True)):
+                    self.entries.sort()
+                self.flagged &= set(self.records)  # deleted tasks can't be reported again
+            elif event == "append":
+                self._add(args[0])
+            elif event == "update":
+                self._remove(args[0][ID_COLUMN])
+                self._add(args[1])
+            elif event == "delete":
+                self._remove(args[0][ID_COLUMN])
+                self.flagged.discard(args[0][ID_COLUMN])
+
+    # === QUERIES ===
+    def _slice(self, start=None, end=None, limit=None):
+        # end is exclusive; every entry on a day sorts after (day,) and before (day + 1,).
+        lo = 0 if start is None else bisect.bisect_left(self.entries, (start,))
+        hi = len(self.entries) if end is None else bisect.bisect_left(self.entries, (end,))
+        if limit is not None:
+            hi = min(hi, lo + limit)
+        return [self.records[entry_id] for _, _, entry_id in self.entries[lo:hi]]
+
+    def between(self, start=None, end=None, limit=None):
+        """Open tasks due from start to end inclusive (either None for open-ended), most pressing first."""
+        with self.lock:
+            return self._slice(start, end + timedelta(days=1) if end else None, limit)
+
+    def overdue(self, today=None, limit=None):
+        with self.lock:
+            return self._slice(None, today or date.today(), limit)
+
+    def due_this_week(self, today=None):
+        """Open tasks due from today to Sunday."""
+        today = today or date.today()
+        return self.between(today, today + timedelta(days=6 - today.weekday()))
+
+    def upcoming(self, k, today=None):
+        """The next k open tasks due today or later."""
+        with self.lock:
+            return self._slice(today or date.today(), None, k)
+
+    def counts(self, today=None):
+        today = today or date.today()
+        sunday = today + timedelta(days=6 - today.weekday())
+        with self.lock:
+            first = bisect.bisect_left(self.entries, (today,))
+            return {"overdue": first,
+                    "this_week": bisect.bisect_left(self.entries, (sunday + timedelta(days=1),)) - first,
+                    "open": len(self.entries), "undated": len(self.undated)}
+
+    # === OVERDUE CHECK ===
+    def check_overdue(self, today=None):
+        """Record tasks that are overdue and weren't before; returns them."""
+        today = today or date.today()
+        with self.lock:
+            due = self.entries[:bisect.bisect_left(self.entries, (today,))]
+            fresh = [self.records[entry_id] for _, _, entry_id in due if entry_id not in self.flagged]
+            if fresh:
+                self.flagged.update(r[ID_COLUMN] for r in fresh)
+                self._seq += 1
+                self.notices.append((self._seq, today, fresh))
+            return fresh
+
+    def start_checking(self, interval=OVERDUE_CHECK):
+        """Run check_overdue() every `interval` seconds on a daemon thread."""
+        if interval <= 0:
+            return
+
+        def run():
+            while True:
+                time.sleep(interval)
+                try:
+                    fresh = self.check_overdue()
+                    if fresh:
+                        logger.info("%d tasks became overdue", len(fresh))
+                except Exception:
+                    logger.exception("Overdue check failed")
+
+        threading.Thread(target=run, name="overdue-check", daemon=True).start()
@@ -0,0 +1,257 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 19:05:37 2026
+
+In-memory stand-ins for gspread's Client, Spreadsheet and Worksheet.
+
+They implement the calls this app makes, with optional simulated
+latency per request and a per-minute request quota that raises the same
+429 APIError the real API does, so flows can be measured offline:
+
+    client = FakeClient({SHEET_URL: FakeSpreadsheet({"Sheet1": FakeWorksheet(rows)})})
+
+Every request is counted in FakeClient.stats (calls per method, bytes
+read) so callers can see how many API calls a page render made.
+
+@author: shyamdk
+"""
+import itertools
+import json
+import re
+import threading
+import time
+from collections import Counter, deque
+
+from gspread.exceptions import APIError, WorksheetNotFound
+from gspread.utils import numericise_all
+
+
+def _col_number(letters):
+    n = 0
+    for ch in letters:
+        n = n * 26 + ord(ch) - 64
+    return n
+
+
+def _parse_range(a1):
+    # "A2:G10", "H2:I", "K1", "A5:G5" -> (first_col, first_row, last_col, last_row or None)
+    m = re.fullmatch(r"([A-Z]+)(\d+)(?::([A-Z]+)(\d*))?", a1)
+    first_col, first_row = _col_number(m.group(1)), int(m.group(2))
+    last_col = _col_number(m.group(3)) if m.group(3) else first_col
+    last_row = int(m.group(4)) if m.group(4) else (None if m.group(3) else first_row)
+    return first_col, first_row, last_col, last_row
+
+
+class _Response:
+    # Just enough of requests.Response for gspread's APIError.
+    def __init__(self, code, message):
+        self.status_code = code
+        self.text = message
+        self._error = {"error": {"code": code, "message": message, "status": "RESOURCE_EXHAUSTED"}}
+
+    def json(self):
+        return self._error
+
+
+class RequestStats:
+    def __init__(self, latency=0.0, quota_per_minute=None):
+        self.latency = latency
+        self.quota_per_minute = quota_per_minute
+        self.calls = Counter()
+        self.bytes_read = 0
+        self._recent = deque()
+        self._lock = threading.Lock()
+
+    def request(self, method, payload=None):
+        with self._lock:
+            now = time.monotonic()
+            if self.quota_per_minute is not None:
+                while self._recent and now - self._recent[0] > 60:
+                    self._recent.popleft()
+                if len(self._recent) >= self.quota_per_minute:
+                    self.calls["429"] += 1
+                    raise APIError(_Response(429, "Quota exceeded for quota metric 'Read requests'"))
+                self._recent.append(now)
+            self.calls[method] += 1
+            if payload is not None:
+                self.bytes_read += len(json.dumps(payload, default=str))
+        if self.latency:
+            time.sleep(self.latency)
+        return payload
+
+    def total(self):
+        return sum(n for method, n in self.calls.items() if method != "429")
+
+    def reset(self):
+        with self._lock:
+            self.calls.clear()
+            self.bytes_read = 0
+
+
+_sheet_ids = itertools.count()
+
+
+class FakeWorksheet:
+    def __init__(self, rows=(), title="Sheet1", stats=None):
+        self.title = title
+        self.id = next(_sheet_ids)
+        self.spreadsheet = None  # set by FakeSpreadsheet
+        self.stats = stats or RequestStats()
+        self.data = [[str(v) for v in row] for row in rows]
+        self._lock = threading.Lock()
+
+    def _request(self, method, payload=None):
+        return self.stats.request(method, payload)
+
+    def _read(self, first_col, first_row, last_col, last_row):
+        last_row = last_row or len(self.data)
+        out = []
+        for row in self.data[first_row - 1:last_row]:
+            values = row[first_col - 1:last_col]
+            while values and values[-1] == "":
+                values.pop()
+            out.append(values)
+        while out and not out[-1]:
+            out.pop()
+        return out
+
+    def _write(self, a1, values):
+        first_col, first_row, _, _ = _parse_range(a1)
+        for i, vals in enumerate(values):
+            while len(self.data) < first_row + i:
+                self.data.append([])
+            row = self.data[first_row + i - 1]
+            end = first_col - 1 + len(vals)
+            row.extend([""] * (end - len(row)))
+            row[first_col - 1:end] = [str(v) for v in vals]
+
+    # === READS ===
+    def get_all_values(self):
+        with self._lock:
+            values = [list(row) for row in self.data]
+        return self._request("get_all_values", values)
+
+    def get_all_records(self):
+        with self._lock:
+            headers = list(self.data[0]) if self.data else []
+            records = [
+                dict(zip(headers, numericise_all(row + [""] * (len(headers) - len(row)), default_blank="")))
+                for row in self.data[1:]
+            ]
+        return self._request("get_all_records", records)
+
+    def row_values(self, row):
+        with self._lock:
+            values = list(self.data[row - 1]) if row <= len(self.data) else []
+        return self._request("row_values", values)
+
+    def col_values(self, col):
+        with self._lock:
+            values = [row[col - 1] if len(row) >= col else "" for row in self.data]
+        return self._request("col_values", values)
+
+    def get(self, a1):
+        with self._lock:
+            values = self._read(*_parse_range(a1))
+        return self._request("get", values)
+
+    def batch_get(self, ranges):
+        with self._lock:
+            values = [self._read(*_parse_range(a1)) for a1 in ranges]
+        return self._request("batch_get", values)
+
+    # === WRITES ===
+    def append_row(self, row, **kwargs):
+        self._request("append_row")
+        with self._lock:
+            self.data.append([str(v) for v in row])
+
+    def append_rows(self, rows, **kwargs):
+        self._request("append_rows")
+        with self._lock:
+            self.data.extend([str(v) for v in row] for row in rows)
+
+    def update(self, range_name, values=None, **kwargs):
+        if not isinstance(range_name, str):
+            range_name, values = values, range_name  # gspread 6 also takes (values, range_name)
+        self._request("update")
+        with self._lock:
+            self._write(range_name, values)
+
+    def update_cell(self, row, col, value):
+        self._request("update_cell")
+        with self._lock:
+            self._write(f"{chr(64 + col)}{row}", [[value]])
+
+    def batch_update(self, data, **kwargs):
+        self._request("batch_update")
+        with self._lock:
+            for item in data:
+                self._write(item["range"], item["values"])
+
+    def delete_rows(self, start_index, end_index=None):
+        self._request("delete_rows")
+        with self._lock:
+            del self.data[start_index - 1:end_index or start_index]
+
+    def clear(self):
+        self._request("clear")
+        with self._lock:
+            self.data = []
+
+
+class FakeSpreadsheet:
+    def __init__(self, worksheets, stats=None):
+        self.stats = stats or RequestStats()
+        self._worksheets = dict(worksheets)
+        for ws in self._worksheets.values():
+            ws.stats = self.stats
+            ws.spreadsheet = self
+
+    @property
+    def sheet1(self):
+        return next(iter(self._worksheets.values()))
+
+    def worksheets(self):
+        self.stats.request("worksheets")
+        return list(self._worksheets.values())
+
+    def worksheet(self, title):
+        self.stats.request("worksheet")
+        try:
+            return self._worksheets[title]
+        except KeyError:
+            raise WorksheetNotFound(title) from None
+
+    def add_worksheet(self, title, rows, cols, **kwargs):
+        self.stats.request("add_worksheet")
+        ws = FakeWorksheet(title=title, stats=self.stats)
+        ws.spreadsheet = self
+        self._worksheets[title] = ws
+        return ws
+
+    def batch_update(self, body):
+        # Only row deletes are supported; requests apply in order, as in the API.
+        self.stats.request("spreadsheet.batch_update")
+        by_id = {ws.id: ws for ws in self._worksheets.values()}
+        for request in body["requests"]:
+            span = request["deleteDimension"]["range"]
+            ws = by_id[span["sheetId"]]
+            with ws._lock:
+                del ws.data[span["startIndex"]:span["endIndex"]]
+        return {"replies": [{} for _ in body["requests"]]}
+
+
+class FakeClient:
+    def __init__(self, spreadsheets, stats=None):
+        self.stats = stats or RequestStats()
+        self._spreadsheets = dict(spreadsheets)
+        for book in self._spreadsheets.values():
+            book.stats = self.stats
+            for ws in book._worksheets.values():
+                ws.stats = self.stats
+
+    def open_by_url(self, url):
+        self.stats.request("open_by_url")
+        return self._spreadsheets[url]
@@ -0,0 +1,195 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 20:41:27 2026
+
+Bulk import of the 63-day tracker CSV (and any history in the same layout).
+
+The CSV is read in chunks, so a file of any size is never fully in memory.
+Each chunk is validated, mapped onto the store's layout and written with
+one append_rows() call:
+
+    long   DATE / PARAMETER / VALUE / NOTES, one row per filled-in metric
+           (daily_tracker)
+    wide   one row per day with the wmanage-main.py daily columns; metrics
+           without a column of their own are kept in COMMENTS
+
+Rows already in the store (same date, or same date and parameter) are
+skipped, so importing the same file twice adds nothing. Rows with an
+unparseable date or number are counted as rejected and left out.
+
+    python importer.py 63_day_weight_loss_tracker.csv --format long
+    python importer.py history.csv --format wide --dry-run
+
+@author: shyamdk
+"""
+import argparse
+import logging
+import os
+from collections import namedtuple
+
+import pandas as pd
+
+from row_index import META_COLUMNS
+
+logger = logging.getLogger(__name__)
+
+# === CONFIGURATION ===
+CHUNK_SIZE = int(os.environ.get("TRACKER_IMPORT_CHUNK", "500"))  # CSV lines per append_rows call
+
+DATE_COLUMN = "Date"
+DATE_FORMAT = "%Y-%m-%d"
+NUMERIC_COLUMNS = ["Weight (kg)", "Calories In", "Activity (mins)", "Steps", "Water (L)"]
+METRIC_COLUMNS = NUMERIC_COLUMNS + ["Mood"]
+NOTES_COLUMN = "Notes"
+# CSV column -> wide daily column; the other metrics go into COMMENTS.
+WIDE_COLUMNS = {"Weight (kg)": "CURRENT_WEIGHT", "Steps": "STEPS", "Mood": "MOOD_JOURNAL", "Notes": "COMMENTS"}
+# Same columns as DAILY_HEADERS in wmanage-main.py, for the command line.
+WIDE_HEADERS = ["DATE", "TARGET_WEIGHT", "CURRENT_WEIGHT", "STEPS", "YOGA", "BREATHING",
+                "BLOOD_PRESSURE", "FASTING_SUGAR", "MOOD_JOURNAL", "COMMENTS"]
+
+ImportResult = namedtuple("ImportResult", ["read", "imported", "existing", "rejected", "empty", "chunks"])
+
+
+# === VALIDATION ===
+def _validate(chunk):
+    """(dates, valid mask) for a chunk of raw string cells."""
+    dates = pd.to_datetime(chunk[DATE_COLUMN].str.strip(), format=DATE_FORMAT, errors="coerce")
+    valid = dates.notna()
+    for col in NUMERIC_COLUMNS:
+        if col in chunk:
+            text = chunk[col].str.strip()
+            valid &= (text == "") | pd.to_numeric(text, errors="coerce").notna()
+    return dates.dt.strftime(DATE_FORMAT), valid
+
+
+def _filled(chunk):
+    """Mask of lines with at least one metric or note (the template ships with blank days)."""
+    cols = [col for col in METRIC_COLUMNS + [NOTES_COLUMN] if col in chunk]
+    if not cols:
+        return pd.Series(False, index=chunk.index)
+    return (chunk[cols].apply(lambda col: col.str.strip()) != "").any(axis=1)
+
+
+# === MAPPING ===
+def long_rows(chunk, dates, headers):
+    """[(key, row)] with one DATE/PARAMETER/VALUE/NOTES row per filled-in metric."""
+    metrics = [col for col in METRIC_COLUMNS if col in chunk]
+    notes = chunk[NOTES_COLUMN].str.strip() if NOTES_COLUMN in chunk else pd.Series("", index=chunk.index)
+    out = []
+    for i, day in dates.items():
+        note = notes[i]
+        for col in metrics:
+            value = chunk.at[i, col].strip()
+            if value:
+                out.append(((day, col), [day, col, value, note]))
+                note = ""  # the day's note goes on its first row only
+        if note:
+            out.append(((day, NOTES_COLUMN), [day, NOTES_COLUMN, "", note]))
+    return out
+
+
+def wide_rows(chunk, dates, headers):
+    """[(key, row)] with one row per day, laid out as `headers`."""
+    out = []
+    for i, day in dates.items():
+        record = {"DATE": day}
+        extra = []
+        for col in METRIC_COLUMNS + [NOTES_COLUMN]:
+            value = chunk.at[i, col].strip() if col in chunk else ""
+            if not value:
+                continue
+            if WIDE_COLUMNS.get(col) in headers:
+                record[WIDE_COLUMNS[col]] = value
+            else:
+                extra.append(f"{col}: {value}")
+        if extra:
+            record["COMMENTS"] = "; ".join(filter(None, [record.get("COMMENTS", "")] + extra))
+        out.append((day, [record.get(h, "") for h in headers]))
+    return out
+
+
+FORMATS = {"long": long_rows, "wide": wide_rows}
+
+
+def _existing_keys(store, fmt):
+    records = store.get_all_records()
+    if fmt == "long":
+        return {(str(r["DATE"])[:10], str(r["PARAMETER"])) for r in records}
+    return {str(r["DATE"])[:10] for r in records}
+
+
+# === IMPORT ===
+def import_csv(source, store, fmt="long", chunk_size=CHUNK_SIZE, dry_run=False, progress=None):
+    """
+    Stream `source` (path or file object) into `store`; progress(result) is called after each chunk.
+
+    Raises ValueError when the file has no Date column or isn't a readable CSV
+    (pandas' parser and decoding errors are ValueErrors too).
+    """
+    mapper = FORMATS[fmt]
+    headers = [h for h in store.headers if h not in META_COLUMNS]
+    seen = _existing_keys(store, fmt)
+    read = imported = existing = rejected = empty = chunks = 0
+
+    reader = pd.read_csv(source, chunksize=chunk_size, dtype=str, keep_default_na=False, skipinitialspace=True)
+    for chunk in reader:
+        chunk.columns = [str(c).strip() for c in chunk.columns]
+        if DATE_COLUMN not in chunk:
+            raise ValueError(f"CSV has no {DATE_COLUMN!r} column; found {list(chunk.columns)}")
+        read += len(chunk)
+        dates, valid = _validate(chunk)
+        filled = _filled(chunk)
+        rejected += int((~valid & filled).sum())
+        empty += int((~filled).sum())
+        chunk, dates = chunk[valid & filled], dates[valid & filled]
+
+        rows = []
+        for key, row in mapper(chunk, dates, headers):
+            if key in seen:
+                existing += 1
+                continue
+            seen.add(key)
+            rows.append(row)
+        if rows and not dry_run:
+            store.append_rows(rows)
+            chunks += 1
+        imported += len(rows)
+        if progress is not None:
+            progress(ImportResult(read, imported, existing, rejected, empty, chunks))
+    return ImportResult(read, imported, existing, rejected, empty, chunks)
+
+
+# === COMMAND LINE ===
+def _open_store(fmt):
+    if fmt == "long":
+        from daily_tracker import daily_store
+        return daily_store
+    from daily_tracker import SHEET_URL
+    from storage import authorize_gspread, get_store
+    return get_store("wmanage_daily", WIDE_HEADERS, lambda: authorize_gspread().open_by_url(SHEET_URL).sheet1,
+                     index_on=["DATE"])
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Bulk-import a daily tracker CSV.")
+    parser.add_argument("path")
+    parser.add_argument("--format", choices=sorted(FORMATS), default="long",
+                        help="long: daily_tracker rows; wide: wmanage-main.py rows")
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE)
+    parser.add_argument("--dry-run", action="store_true", help="validate and count, write nothing")
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+
+    from write_queue import QUEUES
+    store = _open_store(args.format)
+    result = import_csv(args.path, store, args.format, args.chunk_size, args.dry_run,
+                        progress=lambda r: logger.info("%d lines read, %d rows imported", r.read, r.imported))
+    for queue in QUEUES.values():
+        while queue.flush():
+            pass
+    logger.info("Done: %s", result._asdict())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,250 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 15:36:44 2026
+
+Offline-first write-ahead journal in front of a storage backend.
+
+Writes are appended to a local JSON-lines file and fsynced before they
+return, so a form submit only waits on the local disk. A background
+worker replays the journal to the backend in batches and records each
+replayed entry's key in a companion ".synced" file. A batch costs one read
+of the sheet's IDs and at most one append_rows(), one batch_update() and
+one delete_rows() call. Replay is idempotent: an append whose ID is
+already in the sheet, or an update/delete of an ID that is gone, is
+skipped, so a crash between writing the sheet and the checkpoint never
+duplicates a row. Reads merge still-unsynced entries on top of what the
+backend returns.
+
+Enable it with TRACKER_JOURNAL_DIR=<directory>.
+
+@author: shyamdk
+"""
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+from collections import deque
+
+from row_index import ID_COLUMN
+from write_queue import FlushAck, QUEUES
+
+logger = logging.getLogger(__name__)
+
+# === CONFIGURATION ===
+JOURNAL_DIR = os.environ.get("TRACKER_JOURNAL_DIR", "")
+SYNC_INTERVAL = float(os.environ.get("TRACKER_JOURNAL_SYNC", "5"))  # seconds
+REPLAY_BATCH = 200
+
+
+def _append_lines(path, lines):
+    with open(path, "a", encoding="utf-8") as f:
+        f.write("".join(line + "\n" for line in lines))
+        f.flush()
+        os.fsync(f.fileno())
+
+
+def _read_lines(path):
+    if not os.path.exists(path):
+        return []
+    with open(path, "rb+") as f:
+        data = f.read()
+        end = data.rfind(b"\n") + 1
+        if end < len(data):
+            # A crash in the middle of _append_lines leaves a torn last line. Cut it off, so the
+            # next append starts on a fresh line; it was never acknowledged as written.
+            logger.warning("Dropping a torn line at the end of %s", path)
+            f.truncate(end)
+    return [line for line in data[:end].decode("utf-8", errors="replace").split("\n") if line.strip()]
+
+
+def _parse_entries(lines, path):
+    entries = []
+    for line in lines:
+        try:
+            entries.append(json.loads(line))
+        except ValueError:
+            logger.warning("Skipping an unreadable entry in %s: %.80s", path, line)
+    return entries
+
+
+class JournaledStore:
+    def __init__(self, store, table, directory=JOURNAL_DIR, interval=SYNC_INTERVAL):
+        self.store = store
+        self.table = table
+        self.headers = store.headers
+        self.id_pos = self.headers.index(ID_COLUMN)
+        self.interval = interval
+        self.lock = threading.RLock()
+        self._replay_lock = threading.Lock()  # one replayer at a time (worker or "Sync now")
+        self.acks = deque(maxlen=20)
+        self.last_error = None
+        self._seq = 0
+
+        os.makedirs(directory, exist_ok=True)
+        self.path = os.path.join(directory, f"{table}.journal")
+        self.synced_path = self.path + ".synced"
+        synced = set(_read_lines(self.synced_path))
+        self._pending = deque(
+            entry for entry in _parse_entries(_read_lines(self.path), self.path) if entry["key"] not in synced
+        )
+
+        self._wake = threading.Event()
+        threading.Thread(target=self._run, name=f"journal-{table}", daemon=True).start()
+        QUEUES[f"{table} journal"] = self
+
+    def pending(self):
+        with self.lock:
+            return len(self._pending)
+
+    # === JOURNAL ===
+    @staticmethod
+    def _entry(op, entry_id, row=None, rev=None):
+        entry = {"key": uuid.uuid4().hex, "op": op, "id": entry_id, "row": row, "at": time.time()}
+        if rev is not None:
+            entry["rev"] = rev  # the REV the edit was based on
+        return entry
+
+    def _commit(self, op, entry_id, row=None, rev=None):
+        self._commit_entries([self._entry(op, entry_id, row, rev)])
+
+    def _commit_entries(self, entries):
+        # One write and one fsync for the lot.
+        with self.lock:
+            _append_lines(self.path, [json.dumps(entry, default=str) for entry in entries])
+            self._pending.extend(entries)
+        self._wake.set()
+
+    def _merge_pending(self, records):
+        with self.lock:
+            pending = list(self._pending)
+        if not pending:
+            return records
+        records = list(records)
+        pos = {r[ID_COLUMN]: i for i, r in enumerate(records)}
+        removed = set()
+        for entry in pending:
+            entry_id = entry["id"]
+            i = pos.get(entry_id)
+            if entry["op"] == "delete":
+                if i is not None:
+                    removed.add(i)
+                continue
+            record = dict(zip(self.headers, entry["row"]))
+            if i is None:
+                pos[entry_id] = len(records)
+                records.append(record)
+            else:
+                records[i] = record
+                removed.discard(i)
+        return [r for i, r in enumerate(records) if i not in removed]
+
+    # === READS ===
+    def get_all_records(self):
+        return self._merge_pending(self.store.get_all_records())
+
+    def sync(self, records):
+        # An incremental sync only lines up once the journal has drained.
+        if self.pending() or not hasattr(self.store, "sync"):
+            return None
+        return self.store.sync(records)
+
+    # === WRITES ===
+    def append_row(self, row):
+        self._commit("append", row[self.id_pos], list(row))
+
+    def append_rows(self, rows):
+        self._commit_entries([self._entry("append", row[self.id_pos], list(row)) for row in rows])
+
+    def update_row(self, entry_id, row, expected_rev=None):
+        self._commit("update", entry_id, list(row), expected_rev)
+
+    def batch_update(self, updates, expected=None):
+        expected = expected or {}
+        self._commit_entries([
+            self._entry("update", entry_id, list(row), expected.get(entry_id)) for entry_id, row in updates.items()
+        ])
+
+    def delete_row(self, entry_id):
+        self._commit("delete", entry_id)
+
+    def delete_rows(self, entry_ids):
+        self._commit_entries([self._entry("delete", entry_id) for entry_id in entry_ids])
+
+    # === REPLAY ===
+    def _run(self):
+        while True:
+            self._wake.wait(self.interval)
+            self._wake.clear()
+            try:
+                while self.flush():
+                    pass
+            except Exception:
+                logger.exception("Journal replay failed for %s", self.table)
+
+    def flush(self):
+        """Replay one batch of pending entries; returns the ack, or None if idle."""
+        with self._replay_lock:
+            return self._replay()
+
+    def _replay(self):
+        with self.lock:
+            batch = list(self._pending)[:REPLAY_BATCH]
+        if not batch:
+            return None
+
+        appends, updates, expected, deletes = {}, {}, {}, []
+        counts = {"append": 0, "update": 0, "delete": 0}
+        try:
+            present = set(self.store.present({entry["id"] for entry in batch}))
+            # Folded the way WriteQueue folds its buffer: an edit of a row appended in this
+            # batch rides on the append, and a row appended and deleted in it is never sent.
+            for entry in batch:
+                op, entry_id = entry["op"], entry["id"]
+                if op == "append" and entry_id not in present:
+                    appends[entry_id] = entry["row"]
+                    present.add(entry_id)
+                elif op == "update" and entry_id in appends:
+                    appends[entry_id] = entry["row"]
+                elif op == "update" and entry_id in present:
+                    updates[entry_id] = entry["row"]
+                    if entry.get("rev") is not None:
+                        expected.setdefault(entry_id, entry["rev"])
+                elif op == "delete" and entry_id in present:
+                    present.discard(entry_id)
+                    updates.pop(entry_id, None)
+                    expected.pop(entry_id, None)
+                    if appends.pop(entry_id, None) is None:
+                        deletes.append(entry_id)
+                else:
+                    continue  # already applied by an earlier, interrupted replay
+                counts[op] += 1
+            if appends:
+                self.store.append_rows(list(appends.values()))
+            if updates:
+                self.store.batch_update(updates, expected)
+            if deletes:
+                self.store.delete_rows(deletes)  # see SheetStore.delete_rows
+            if hasattr(self.store, "flush"):
+                self.store.flush()
+        except Exception as e:
+            self.last_error = e
+            raise
+
+        with self.lock:
+            _append_lines(self.synced_path, [entry["key"] for entry in batch])
+            for _ in batch:
+                self._pending.popleft()
+            if not self._pending:
+                # Everything reached the sheet; start both files afresh.
+                open(self.path, "w").close()
+                open(self.synced_path, "w").close()
+            self.last_error = None
+            self._seq += 1
+            # Deletes of adjacent rows share a call, so this is the least it took.
+            calls = 1 + bool(appends) + bool(updates) + bool(deletes)
+            ack = FlushAck(self._seq, self.table, counts["append"], counts["update"], calls, time.time())
+            self.acks.append(ack)
+        return ack
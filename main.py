@@ -6,27 +6,42 @@ Created on Tue Aug  5 17:37:49 2025
 @author: shyamdk
 """
 import streamlit as st
-import daily_tracker
-import task_tracker  # Make sure you have this file already
+import prefetch
+from profiling import show_metrics_panel, show_startup_report, timed, track_rerun
 
-st.set_page_config(page_title="Daily + Task Tracker", layout="wide")
+with timed("import trackers"):
+    import daily_tracker
+    import task_tracker  # Make sure you have this file already
+from write_queue import show_write_status
 
-st.sidebar.title("📋 Navigation")
-section = st.sidebar.radio("Go to", ["Daily Tracker", "Task Tracker"])
+# Counts every Sheets call and page timing of this run (when TRACKER_DEBUG/TRACKER_METRICS_FILE is set).
+with track_rerun("main"):
+    # Open both spreadsheets and load their rows in parallel; pages wait on their own future.
+    prefetch.start({"daily_tracker": daily_tracker.daily_store, "task_tracker": task_tracker.task_store})
 
-if section == "Daily Tracker":
-    st.sidebar.markdown("### Daily Tracker Options")
-    option = st.sidebar.radio("Choose function", ["Dashboard", "Add Entry", "Update Entry", "Delete Entry"])
+    st.set_page_config(page_title="Daily + Task Tracker", layout="wide")
 
-    if option == "Dashboard":
-        daily_tracker.daily_dashboard()
-    elif option == "Add Entry":
-        daily_tracker.add_entry()
-    elif option == "Update Entry":
-        daily_tracker.update_entry()
-    elif option == "Delete Entry":
-        daily_tracker.delete_entry()
+    st.sidebar.title("📋 Navigation")
+    section = st.sidebar.radio("Go to", ["Daily Tracker", "Task Tracker"])
 
-elif section == "Task Tracker":
-    task_tracker.task_tracker_ui()
+    if section == "Daily Tracker":
+        st.sidebar.markdown("### Daily Tracker Options")
+        option = st.sidebar.radio("Choose function", ["Dashboard", "Add Entry", "Update Entry", "Delete Entry", "Import CSV"])
 
+        if option == "Dashboard":
+            daily_tracker.daily_dashboard()
+        elif option == "Add Entry":
+            daily_tracker.add_entry()
+        elif option == "Update Entry":
+            daily_tracker.update_entry()
+        elif option == "Delete Entry":
+            daily_tracker.delete_entry()
+        elif option == "Import CSV":
+            daily_tracker.import_entries()
+
+    elif section == "Task Tracker":
+        task_tracker.task_tracker_ui()
+
+    show_write_status()
+    show_startup_report()
+show_metrics_panel()
@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 23:52:19 2026
+
+Wide date x metric view of the long DATE/PARAMETER/VALUE/NOTES daily log.
+
+DailyPivot subscribes to a CachedStore and keeps one numeric cell per day
+and metric. Values are coerced the way the aggregates do it (numbers as
+floats, yes/no as 1/0, anything else left out), and parameters are
+grouped by metric name, so "Weight (kg)" and "weight" share a column.
+When several rows fall on the same day and metric, the most recently
+written one counts.
+
+Each change touches only its own cell. The matrix is materialized as a
+DataFrame once per version: an edit to a cell that is already in it is
+patched into that frame in place; only a new day or metric makes the next
+read rebuild the frame, from the cells rather than by re-pivoting rows.
+Callers can memoize anything computed from the matrix with derived().
+
+@author: shyamdk
+"""
+import threading
+
+import numpy as np
+import pandas as pd
+
+from aggregates import long_format_rows
+from row_index import ID_COLUMN, REV_COLUMN, apply_reload
+
+
+def select(matrix, metrics=None, start=None, end=None):
+    """Cut a date x metric matrix to some metrics and dates, without modifying it."""
+    if metrics is not None:
+        matrix = matrix.reindex(columns=list(metrics))
+    matrix = matrix.loc[pd.Timestamp(start) if start else None:pd.Timestamp(end) if end else None]
+    # Days whose only entries were deleted stay in the matrix until it is next rebuilt.
+    return matrix.dropna(how="all")
+
+
+class DailyPivot:
+    def __init__(self, extract=long_format_rows):
+        self.extract = extract
+        self.lock = threading.RLock()
+        self.version = 0
+        self.rows = {}   # entry_id -> (rev, day, metric)
+        self.cells = {}  # (date, metric) -> {entry_id: value}, most recently written last
+        self._frame = None
+        self._derived = {}  # key -> (version, value)
+
+    # === UPDATES ===
+    def _touch(self, key):
+        day, metric = key
+        entries = self.cells.get(key)
+        value = next(reversed(entries.values())) if entries else np.nan
+        frame = self._frame
+        if frame is not None:
+            day = pd.Timestamp(day)
+            if day in frame.index and metric in frame.columns:
+                frame.at[day, metric] = value
+            elif entries:
+                self._frame = None  # a new day or metric; rebuilt from the cells on the next read
+
+    def _remove(self, entry_id):
+        known = self.rows.pop(entry_id, None)
+        if known is None:
+            return None
+        key = known[1:]
+        entries = self.cells[key]
+        entries.pop(entry_id, None)
+        if not entries:
+            del self.cells[key]
+        return key
+
+    def _add(self, record):
+        extracted = self.extract(record)
+        if extracted is None:
+            return None
+        metric, day, value, _ = extracted
+        key = (day, metric)
+        self.rows[record[ID_COLUMN]] = (str(record.get(REV_COLUMN, "")),) + key
+        self.cells.setdefault(key, {})[record[ID_COLUMN]] = value
+        return key
+
+    def on_event(self, event, *args):
+        with self.lock:
+            touched = set()
+            if event == "reload":
+                apply_reload(args[0], self.rows, lambda i: self.rows[i][0],
+                             lambda entry_id: touched.add(self._remove(entry_id)),
+                             lambda record: touched.add(self._add(record)))
+            elif event == "append":
+                touched.add(self._add(args[0]))
+            elif event == "update":
+                touched.update((self._remove(args[0][ID_COLUMN]), self._add(args[1])))
+            elif event == "delete":
+                touched.add(self._remove(args[0][ID_COLUMN]))
+            touched.discard(None)
+            if touched:
+                for key in touched:
+                    self._touch(key)
+                self.version += 1
+
+    # === QUERIES ===
+    def _matrix(self):
+        if self._frame is None:
+            keys = list(self.cells)
+            days = sorted({day for day, _ in keys})
+            metrics = pd.Index(sorted({metric for _, metric in keys}))
+            position = {day: i for i, day in enumerate(days)}
+            values = np.full((len(days), len(metrics)), np.nan)
+            values[[position[day] for day, _ in keys], metrics.get_indexer([metric for _, metric in keys])] = [
+                next(reversed(entries.values())) for entries in self.cells.values()
+            ]
+            days = pd.DatetimeIndex(days, name="DATE")
+            self._frame = pd.DataFrame(values, index=days, columns=metrics)
+        return self._frame
+
+    def metrics(self):
+        with self.lock:
+            return sorted({metric for _, metric in self.cells})
+
+    def frame(self, metrics=None, start=None, end=None):
+        """Copy of the matrix (rows: days, columns: metrics), optionally cut to some metrics and dates."""
+        with self.lock:
+            return select(self._matrix(), metrics, start, end)
+
+    def derived(self, key, build):
+        """Memoize build(matrix) until the data changes; build must not modify the matrix."""
+        with self.lock:
+            hit = self._derived.get(key)
+            if hit is None or hit[0] != self.version:
+                # Keys follow what the user picks, so drop the ones built for older versions.
+                self._derived = {k: v for k, v in self._derived.items() if v[0] == self.version}
+                hit = (self.version, build(self._matrix()))
+                self._derived[key] = hit
+            return hit[1]
@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 16:20:09 2026
+
+Warm several stores in parallel on a small thread pool.
+
+start() opens each store's spreadsheet and loads its rows into the shared
+cache, all at once, so the first page waits for roughly one round trip
+instead of one per sheet. Pages call wait(name) before reading; it
+returns as soon as that store's future is done (or at once if it was
+never prefetched). Each store is prefetched once per process; a failed
+prefetch is retried on the next start().
+
+Pages are split into sections with the @fragment(*names) decorator. A
+section is an st.fragment: interacting with a widget inside it reruns only
+that function, not the whole script. It names the stores it reads; before
+each run it waits for their prefetch and brings them up to date (served
+from the cache unless its TTL has expired), and touches no others:
+
+    @fragment("task_tracker")
+    def show_dashboard(): ...
+
+A section that only writes, like an Add form, names none and never reads.
+Neither does an edit form split off into a section of its own: submitting
+it reruns just the form, which takes its row from cached_record() as the
+cache holds it.
+
+Set TRACKER_PREFETCH=0 to turn it off.
+
+@author: shyamdk
+"""
+import functools
+import logging
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import streamlit as st
+
+from profiling import timed, track_rerun
+from storage import STORES
+
+logger = logging.getLogger(__name__)
+
+# === CONFIGURATION ===
+ENABLED = os.environ.get("TRACKER_PREFETCH", "1") != "0"
+MAX_WORKERS = int(os.environ.get("TRACKER_PREFETCH_WORKERS", "4"))
+
+_executor = ThreadPoolExecutor(max_workers=MAX_WORKERS, thread_name_prefix="prefetch")
+_futures = {}  # store name -> Future
+_lock = threading.Lock()
+
+
+def _warm(name, store):
+    with timed(f"prefetch {name}"):
+        store.get_all_records()
+    return store
+
+
+def start(stores):
+    """Submit every {name: store} that isn't loaded or loading yet; returns the futures."""
+    if not ENABLED:
+        return {}
+    with _lock:
+        for name, store in stores.items():
+            future = _futures.get(name)
+            if future is None or (future.done() and future.exception() is not None):
+                _futures[name] = _executor.submit(_warm, name, store)
+        return {name: _futures[name] for name in stores}
+
+
+def wait(name, timeout=None):
+    future = _futures.get(name)
+    if future is None:
+        return
+    try:
+        future.result(timeout=timeout)
+    except Exception:
+        # The page's own read will retry and surface the error if it persists.
+        logger.exception("Prefetch of %s failed", name)
+
+
+def fragment(*names):
+    """Decorator: make func a section that reruns on its own and reads only the named stores."""
+    def decorate(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            # A rerun of just this section is measured as a rerun of its own.
+            with track_rerun(f"fragment {func.__name__}"):
+                for name in names:
+                    wait(name)
+                    STORES[name].get_all_records()
+                return func(*args, **kwargs)
+        return st.fragment(wrapper)
+    return decorate
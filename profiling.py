@@ -0,0 +1,276 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 13:21:40 2026
+
+Startup timing: how long connecting, opening sheets and first reads took.
+
+Per-rerun metrics: every Sheets call made through the authorized client
+(count, bytes returned, wall time) and every page function (wall time),
+grouped by the Streamlit rerun that triggered them. Calls made on other
+threads while a rerun is in progress (prefetch, flush timers) count
+towards that rerun.
+
+    TRACKER_DEBUG=1                 show the metrics panel in the sidebar
+    TRACKER_METRICS_FILE=path       export after every rerun
+    TRACKER_METRICS_FORMAT=jsonl    one JSON line per rerun (default), or
+                       prometheus   running totals in text exposition format
+
+Instrumentation is off unless one of the first two is set.
+
+@author: shyamdk
+"""
+import functools
+import json
+import os
+import threading
+import time
+from collections import Counter, deque
+from contextlib import contextmanager
+
+import streamlit as st
+
+# === CONFIGURATION ===
+DEBUG_PANEL = os.environ.get("TRACKER_DEBUG", "") == "1"
+METRICS_FILE = os.environ.get("TRACKER_METRICS_FILE", "")
+METRICS_FORMAT = os.environ.get("TRACKER_METRICS_FORMAT", "jsonl")
+ENABLED = DEBUG_PANEL or bool(METRICS_FILE)
+
+STARTUP_TIMINGS = {}  # label -> seconds, first occurrence only
+_lock = threading.Lock()
+
+
+@contextmanager
+def timed(label):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        with _lock:
+            STARTUP_TIMINGS.setdefault(label, elapsed)
+
+
+def show_startup_report():
+    if not STARTUP_TIMINGS:
+        return
+    with _lock:
+        timings = dict(STARTUP_TIMINGS)
+    with st.sidebar.expander(f"⏱️ Startup: {sum(timings.values()) * 1000:.0f} ms"):
+        for label, seconds in timings.items():
+            st.write(f"{label}: {seconds * 1000:.0f} ms")
+
+
+# === PER-RERUN METRICS ===
+class Rerun:
+    def __init__(self, name):
+        self.name = name
+        self.at = time.time()
+        self.seconds = 0.0
+        self.calls = Counter()       # op -> count
+        self.bytes = Counter()       # op -> bytes returned
+        self.op_seconds = Counter()  # op -> seconds
+        self.pages = Counter()       # page -> seconds
+
+    def as_dict(self):
+        return {
+            "at": round(self.at, 3), "name": self.name, "ms": round(self.seconds * 1000, 1),
+            "ops": {op: {"calls": n, "bytes": self.bytes[op], "ms": round(self.op_seconds[op] * 1000, 1)}
+                    for op, n in self.calls.items()},
+            "pages": {page: round(s * 1000, 1) for page, s in self.pages.items()},
+        }
+
+
+RECENT_RERUNS = deque(maxlen=20)
+_totals = Rerun("total")  # everything since start, including calls outside any rerun
+_renders = Counter()      # page -> times rendered
+_reruns = Counter()       # rerun name -> count
+_active = []              # reruns in progress, most recent last
+_local = threading.local()
+
+
+def _current():
+    rerun = getattr(_local, "rerun", None)
+    if rerun is None and _active:
+        rerun = _active[-1]
+    return rerun
+
+
+def _payload_size(value):
+    if not isinstance(value, (list, dict, str)):
+        return 0  # spreadsheet/worksheet handles, write responses
+    if isinstance(value, list) and value and _is_worksheet(value[0]):
+        return 0
+    try:
+        return len(json.dumps(value, default=str))
+    except (TypeError, ValueError):
+        return 0
+
+
+def _record(op, seconds, size):
+    with _lock:
+        for rerun in (_current(), _totals):
+            if rerun is not None:
+                rerun.calls[op] += 1
+                rerun.bytes[op] += size
+                rerun.op_seconds[op] += seconds
+
+
+class _Instrumented:
+    """Proxy that times every method call on a gspread Client, Spreadsheet or Worksheet."""
+
+    def __init__(self, target, label):
+        self._target = target
+        self._label = label
+
+    def __getattr__(self, name):
+        attr = getattr(self._target, name)
+        if name.startswith("_") or not callable(attr):
+            return _wrap_result(attr, name)
+
+        @functools.wraps(attr)
+        def call(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                result = attr(*args, **kwargs)
+            finally:
+                elapsed = time.perf_counter() - start
+            _record(f"{self._label}.{name}", elapsed, _payload_size(result))
+            return _wrap_result(result, name)
+        return call
+
+
+def _wrap_result(value, name):
+    # Spreadsheets and worksheets handed out by the client are instrumented too.
+    if isinstance(value, list):
+        return [_wrap_result(item, name) for item in value] if value and _is_worksheet(value[0]) else value
+    if _is_worksheet(value):
+        return _Instrumented(value, value.title)
+    if hasattr(value, "add_worksheet"):
+        return _Instrumented(value, "spreadsheet")
+    return value
+
+
+def _is_worksheet(value):
+    return hasattr(value, "row_values") and hasattr(value, "title")
+
+
+def instrument_client(client):
+    return _Instrumented(client, "client") if ENABLED else client
+
+
+@contextmanager
+def track_rerun(name):
+    """Collect the metrics of one script run; exports and keeps it when the block exits."""
+    if not ENABLED:
+        yield None
+        return
+    if getattr(_local, "rerun", None) is not None:
+        yield _local.rerun  # a fragment inside a full run counts towards that run
+        return
+    rerun = Rerun(name)
+    _local.rerun = rerun
+    with _lock:
+        _active.append(rerun)
+    start = time.perf_counter()
+    try:
+        yield rerun
+    finally:
+        rerun.seconds = time.perf_counter() - start
+        _local.rerun = None
+        with _lock:
+            _active.remove(rerun)
+            RECENT_RERUNS.append(rerun)
+            _reruns[name] += 1
+            _totals.seconds += rerun.seconds
+        _export(rerun)
+
+
+def timed_page(func):
+    """Decorator: add the page function's wall time to the current rerun."""
+    if not ENABLED:
+        return func
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            elapsed = time.perf_counter() - start
+            with _lock:
+                for rerun in (_current(), _totals):
+                    if rerun is not None:
+                        rerun.pages[func.__name__] += elapsed
+                _renders[func.__name__] += 1
+    return wrapper
+
+
+# === EXPORT ===
+def _label(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"')
+
+
+def prometheus_text():
+    """Running totals in Prometheus text exposition format."""
+    with _lock:
+        lines = [
+            "# HELP tracker_reruns_total Streamlit script runs.",
+            "# TYPE tracker_reruns_total counter",
+            *[f'tracker_reruns_total{{script="{_label(name)}"}} {n}' for name, n in _reruns.items()],
+            "# HELP tracker_rerun_seconds_total Wall time spent in script runs.",
+            "# TYPE tracker_rerun_seconds_total counter",
+            f"tracker_rerun_seconds_total {_totals.seconds:.6f}",
+            "# HELP tracker_sheets_calls_total Google Sheets API calls.",
+            "# TYPE tracker_sheets_calls_total counter",
+            *[f'tracker_sheets_calls_total{{op="{_label(op)}"}} {n}' for op, n in _totals.calls.items()],
+            "# HELP tracker_sheets_bytes_total Bytes returned by Google Sheets API calls.",
+            "# TYPE tracker_sheets_bytes_total counter",
+            *[f'tracker_sheets_bytes_total{{op="{_label(op)}"}} {n}' for op, n in _totals.bytes.items()],
+            "# HELP tracker_sheets_seconds_total Wall time spent in Google Sheets API calls.",
+            "# TYPE tracker_sheets_seconds_total counter",
+            *[f'tracker_sheets_seconds_total{{op="{_label(op)}"}} {s:.6f}' for op, s in _totals.op_seconds.items()],
+            "# HELP tracker_page_renders_total Page function calls.",
+            "# TYPE tracker_page_renders_total counter",
+            *[f'tracker_page_renders_total{{page="{_label(page)}"}} {n}' for page, n in _renders.items()],
+            "# HELP tracker_page_seconds_total Wall time spent in page functions.",
+            "# TYPE tracker_page_seconds_total counter",
+            *[f'tracker_page_seconds_total{{page="{_label(page)}"}} {s:.6f}' for page, s in _totals.pages.items()],
+        ]
+    return "\n".join(lines) + "\n"
+
+
+def _export(rerun):
+    if not METRICS_FILE:
+        return
+    try:
+        if METRICS_FORMAT == "prometheus":
+            # Written whole and swapped in, so a scraper never sees half a file.
+            tmp = METRICS_FILE + ".tmp"
+            with open(tmp, "w", encoding="utf-8") as f:
+                f.write(prometheus_text())
+            os.replace(tmp, METRICS_FILE)
+        else:
+            with _lock, open(METRICS_FILE, "a", encoding="utf-8") as f:
+                f.write(json.dumps(rerun.as_dict()) + "\n")
+    except OSError:
+        pass  # metrics must never break a page
+
+
+def show_metrics_panel():
+    if not DEBUG_PANEL or not RECENT_RERUNS:
+        return
+    with _lock:
+        reruns = list(RECENT_RERUNS)
+    last = reruns[-1]
+    with st.sidebar.expander(f"🐞 Last rerun: {last.seconds * 1000:.0f} ms, {sum(last.calls.values())} API calls"):
+        for page, seconds in last.pages.items():
+            st.write(f"{page}: {seconds * 1000:.0f} ms")
+        for op, n in last.calls.most_common():
+            st.write(f"{op} ×{n}: {last.op_seconds[op] * 1000:.0f} ms, {last.bytes[op] / 1024:.1f} KiB")
+        st.caption("Recent reruns")
+        st.dataframe(
+            [{"ms": round(r.seconds * 1000), "calls": sum(r.calls.values()),
+              "KiB": round(sum(r.bytes.values()) / 1024, 1)} for r in reversed(reruns)],
+            hide_index=True,
+        )
@@ -0,0 +1,182 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 20:16:48 2026
+
+Keep Sheets calls inside the API quota instead of failing with 429s.
+
+quota_client() wraps the gspread client (and every spreadsheet and
+worksheet it hands out) so that:
+
+    - reads and writes each take a token from a per-process bucket that
+      refills at the per-minute quota, so bursts queue up instead of
+      being rejected
+    - a 429 is retried with jittered exponential backoff, and so is a 5xx,
+      except on appends, inserts and deletes: a 5xx doesn't say whether the
+      request took effect, and repeating one that did would add a duplicate
+      row or, since deletes address rows by position, delete a different one
+    - identical reads already in flight (e.g. two sessions loading the
+      same sheet) share the one request and its result
+
+The Sheets API allows 60 reads and 60 writes per minute per user.
+
+@author: shyamdk
+"""
+import logging
+import os
+import random
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+# === CONFIGURATION ===
+ENABLED = os.environ.get("TRACKER_QUOTA", "1") != "0"
+READ_QUOTA = int(os.environ.get("TRACKER_READ_QUOTA", "60"))    # requests per minute
+WRITE_QUOTA = int(os.environ.get("TRACKER_WRITE_QUOTA", "60"))  # requests per minute
+BURST = int(os.environ.get("TRACKER_QUOTA_BURST", "10"))
+MAX_RETRIES = int(os.environ.get("TRACKER_MAX_RETRIES", "5"))
+BACKOFF_BASE = float(os.environ.get("TRACKER_BACKOFF_BASE", "1.0"))  # seconds
+BACKOFF_MAX = float(os.environ.get("TRACKER_BACKOFF_MAX", "64.0"))
+
+READS = {"open_by_url", "open_by_key", "worksheet", "worksheets", "get_all_records", "get_all_values",
+         "row_values", "col_values", "get", "batch_get", "acell", "cell"}
+WRITES = {"add_worksheet", "append_row", "append_rows", "update", "update_cell", "update_cells",
+          "batch_update", "insert_row", "insert_rows", "delete_rows", "clear"}
+# Not repeated after a 5xx: appends add rows again, positional deletes (including the
+# spreadsheet-level batch_update that carries deleteDimension requests) hit other rows.
+NOT_IDEMPOTENT = {"append_row", "append_rows", "insert_row", "insert_rows", "delete_rows",
+                  "spreadsheet.batch_update"}
+
+
+class TokenBucket:
+    def __init__(self, per_minute, burst=BURST):
+        # Burst plus refill over any 60 s window never exceeds per_minute.
+        self.capacity = max(1, min(burst, per_minute // 2))
+        self.rate = max(per_minute - self.capacity, 1) / 60.0  # tokens per second
+        self.tokens = float(self.capacity)
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        """Take one token, sleeping until one is available; returns the seconds waited."""
+        waited = 0.0
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return waited
+                delay = (1 - self.tokens) / self.rate
+            time.sleep(delay)
+            waited += delay
+
+
+BUCKETS = {"read": TokenBucket(READ_QUOTA), "write": TokenBucket(WRITE_QUOTA)}
+
+
+def _status(exc):
+    code = getattr(exc, "code", None)
+    if code is None:
+        code = getattr(getattr(exc, "response", None), "status_code", None)
+    return code if isinstance(code, int) else None
+
+
+def _retryable(exc, method):
+    status = _status(exc)
+    if status == 429:
+        return True
+    return status is not None and status >= 500 and method not in NOT_IDEMPOTENT
+
+
+def _backoff(attempt):
+    # "Full jitter": a random point in [0, base * 2^attempt], capped.
+    return random.uniform(0, min(BACKOFF_MAX, BACKOFF_BASE * 2 ** attempt))
+
+
+def call_with_quota(kind, method, func, *args, **kwargs):
+    for attempt in range(MAX_RETRIES + 1):
+        BUCKETS[kind].acquire()
+        try:
+            return func(*args, **kwargs)
+        except Exception as exc:
+            if attempt == MAX_RETRIES or not _retryable(exc, method):
+                raise
+            delay = _backoff(attempt)
+            logger.warning("%s failed with %s; retry %d in %.1fs", method, _status(exc), attempt + 1, delay)
+            time.sleep(delay)
+
+
+# === SINGLE-FLIGHT READS ===
+class _InFlight:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+_inflight = {}  # (target id, method, args) -> _InFlight
+_inflight_lock = threading.Lock()
+
+
+def _copy(result):
+    # Followers get their own rows, so one caller's edits can't leak into another's.
+    if isinstance(result, list):
+        return [row.copy() if isinstance(row, (list, dict)) else row for row in result]
+    return result
+
+
+def coalesced_read(target, method, func, *args, **kwargs):
+    key = (id(target), method, repr(args), repr(sorted(kwargs.items())))
+    with _inflight_lock:
+        call = _inflight.get(key)
+        leader = call is None
+        if leader:
+            call = _inflight[key] = _InFlight()
+    if not leader:
+        call.done.wait()
+        if call.error is not None:
+            raise call.error
+        return _copy(call.result)
+    try:
+        call.result = call_with_quota("read", method, func, *args, **kwargs)
+        return call.result
+    except Exception as exc:
+        call.error = exc
+        raise
+    finally:
+        with _inflight_lock:
+            del _inflight[key]
+        call.done.set()
+
+
+# === CLIENT WRAPPER ===
+class _Throttled:
+    def __init__(self, target):
+        self._target = target
+
+    def __getattr__(self, name):
+        attr = getattr(self._target, name)
+        if name.startswith("_") or not callable(attr):
+            return _wrap(attr)
+        if name in READS:
+            return lambda *args, **kwargs: _wrap(coalesced_read(self._target, name, attr, *args, **kwargs))
+        if name in WRITES:
+            # A spreadsheet's batch_update changes structure; a worksheet's only writes values.
+            method = f"spreadsheet.{name}" if hasattr(self._target, "add_worksheet") else name
+            return lambda *args, **kwargs: _wrap(call_with_quota("write", method, attr, *args, **kwargs))
+        return attr
+
+
+def _wrap(value):
+    if isinstance(value, list):
+        return [_wrap(item) for item in value] if value and hasattr(value[0], "row_values") else value
+    if hasattr(value, "row_values") or hasattr(value, "add_worksheet"):
+        return _Throttled(value)
+    return value
+
+
+def quota_client(client):
+    return _Throttled(client) if ENABLED else client
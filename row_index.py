@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 14:02:17 2026
+
+Stable row IDs and an in-memory ID -> row-number index.
+
+Every table gets two trailing columns: ID, a short random string that
+keeps a record's identity when other rows are inserted or deleted, and
+REV, a stamp that changes on every write so readers can tell which rows
+changed since they last looked. An edit can name the REV it was based on;
+if the row has moved on since, the write is refused with ConflictError.
+
+@author: shyamdk
+"""
+import uuid
+
+ID_COLUMN = "ID"
+REV_COLUMN = "REV"
+META_COLUMNS = [ID_COLUMN, REV_COLUMN]
+
+
+# The leading letters stop gspread from reading an all-digit value as a number.
+def new_id():
+    return "r" + uuid.uuid4().hex[:11]
+
+
+def new_rev():
+    return "v" + uuid.uuid4().hex[:8]
+
+
+class ConflictError(Exception):
+    """An edit was based on an older REV of the row; `current` is the row as it is now."""
+
+    def __init__(self, entry_id, current=None):
+        super().__init__(f"Row {entry_id} was changed by someone else")
+        self.entry_id = entry_id
+        self.current = current
+
+
+class RowIndex:
+    """Maps IDs to 0-based positions; sheet row = position + first_row."""
+
+    def __init__(self, ids=(), first_row=2):
+        self.first_row = first_row
+        self.ids = list(ids)
+        self.pos = {entry_id: i for i, entry_id in enumerate(self.ids)}
+
+    def __contains__(self, entry_id):
+        return entry_id in self.pos
+
+    def __len__(self):
+        return len(self.ids)
+
+    def position(self, entry_id):
+        return self.pos[entry_id]
+
+    def row_of(self, entry_id):
+        return self.pos[entry_id] + self.first_row
+
+    def on_append(self, entry_id):
+        self.pos[entry_id] = len(self.ids)
+        self.ids.append(entry_id)
+
+    def on_delete(self, entry_id):
+        i = self.pos.pop(entry_id)
+        del self.ids[i]
+        # Rows below the deleted one move up by one; no sheet read needed.
+        for j in range(i, len(self.ids)):
+            self.pos[self.ids[j]] = j
+        return i
+
+    def on_delete_many(self, entry_ids):
+        """Drop several IDs with a single renumbering pass; returns their old positions."""
+        gone = sorted(self.pos.pop(entry_id) for entry_id in set(entry_ids))
+        if gone:
+            self.ids = [entry_id for entry_id in self.ids if entry_id in self.pos]
+            for j in range(gone[0], len(self.ids)):
+                self.pos[self.ids[j]] = j
+        return gone
+
+
+def runs(numbers):
+    """[(first, last)] of the runs of consecutive numbers, e.g. [2, 3, 4, 9] -> [(2, 4), (9, 9)]."""
+    out = []
+    for n in sorted(numbers):
+        if out and n == out[-1][1] + 1:
+            out[-1] = (out[-1][0], n)
+        else:
+            out.append((n, n))
+    return out
+
+
+def apply_reload(records, known, rev_of, remove, add):
+    """
+    Bring a view kept from change events in line with a full reload.
+
+    `known` holds the IDs the view has and rev_of(ID) the REV it last saw
+    for one. Every ID whose row changed or vanished is removed first, and
+    only then is each changed record added. Views that add in bulk (append
+    unsorted, sort once after) rely on this order: a removal in between
+    would search lists that are not sorted yet. Returns the number of
+    records added.
+    """
+    seen, changed = set(), []
+    for record in records:
+        entry_id = record[ID_COLUMN]
+        seen.add(entry_id)
+        if entry_id not in known or str(rev_of(entry_id)) != str(record.get(REV_COLUMN, "")):
+            changed.append(record)
+    for entry_id in [i for i in known if i not in seen]:
+        remove(entry_id)
+    for record in changed:
+        remove(record[ID_COLUMN])
+    for record in changed:
+        add(record)
+    return len(changed)
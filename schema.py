@@ -0,0 +1,46 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 16:58:23 2026
+
+Turn raw sheet records into a typed DataFrame in one vectorized pass.
+
+A schema is a plain dict naming which columns are dates (with their exact
+strftime format), which are categorical, and which are numeric:
+
+    {"dates": {"ADD_DATE": "%d-%m-%y"},
+     "categories": ["TASK_STATUS"],
+     "numbers": {"STEPS": "Int64"}}
+
+Giving the date format lets pandas parse the whole column at C speed
+instead of guessing row by row; categoricals store each repeated status
+or category string once. Values that don't parse become NaT/NA rather
+than raising, so one bad cell can't break a page.
+
+pandas is imported by the first load_frame() call, so pages that only
+write (and the cache behind them) start without it.
+
+@author: shyamdk
+"""
+
+
+def load_frame(records, columns, schema=None):
+    import pandas as pd
+
+    df = pd.DataFrame(records, columns=columns)
+    if not schema:
+        return df
+    for col, fmt in schema.get("dates", {}).items():
+        if col in df:
+            df[col] = pd.to_datetime(df[col], format=fmt, errors="coerce")
+    for col in schema.get("categories", []):
+        if col in df:
+            df[col] = df[col].astype("category")
+    for col, dtype in schema.get("numbers", {}).items():
+        if col in df:
+            values = pd.to_numeric(df[col], errors="coerce")
+            if pd.api.types.is_integer_dtype(pd.api.types.pandas_dtype(dtype)):
+                # "5000.5" can't be cast to an integer column; like any bad cell it becomes NA.
+                values = values.where(values.mod(1) == 0)
+            df[col] = values.astype(dtype)
+    return df
@@ -0,0 +1,213 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 21:47:06 2026
+
+In-memory search over a table, kept current from a CachedStore's change
+events instead of scanning the DataFrame on every query.
+
+SearchIndex keeps:
+
+    - an inverted index, token -> IDs, over the text columns, plus the
+      sorted vocabulary so the last word of a query can match as a prefix
+      ("rep" finds "report") while it is still being typed
+    - value -> IDs for each facet column (status, category, ...)
+    - a sorted (date, ID) list for each date column, for range filters
+
+A query intersects the candidate sets smallest first, so its cost follows
+the number of matches rather than the size of the table:
+
+    index.query("quarterly report", facets={"TASK_STATUS": ["Pending"]},
+                dates={"TARGET_DATE": (date(2026, 10, 1), None)})
+
+Like the aggregates, each row is remembered by ID and REV, so an append,
+edit or delete only touches that row's entries and a full reload only
+re-indexes rows whose REV changed.
+
+@author: shyamdk
+"""
+import bisect
+import functools
+import heapq
+import itertools
+import re
+import threading
+from datetime import date, datetime
+
+from row_index import ID_COLUMN, REV_COLUMN, apply_reload
+
+TOKEN = re.compile(r"\w+")
+NO_DATE = date.max  # rows with a missing or unreadable date sort last
+
+
+def tokenize(text):
+    return TOKEN.findall(str(text).lower())
+
+
+@functools.lru_cache(maxsize=4096)  # the same few hundred dates repeat across rows
+def parse_date(value, fmt):
+    try:
+        return datetime.strptime(str(value).strip(), fmt).date()
+    except ValueError:
+        return None
+
+
+class SearchIndex:
+    def __init__(self, text_columns, facet_columns=(), date_columns=None):
+        self.text_columns = list(text_columns)
+        self.facet_columns = list(facet_columns)
+        self.date_formats = dict(date_columns or {})  # column -> strftime format, as in a schema
+        self.sort_column = next(iter(self.date_formats), None)
+        self.lock = threading.Lock()
+        self.records = {}   # entry_id -> record as indexed
+        self.keys = {}      # entry_id -> {date column: date or None}
+        self.postings = {}  # token -> set of IDs
+        self.vocab = []     # sorted tokens
+        self.facets = {col: {} for col in self.facet_columns}  # column -> value -> set of IDs
+        self.dates = {col: [] for col in self.date_formats}    # column -> sorted [(date, ID)]
+
+    # === UPDATES ===
+    def _tokens(self, record):
+        return {t for col in self.text_columns for t in tokenize(record.get(col, ""))}
+
+    def _add(self, record, bulk=False):
+        # In bulk, new tokens and dates are appended unsorted and _sort() is called after.
+        insert = list.append if bulk else bisect.insort
+        entry_id = record[ID_COLUMN]
+        self.records[entry_id] = record
+        for token in self._tokens(record):
+            ids = self.postings.get(token)
+            if ids is None:
+                ids = self.postings[token] = set()
+                insert(self.vocab, token)
+            ids.add(entry_id)
+        for col in self.facet_columns:
+            self.facets[col].setdefault(str(record.get(col, "")), set()).add(entry_id)
+        keys = self.keys[entry_id] = {}
+        for col, fmt in self.date_formats.items():
+            day = keys[col] = parse_date(str(record.get(col, "")), fmt)
+            if day is not None:
+                insert(self.dates[col], (day, entry_id))
+
+    def _sort(self):
+        self.vocab.sort()
+        for entries in self.dates.values():
+            entries.sort()
+
+    def _remove(self, entry_id):
+        record = self.records.pop(entry_id, None)
+        if record is None:
+            return
+        for token in self._tokens(record):
+            ids = self.postings[token]
+            ids.discard(entry_id)
+            if not ids:
+                del self.postings[token]
+                del self.vocab[bisect.bisect_left(self.vocab, token)]
+        for col in self.facet_columns:
+            value = str(record.get(col, ""))
+            ids = self.facets[col][value]
+            ids.discard(entry_id)
+            if not ids:
+                del self.facets[col][value]
+        for col, day in self.keys.pop(entry_id).items():
+            if day is not None:
+                entries = self.dates[col]
+                del entries[bisect.bisect_left(entries, (day, entry_id))]
+
+    def on_event(self, event, *args):
+        with self.lock:
+            if event == "reload":
+                # Only rows whose REV changed are re-indexed, in bulk and sorted once.
+                if apply_reload(args[0], self.records, lambda i: self.records[i].get(REV_COLUMN, ""),
+                                self._remove, lambda record: self._add(record, bulk=True)):
+                    self._sort()
+            elif event == "append":
+                self._add(args[0])
+            elif event == "update":
+                self._remove(args[0][ID_COLUMN])
+                self._add(args[1])
+            elif event == "delete":
+                self._remove(args[0][ID_COLUMN])
+
+    # === QUERIES ===
+    def _prefixed(self, prefix):
+        ids = set()
+        i = bisect.bisect_left(self.vocab, prefix)
+        while i < len(self.vocab) and self.vocab[i].startswith(prefix):
+            ids |= self.postings[self.vocab[i]]
+            i += 1
+        return ids
+
+    def _date_range(self, col, start, end):
+        entries = self.dates[col]
+        lo = 0 if start is None else bisect.bisect_left(entries, (start,))
+        hi = len(entries) if end is None else bisect.bisect_right(entries, (end, "\uffff"))
+        return {entry_id for _, entry_id in entries[lo:hi]}
+
+    def _sort_key(self, entry_id):
+        day = self.keys[entry_id].get(self.sort_column)
+        return (day or NO_DATE, entry_id)
+
+    def query(self, text="", facets=None, dates=None, limit=None):
+        """
+        IDs of the rows that contain every word of `text` (the last as a
+        prefix), have one of the given values in each facet column
+        ({column: values}) and fall in each date range ({column: (start, end)},
+        inclusive, either end None). Ordered by the first date column.
+        """
+        terms = tokenize(text)
+        facets = {col: values for col, values in (facets or {}).items() if values}
+        ranges = {col: span for col, span in (dates or {}).items() if span and any(d is not None for d in span)}
+        with self.lock:
+            candidates = [self.postings.get(t, set()) for t in terms[:-1]]
+            if terms:
+                candidates.append(self._prefixed(terms[-1]))
+            for col, values in facets.items():
+                candidates.append(set().union(*(self.facets[col].get(str(v), ()) for v in values)))
+            candidates.sort(key=len)
+
+            if candidates:
+                result = set(candidates[0])
+                for ids in candidates[1:]:
+                    if not result:
+                        break
+                    result &= ids
+            elif ranges:
+                col, (start, end) = ranges.popitem()
+                result = self._date_range(col, start, end)
+            else:
+                result = set(self.records)
+
+            for col, (start, end) in ranges.items():
+                # Cheaper to check the matches already found than to expand the range.
+                result = {i for i in result if self.keys[i][col] is not None
+                          and (start is None or self.keys[i][col] >= start)
+                          and (end is None or self.keys[i][col] <= end)}
+
+            return self._ordered(result, limit)
+
+    def _ordered(self, result, limit):
+        if self.sort_column is None:
+            return sorted(result)[:limit]
+        if len(result) * 8 < len(self.records):
+            if limit is not None:
+                return heapq.nsmallest(limit, result, key=self._sort_key)
+            return sorted(result, key=self._sort_key)
+        # Most rows match: walk the presorted date list instead of sorting them all.
+        dated = (i for _, i in self.dates[self.sort_column] if i in result)
+        undated = sorted(i for i in result if self.keys[i][self.sort_column] is None)
+        return list(itertools.islice(itertools.chain(dated, undated), limit))
+
+    def get(self, ids):
+        """The indexed records for `ids`, in the same order."""
+        with self.lock:
+            return [self.records[i] for i in ids if i in self.records]
+
+    def values(self, col):
+        """Facet values present in the table, e.g. for filter widgets."""
+        with self.lock:
+            return sorted(self.facets[col])
+
+    def __len__(self):
+        return len(self.records)
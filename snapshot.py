@@ -0,0 +1,307 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 21:03:15 2026
+
+Typed columnar snapshots of the tracker tables, for analysis without the
+Sheets API.
+
+Each table is kept in a directory of Arrow IPC part files plus a
+manifest.json listing the live parts and the rows in them that were
+later superseded or deleted:
+
+    snapshots/task_tracker/manifest.json
+    snapshots/task_tracker/part-00007.arrow
+    snapshots/task_tracker.parquet        compressed copy, rewritten on compaction
+
+A refresh only writes the rows whose REV changed since the last one, as a
+new part. Once there are more than MAX_PARTS parts, or more than a fifth
+of the stored rows are dead, the parts are compacted into one. Column
+types come from the table's schema (schema.py): dates are timestamps,
+categoricals are dictionary-encoded, everything else is text.
+
+Parts are uncompressed so read_table() can memory-map them: columns are
+used in place, without copying or parsing, as long as no rows need
+filtering out. From a notebook:
+
+    import snapshot
+    df = snapshot.read_table("daily_tracker", directory="snapshots").to_pandas()
+
+With TRACKER_SNAPSHOT_DIR set, get_store() keeps every table's snapshot
+up to date from the shared cache, at most every TRACKER_SNAPSHOT_INTERVAL
+seconds. `python snapshot.py refresh` does the same once from the
+command line.
+
+@author: shyamdk
+"""
+import argparse
+import json
+import logging
+import os
+import threading
+import time
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from row_index import ID_COLUMN, REV_COLUMN
+from schema import load_frame
+
+logger = logging.getLogger(__name__)
+
+# === CONFIGURATION ===
+SNAPSHOT_DIR = os.environ.get("TRACKER_SNAPSHOT_DIR", "")
+SNAPSHOT_INTERVAL = float(os.environ.get("TRACKER_SNAPSHOT_INTERVAL", "60"))  # seconds
+MAX_PARTS = int(os.environ.get("TRACKER_SNAPSHOT_PARTS", "16"))
+MAX_DEAD = 0.2  # compact once this share of stored rows is superseded
+
+SNAPSHOTS = {}  # table name -> Snapshotter
+
+
+def arrow_schema(headers, schema=None):
+    schema = schema or {}
+    fields = []
+    for h in headers:
+        if h in schema.get("dates", {}):
+            fields.append(pa.field(h, pa.timestamp("ns")))
+        elif h in schema.get("categories", []):
+            fields.append(pa.field(h, pa.dictionary(pa.int32(), pa.string())))
+        elif h in schema.get("numbers", {}):
+            kind = pa.float64() if str(schema["numbers"][h]).startswith("float") else pa.int64()
+            fields.append(pa.field(h, kind))
+        else:
+            fields.append(pa.field(h, pa.string()))
+    return pa.schema(fields)
+
+
+def _write_ipc(path, table):
+    tmp = path + ".tmp"
+    with pa.OSFile(tmp, "wb") as sink, pa.ipc.new_file(sink, table.schema) as writer:
+        writer.write_table(table)
+    os.replace(tmp, path)
+
+
+def _read_ipc(path):
+    # Memory-mapped: the returned columns point straight into the file.
+    return pa.ipc.open_file(pa.memory_map(path, "r")).read_all()
+
+
+def _read_parts(directory, manifest, columns=None):
+    tables = []
+    for part in manifest["parts"]:
+        table = _read_ipc(os.path.join(directory, part["file"]))
+        dead = manifest["dead"].get(part["file"])
+        if dead:
+            keep = [True] * table.num_rows
+            for row in dead:
+                keep[row] = False
+            table = table.filter(pa.array(keep))
+        tables.append(table.select(columns) if columns else table)
+    return pa.concat_tables(tables) if tables else None
+
+
+class Snapshot:
+    def __init__(self, table, headers, schema=None, directory=SNAPSHOT_DIR):
+        self.table = table
+        self.headers = list(headers)
+        self.schema = schema
+        self.arrow_schema = arrow_schema(self.headers, schema)
+        self.dir = os.path.join(directory, table)
+        self.parquet_path = os.path.join(directory, f"{table}.parquet")
+        self.manifest_path = os.path.join(self.dir, "manifest.json")
+        self.lock = threading.Lock()
+        os.makedirs(self.dir, exist_ok=True)
+        self.manifest = self._load_manifest()
+
+    # === MANIFEST ===
+    def _load_manifest(self):
+        empty = {"table": self.table, "seq": 0, "columns": self.headers, "parts": [], "dead": {}}
+        if not os.path.exists(self.manifest_path):
+            return empty
+        with open(self.manifest_path, encoding="utf-8") as f:
+            manifest = json.load(f)
+        if manifest.get("columns") != self.headers:
+            logger.info("Columns of %s changed; starting a new snapshot", self.table)
+            return dict(empty, seq=manifest.get("seq", 0))
+        return manifest
+
+    def _save_manifest(self):
+        tmp = self.manifest_path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(self.manifest, f)
+        os.replace(tmp, self.manifest_path)
+
+    def _part_path(self, part):
+        return os.path.join(self.dir, part["file"])
+
+    # === WRITING ===
+    def _to_arrow(self, records):
+        df = load_frame(records, self.headers, self.schema)
+        for field in self.arrow_schema:
+            if pa.types.is_dictionary(field.type):
+                df[field.name] = df[field.name].astype("string").astype("category")
+            elif pa.types.is_string(field.type):
+                # Cells can mix numbers and text ("72.5" next to "Yes"); store them all as text.
+                df[field.name] = df[field.name].astype("string")
+        return pa.Table.from_pandas(df, schema=self.arrow_schema, preserve_index=False)
+
+    def _locate(self):
+        """ID -> (part file, row, REV) for every live row."""
+        located = {}
+        for part in self.manifest["parts"]:
+            dead = set(self.manifest["dead"].get(part["file"], []))
+            meta = _read_ipc(self._part_path(part)).select([ID_COLUMN, REV_COLUMN])
+            for row, (entry_id, rev) in enumerate(zip(meta[ID_COLUMN].to_pylist(), meta[REV_COLUMN].to_pylist())):
+                if row not in dead:
+                    located[entry_id] = (part["file"], row, rev)
+        return located
+
+    def write(self, upserts, deleted=()):
+        """Store new or changed records and drop deleted IDs; returns the number of rows written."""
+        with self.lock:
+            located = self._locate()
+            changed = [r for r in upserts if located.get(r[ID_COLUMN], (None, None, None))[2] != str(r[REV_COLUMN])]
+            gone = [located[i] for i in deleted if i in located]
+            if not changed and not gone:
+                return 0
+            dead = self.manifest["dead"]
+            for r in changed:
+                if r[ID_COLUMN] in located:
+                    gone.append(located[r[ID_COLUMN]])
+            for part_file, row, _ in gone:
+                dead.setdefault(part_file, []).append(row)
+            if changed:
+                self.manifest["seq"] += 1
+                part = {"file": f"part-{self.manifest['seq']:05d}.arrow", "rows": len(changed)}
+                _write_ipc(self._part_path(part), self._to_arrow(changed))
+                self.manifest["parts"].append(part)
+            self._save_manifest()
+
+            stored = sum(p["rows"] for p in self.manifest["parts"])
+            n_dead = sum(len(rows) for rows in dead.values())
+            if (len(self.manifest["parts"]) > MAX_PARTS or n_dead > MAX_DEAD * stored
+                    or not os.path.exists(self.parquet_path)):
+                self._compact()
+            return len(changed)
+
+    def refresh(self, records):
+        """Bring the snapshot in line with the full set of current records."""
+        current = {r[ID_COLUMN] for r in records}
+        with self.lock:
+            deleted = set(self._locate()) - current
+        return self.write(records, deleted)
+
+    def _compact(self):
+        table = self._read_locked()
+        old = [self._part_path(p) for p in self.manifest["parts"]]
+        self.manifest["seq"] += 1
+        part = {"file": f"part-{self.manifest['seq']:05d}.arrow", "rows": table.num_rows}
+        _write_ipc(self._part_path(part), table)
+        self.manifest["parts"], self.manifest["dead"] = [part], {}
+        self._save_manifest()
+        for path in old:
+            os.remove(path)
+        tmp = self.parquet_path + ".tmp"
+        pq.write_table(table, tmp, compression="zstd")
+        os.replace(tmp, self.parquet_path)
+        logger.info("Compacted %s snapshot to %d rows", self.table, table.num_rows)
+
+    # === READING ===
+    def _read_locked(self, columns=None):
+        table = _read_parts(self.dir, self.manifest, columns)
+        if table is None:
+            table = self.arrow_schema.empty_table().select(columns or self.headers)
+        return table
+
+    def read(self, columns=None):
+        with self.lock:
+            return self._read_locked(columns)
+
+
+def read_table(table, columns=None, directory=None):
+    """Live rows of a table's snapshot as a pyarrow Table, e.g. from a notebook."""
+    directory = os.path.join(directory or SNAPSHOT_DIR or "snapshots", table)
+    with open(os.path.join(directory, "manifest.json"), encoding="utf-8") as f:
+        manifest = json.load(f)
+    result = _read_parts(directory, manifest, columns)
+    if result is None:
+        raise FileNotFoundError(f"Snapshot of {table} has no data yet")
+    return result
+
+
+# === KEEPING SNAPSHOTS CURRENT ===
+class Snapshotter:
+    """Follows a CachedStore's change events and writes them to its snapshot in the background."""
+
+    def __init__(self, store, table, schema=None, directory=SNAPSHOT_DIR, interval=SNAPSHOT_INTERVAL):
+        self.store = store
+        self.snapshot = Snapshot(table, store.headers, schema, directory)
+        self.interval = interval
+        self.lock = threading.Lock()
+        self._full = False
+        self._upserts = {}  # entry_id -> latest record
+        self._deleted = set()
+        store.subscribe(self.on_event)
+        threading.Thread(target=self._run, name=f"snapshot-{table}", daemon=True).start()
+        SNAPSHOTS[table] = self
+
+    def on_event(self, event, *args):
+        with self.lock:
+            if event == "reload":
+                self._full = True
+                self._upserts.clear()
+                self._deleted.clear()
+            elif event in ("append", "update"):
+                record = args[-1]
+                self._upserts[record[ID_COLUMN]] = record
+                self._deleted.discard(record[ID_COLUMN])
+            elif event == "delete":
+                self._upserts.pop(args[0][ID_COLUMN], None)
+                self._deleted.add(args[0][ID_COLUMN])
+
+    def flush(self):
+        with self.lock:
+            full, upserts, deleted = self._full, list(self._upserts.values()), set(self._deleted)
+            self._full = False
+            self._upserts.clear()
+            self._deleted.clear()
+        if full:
+            return self.snapshot.refresh(self.store.get_all_records())
+        if upserts or deleted:
+            return self.snapshot.write(upserts, deleted)
+        return 0
+
+    def _run(self):
+        while True:
+            time.sleep(self.interval)
+            try:
+                self.flush()
+            except Exception:
+                logger.exception("Snapshot of %s failed", self.snapshot.table)
+                with self.lock:
+                    self._full = True  # the next pass rewrites whatever was missed
+
+
+# === COMMAND LINE ===
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Write or inspect tracker snapshots.")
+    parser.add_argument("command", choices=["refresh", "show"])
+    parser.add_argument("--dir", default=SNAPSHOT_DIR or "snapshots")
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+
+    import daily_tracker
+    import task_tracker
+    stores = {"daily_tracker": (daily_tracker.daily_store, daily_tracker.DAILY_SCHEMA),
+              "task_tracker": (task_tracker.task_store, task_tracker.TASK_SCHEMA)}
+    for table, (store, schema) in stores.items():
+        if args.command == "refresh":
+            written = Snapshot(table, store.headers, schema, args.dir).refresh(store.get_all_records())
+            logger.info("%s: %d rows written", table, written)
+        else:
+            snap = read_table(table, directory=args.dir)
+            logger.info("%s: %d rows\n%s", table, snap.num_rows, snap.schema)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,480 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 10:12:31 2026
+
+Storage backends shared by daily_tracker and task_tracker.
+
+Every backend exposes the same small interface. Rows are addressed by the
+stable ID kept in each table's trailing ID column (see row_index.py), never
+by their position, so another session deleting a row can't misdirect a write:
+
+    get_all_records()          -> list of {header: value} dicts
+    has_row(entry_id)          -> bool
+    append_row(row)
+    append_rows(rows)
+    update_row(entry_id, row, expected_rev=None)
+    batch_update({entry_id: row}, expected=None)  -> {entry_id: current record} refused
+    delete_row(entry_id)
+    delete_rows([entry_id, ...])
+
+An expected REV makes an update conditional: if the row's REV has moved
+on, the write is refused (ConflictError from update_row) and the current
+row is handed back, so nothing but that one row needs re-reading.
+
+Rows passed to a backend are complete, ID and REV included; CachedStore is
+the layer that takes data-only rows from the UI and stamps them. Backends
+that can refresh a cached copy cheaply also offer sync(records), and
+count_rows() / get_rows(start, stop) read a table a page at a time.
+
+Pick the backend with TRACKER_BACKEND=sheets|sqlite. With the SQLite
+backend, TRACKER_SHEETS_MIRROR=1 keeps the Google Sheet as a write mirror.
+get_store() puts Sheets writes behind a WriteQueue (write_queue.py) and wraps
+the result in the process-wide CachedStore (cache.py). Nothing is opened
+until the store is first used, so a page only pays for the sheets it reads.
+With TRACKER_JOURNAL_DIR set, Sheets writes are first committed to a local
+journal (journal.py) and replayed in the background. The client from
+authorize_gspread() waits for quota and retries 429s (quota.py). With
+TRACKER_SNAPSHOT_DIR set, each table is also mirrored to Arrow/Parquet
+snapshots for analysis (snapshot.py).
+
+@author: shyamdk
+"""
+import logging
+import os
+import sqlite3
+import threading
+
+import streamlit as st
+
+from cache import CachedStore
+from journal import JOURNAL_DIR, JournaledStore
+from profiling import instrument_client, timed
+from quota import quota_client
+from row_index import ID_COLUMN, META_COLUMNS, REV_COLUMN, ConflictError, RowIndex, new_id, new_rev, runs
+from write_queue import WriteQueue
+
+logger = logging.getLogger(__name__)
+
+# === CONFIGURATION ===
+BACKEND = os.environ.get("TRACKER_BACKEND", "sheets")
+DB_PATH = os.environ.get("TRACKER_DB", "tracker.db")
+SHEETS_MIRROR = os.environ.get("TRACKER_SHEETS_MIRROR", "") == "1"
+SNAPSHOT_DIR = os.environ.get("TRACKER_SNAPSHOT_DIR", "")
+
+SCOPE = ["https://spreadsheets.google.com/feeds", "https://www.googleapis.com/auth/drive"]
+STORES = {}  # table name -> lazy store, for prefetch.fragment()
+
+# === AUTHORIZATION ===
+@st.cache_resource
+def authorize_gspread():
+    # gspread and oauth2client load here, on first use of Sheets, not on import.
+    import gspread
+    from oauth2client.service_account import ServiceAccountCredentials
+
+    with timed("authorize gspread"):
+        try:
+            creds_dict = st.secrets["gcp_service_account"]
+            creds = ServiceAccountCredentials.from_json_keyfile_dict(creds_dict, SCOPE)
+            return quota_client(instrument_client(gspread.authorize(creds)))
+        except Exception:
+            creds = ServiceAccountCredentials.from_json_keyfile_name("gspread_service_account.json", SCOPE)
+            return quota_client(instrument_client(gspread.authorize(creds)))
+
+
+def column_letter(n):
+    # 1 -> A, 26 -> Z, 27 -> AA
+    letters = ""
+    while n:
+        n, rem = divmod(n - 1, 26)
+        letters = chr(65 + rem) + letters
+    return letters
+
+
+# === GOOGLE SHEETS BACKEND ===
+class SheetStore:
+    def __init__(self, worksheet, headers):
+        self.ws = worksheet
+        self.headers = list(headers)
+        self.id_pos = self.headers.index(ID_COLUMN)
+        self.last_col = column_letter(len(self.headers))
+        self.id_col = column_letter(self.id_pos + 1)
+        self.index = None  # RowIndex, built from the first read
+        self._ensure_meta_headers()
+
+    def _ensure_meta_headers(self):
+        header_row = [str(h).strip() for h in self.ws.row_values(1)]
+        meta = header_row[self.id_pos:len(self.headers)]
+        if meta == META_COLUMNS:
+            return
+        if not any(header_row):
+            # A blank worksheet: it gets the whole header row, ID and REV included.
+            self.ws.update(f"A1:{self.last_col}1", [self.headers])
+            return
+        # Only claim the cells after this table's own headers, and only if they are free:
+        # two layouts can point at the same worksheet (daily_tracker and wmanage-main.py
+        # both use Sheet1), and the other one's headers must not be overwritten.
+        data_headers = self.headers[:self.id_pos]
+        if header_row[:self.id_pos] != data_headers or any(cell not in ("", name) for cell, name in zip(meta, META_COLUMNS)):
+            raise ValueError(f"Worksheet {self.ws.title!r} has headers {header_row}, "
+                             f"expected {data_headers} followed by free {META_COLUMNS} columns")
+        self.ws.update(f"{self.id_col}1:{self.last_col}1", [META_COLUMNS])
+
+    def _load_index(self):
+        if self.index is None:
+            # Only the ID column is needed to place a row.
+            self.index = RowIndex(self.ws.col_values(self.id_pos + 1)[1:])
+        return self.index
+
+    def has_row(self, entry_id):
+        return entry_id in self._load_index()
+
+    def present(self, entry_ids):
+        """Those of entry_ids that are in the sheet now, from one read of the ID column."""
+        self.index = None
+        index = self._load_index()
+        return [entry_id for entry_id in entry_ids if entry_id in index]
+
+    def count_rows(self):
+        return len(self._load_index())
+
+    def get_rows(self, start, stop):
+        """Records at 0-based positions start..stop-1, with one ranged read."""
+        if stop <= start:
+            return []
+        return [self._as_record(row) for row in self.ws.get(f"A{start + 2}:{self.last_col}{stop + 1}")]
+
+    def _as_record(self, row):
+        # Same shape get_all_records() gives: padded, with numbers parsed.
+        from gspread.utils import numericise_all
+        row = numericise_all(list(row)[:len(self.headers)], default_blank="")
+        return dict(zip(self.headers, row + [""] * (len(self.headers) - len(row))))
+
+    def get_all_records(self):
+        records = self.ws.get_all_records()
+        missing = [(i, r) for i, r in enumerate(records) if not r.get(ID_COLUMN) or not r.get(REV_COLUMN)]
+        if missing:
+            # Rows written before the ID/REV columns existed get them now, in a single call.
+            for _, r in missing:
+                r[ID_COLUMN] = r.get(ID_COLUMN) or new_id()
+                r[REV_COLUMN] = new_rev()
+            self.ws.batch_update([
+                {"range": f"{self.id_col}{i + 2}:{self.last_col}{i + 2}", "values": [[r[ID_COLUMN], r[REV_COLUMN]]]}
+                for i, r in missing
+            ])
+        self.index = RowIndex(r[ID_COLUMN] for r in records)
+        return records
+
+    def sync(self, records):
+        """
+        Bring a previously read copy up to date without downloading the sheet.
+
+        One call reads just the ID and REV columns; a second fetches the rows
+        whose REV changed plus any rows appended after the known ones. Returns
+        ({position: record}, [appended records]), or None when rows were
+        inserted or deleted in between and a full read is needed instead.
+        """
+        meta = self.ws.get(f"{self.id_col}2:{self.last_col}")
+        if len(meta) < len(records):
+            return None
+        changed = []
+        for i, record in enumerate(records):
+            entry = list(meta[i]) + ["", ""]
+            if entry[0] != record[ID_COLUMN]:
+                return None
+            if entry[1] != str(record[REV_COLUMN]):
+                changed.append(i)
+
+        known = len(records)
+        ranges = [f"A{i + 2}:{self.last_col}{i + 2}" for i in changed]
+        if len(meta) > known:
+            ranges.append(f"A{known + 2}:{self.last_col}{len(meta) + 1}")
+        if not ranges:
+            return {}, []
+
+        fetched = self.ws.batch_get(ranges)
+        updated = {i: self._as_record(rows[0]) for i, rows in zip(changed, fetched) if rows}
+        appended = [self._as_record(row) for row in fetched[-1]] if len(meta) > known else []
+        if any(not r[ID_COLUMN] or not r[REV_COLUMN] for r in appended):
+            return None  # rows added by hand; a full read backfills their IDs
+        if self.index is not None:
+            for record in appended:
+                self.index.on_append(record[ID_COLUMN])
+        return updated, appended
+
+    def append_row(self, row):
+        self.ws.append_row(row)
+        if self.index is not None:
+            self.index.on_append(row[self.id_pos])
+
+    def append_rows(self, rows):
+        self.ws.append_rows(rows)
+        if self.index is not None:
+            for row in rows:
+                self.index.on_append(row[self.id_pos])
+
+    def _locate(self, entry_ids):
+        """
+        {entry_id: (sheet row, REV)} for the IDs still in the sheet, checked against it.
+
+        The index is only rebuilt by a full read, so a row added or removed
+        since (by hand, or by another session) shifts the rows below it. One
+        read of the ID and REV cells at the rows the index names confirms
+        each of them; if any holds another ID, the index is rebuilt from the
+        ID column and the rows are looked up again.
+        """
+        entry_ids = list(dict.fromkeys(entry_ids))
+        for attempt in range(3):
+            index = self._load_index()
+            rows = {entry_id: index.row_of(entry_id) for entry_id in entry_ids if entry_id in index}
+            cells = self.ws.batch_get([f"{self.id_col}{r}:{self.last_col}{r}" for r in rows.values()]) if rows else []
+            meta = {entry_id: (list(cell[0]) if cell else []) + ["", ""] for entry_id, cell in zip(rows, cells)}
+            if all(meta[entry_id][0] == entry_id for entry_id in rows) and (attempt or len(rows) == len(entry_ids)):
+                return {entry_id: (rows[entry_id], meta[entry_id][1]) for entry_id in rows}
+            self.index = None
+        raise RuntimeError(f"Rows of {self.ws.title!r} keep moving; try again")
+
+    def _check(self, updates, expected):
+        """
+        Split {entry_id: row} into [(sheet row, row)] to write and {entry_id: current record} refused.
+
+        Sheets has no compare-and-set, so this is the one read _locate()
+        makes, plus one read of the mismatched rows when there are any. A row
+        already carrying the new REV counts as written (a replayed edit); a
+        row that is gone is refused with None.
+        """
+        located = self._locate(updates)
+        refused = {entry_id: None for entry_id in updates if entry_id not in located}
+        stale = [
+            entry_id for entry_id, (_, rev) in located.items()
+            if expected.get(entry_id) is not None and rev not in (str(expected[entry_id]), updates[entry_id][self.id_pos + 1])
+        ]
+        if stale:
+            rows = self.ws.batch_get([f"A{located[i][0]}:{self.last_col}{located[i][0]}" for i in stale])
+            refused.update({entry_id: self._as_record(r[0]) if r else None for entry_id, r in zip(stale, rows)})
+        return [(row_idx, updates[entry_id]) for entry_id, (row_idx, _) in located.items() if entry_id not in refused], refused
+
+    def update_row(self, entry_id, row, expected_rev=None):
+        writes, refused = self._check({entry_id: row}, {entry_id: expected_rev})
+        if entry_id in refused:
+            if refused[entry_id] is None:
+                raise KeyError(entry_id)
+            raise ConflictError(entry_id, refused[entry_id])
+        row_idx, row = writes[0]
+        self.ws.update(f"A{row_idx}:{self.last_col}{row_idx}", [row])
+
+    def batch_update(self, updates, expected=None):
+        """Write every row whose REV still matches `expected`; returns {entry_id: current record} for the rest."""
+        writes, refused = self._check(updates, expected or {})
+        if writes:
+            self.ws.batch_update([
+                {"range": f"A{row_idx}:{self.last_col}{row_idx}", "values": [row]} for row_idx, row in writes
+            ])
+        return refused
+
+    def delete_row(self, entry_id):
+        located = self._locate([entry_id])
+        if entry_id not in located:
+            raise KeyError(entry_id)
+        self.ws.delete_rows(located[entry_id][0])
+        self.index.on_delete(entry_id)
+
+    def delete_rows(self, entry_ids):
+        """
+        Delete several rows in one call: a deleteDimension request per run of
+        adjacent rows, bottom-up so each delete leaves the rows above it where
+        they were. The API applies the requests together or not at all. IDs
+        no longer in the sheet are skipped.
+        """
+        by_row = {row_idx: entry_id for entry_id, (row_idx, _) in self._locate(entry_ids).items()}
+        spans = list(reversed(runs(by_row)))
+        if len(spans) == 1:
+            self.ws.delete_rows(*spans[0])
+        elif spans:
+            self.ws.spreadsheet.batch_update({"requests": [
+                {"deleteDimension": {"range": {"sheetId": self.ws.id, "dimension": "ROWS",
+                                               "startIndex": first - 1, "endIndex": last}}}
+                for first, last in spans
+            ]})
+        self.index.on_delete_many(by_row.values())
+
+
+# === SQLITE BACKEND ===
+class SQLiteStore:
+    """Local table with one column per header, ordered by insertion."""
+
+    def __init__(self, path, table, headers, index_on=(), mirror=None):
+        self.table = table
+        self.headers = list(headers)
+        self.mirror = mirror
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+
+        # Columns are left untyped so numbers come back as numbers, like gspread.
+        cols = ", ".join(f'"{h}"' for h in self.headers)
+        with self.conn:
+            self.conn.execute(f'CREATE TABLE IF NOT EXISTS "{table}" (_rowid INTEGER PRIMARY KEY, {cols})')
+            # Tables created before a column (such as ID) existed are migrated in place.
+            existing = {info[1] for info in self.conn.execute(f'PRAGMA table_info("{table}")')}
+            for h in self.headers:
+                if h not in existing:
+                    self.conn.execute(f'ALTER TABLE "{table}" ADD COLUMN "{h}"')
+            for (rowid,) in self.conn.execute(
+                f'SELECT _rowid FROM "{table}" WHERE "{ID_COLUMN}" IS NULL OR "{ID_COLUMN}" = ?', ("",)
+            ).fetchall():
+                self.conn.execute(f'UPDATE "{table}" SET "{ID_COLUMN}" = ? WHERE _rowid = ?', (new_id(), rowid))
+            self.conn.execute(f'CREATE UNIQUE INDEX IF NOT EXISTS "ix_{table}_id" ON "{table}" ("{ID_COLUMN}")')
+            for col in index_on:
+                self.conn.execute(f'CREATE INDEX IF NOT EXISTS "ix_{table}_{col}" ON "{table}" ("{col}")')
+
+        self._columns = cols
+        self._placeholders = ", ".join("?" for _ in self.headers)
+        self._assignments = ", ".join(f'"{h}" = ?' for h in self.headers)
+
+    def _pad(self, row):
+        row = list(row)[:len(self.headers)]
+        return row + [""] * (len(self.headers) - len(row))
+
+    def _mirror(self, method, *args):
+        if self.mirror is None:
+            return
+        try:
+            getattr(self.mirror, method)(*args)
+        except Exception:
+            logger.exception("Sheets mirror failed on %s for %s", method, self.table)
+
+    def get_all_records(self):
+        with self.lock:
+            cur = self.conn.execute(f'SELECT {self._columns} FROM "{self.table}" ORDER BY _rowid')
+            return [dict(zip(self.headers, row)) for row in cur.fetchall()]
+
+    def has_row(self, entry_id):
+        with self.lock:
+            cur = self.conn.execute(f'SELECT 1 FROM "{self.table}" WHERE "{ID_COLUMN}" = ?', (entry_id,))
+            return cur.fetchone() is not None
+
+    def count_rows(self):
+        with self.lock:
+            return self.conn.execute(f'SELECT COUNT(*) FROM "{self.table}"').fetchone()[0]
+
+    def get_rows(self, start, stop):
+        with self.lock:
+            cur = self.conn.execute(f'SELECT {self._columns} FROM "{self.table}" ORDER BY _rowid LIMIT ? OFFSET ?',
+                                    (max(stop - start, 0), start))
+            return [dict(zip(self.headers, row)) for row in cur.fetchall()]
+
+    def append_row(self, row):
+        with self.lock, self.conn:
+            self.conn.execute(
+                f'INSERT INTO "{self.table}" ({self._columns}) VALUES ({self._placeholders})', self._pad(row)
+            )
+        self._mirror("append_row", row)
+
+    def append_rows(self, rows):
+        with self.lock, self.conn:
+            self.conn.executemany(
+                f'INSERT INTO "{self.table}" ({self._columns}) VALUES ({self._placeholders})',
+                [self._pad(row) for row in rows],
+            )
+        self._mirror("append_rows", rows)
+
+    def _update(self, entry_id, row, expected_rev):
+        # Returns None when written, else the row as it is now ({} if there is no such row).
+        row = self._pad(row)
+        if expected_rev is None:
+            cur = self.conn.execute(
+                f'UPDATE "{self.table}" SET {self._assignments} WHERE "{ID_COLUMN}" = ?', row + [entry_id]
+            )
+        else:
+            # The REV check and the write are one statement, so nothing can slip in between.
+            cur = self.conn.execute(
+                f'UPDATE "{self.table}" SET {self._assignments} WHERE "{ID_COLUMN}" = ? AND "{REV_COLUMN}" IN (?, ?)',
+                row + [entry_id, str(expected_rev), row[self.headers.index(REV_COLUMN)]],
+            )
+        if cur.rowcount:
+            return None
+        current = self.conn.execute(
+            f'SELECT {self._columns} FROM "{self.table}" WHERE "{ID_COLUMN}" = ?', (entry_id,)
+        ).fetchone()
+        return dict(zip(self.headers, current)) if current else {}
+
+    def update_row(self, entry_id, row, expected_rev=None):
+        with self.lock, self.conn:
+            current = self._update(entry_id, row, expected_rev)
+        if current == {}:
+            raise KeyError(entry_id)
+        if current is not None:
+            raise ConflictError(entry_id, current)
+        self._mirror("update_row", entry_id, row)
+
+    def batch_update(self, updates, expected=None):
+        expected = expected or {}
+        conflicts = {}
+        with self.lock, self.conn:
+            for entry_id, row in updates.items():
+                current = self._update(entry_id, row, expected.get(entry_id))
+                if current:
+                    conflicts[entry_id] = current
+        written = {entry_id: row for entry_id, row in updates.items() if entry_id not in conflicts}
+        if written:
+            self._mirror("batch_update", written)
+        return conflicts
+
+    def delete_row(self, entry_id):
+        with self.lock, self.conn:
+            cur = self.conn.execute(f'DELETE FROM "{self.table}" WHERE "{ID_COLUMN}" = ?', (entry_id,))
+            if cur.rowcount == 0:
+                raise KeyError(entry_id)
+        self._mirror("delete_row", entry_id)
+
+    def delete_rows(self, entry_ids):
+        entry_ids = list(entry_ids)
+        with self.lock, self.conn:
+            self.conn.executemany(f'DELETE FROM "{self.table}" WHERE "{ID_COLUMN}" = ?', [(i,) for i in entry_ids])
+        self._mirror("delete_rows", entry_ids)
+
+
+# === FACTORY ===
+class LazyStore:
+    """Stand-in that builds the real store the first time it is used."""
+
+    def __init__(self, build):
+        self._build = build
+        self._store = None
+        self._lock = threading.Lock()
+
+    def get(self):
+        if self._store is None:
+            with self._lock:
+                if self._store is None:
+                    self._store = self._build()
+        return self._store
+
+    def __getattr__(self, name):
+        return getattr(self.get(), name)
+
+
+def get_store(table, headers, open_worksheet, index_on=(), schema=None):
+    """Return a lazy handle; open_worksheet is only called when Sheets is needed."""
+    headers = list(headers) + META_COLUMNS
+
+    def build():
+        with timed(f"open {table}"):
+            if BACKEND == "sqlite":
+                mirror = WriteQueue(SheetStore(open_worksheet(), headers), table) if SHEETS_MIRROR else None
+                store = SQLiteStore(DB_PATH, table, headers, index_on=index_on, mirror=mirror)
+            else:
+                mirror = store = WriteQueue(SheetStore(open_worksheet(), headers), table)
+                if JOURNAL_DIR:
+                    store = JournaledStore(store, table)
+            cached = CachedStore(store, name=table, schema=schema)
+            if mirror is not None:
+                # Queued edits refused at flush time (stale REV) put the real row back in the cache.
+                mirror.conflict_listeners.append(cached.on_conflict)
+            if SNAPSHOT_DIR:
+                from snapshot import Snapshotter  # pyarrow is only needed with snapshots on
+                Snapshotter(cached, table, schema, SNAPSHOT_DIR)
+            return cached
+
+    STORES[table] = store = LazyStore(build)
+    return store
@@ -6,93 +6,360 @@ Created on Tue Aug  5 17:38:09 2025
 @author: shyamdk
 """
 
+import math
+
 import streamlit as st
-import gspread
-import pandas as pd
 from datetime import datetime
-from oauth2client.service_account import ServiceAccountCredentials
+
+import prefetch
+from archive import Archiver, open_archive
+from due import DueDates
+from profiling import timed_page
+from row_index import ID_COLUMN, META_COLUMNS, REV_COLUMN, ConflictError
+from schema import load_frame
+from search import SearchIndex, parse_date
+from storage import authorize_gspread, get_store
 
 # Task Sheet URL
 TASK_SHEET_URL = "https://docs.google.com/spreadsheets/d/1WyJvCbtQW2Ywpjkmmu0C4h-N4VEnyq6f3_nzdghKbX8/edit#gid=0"
-
-def authorize_gspread():
-    try:
-        scope = ["https://spreadsheets.google.com/feeds", "https://www.googleapis.com/auth/drive"]
-        creds_dict = st.secrets["gcp_service_account"]
-        creds = ServiceAccountCredentials.from_json_keyfile_dict(creds_dict, scope)
-        return gspread.authorize(creds)
-    except Exception:
-        scope = ["https://spreadsheets.google.com/feeds", "https://www.googleapis.com/auth/drive"]
-        creds = ServiceAccountCredentials.from_json_keyfile_name("gspread_service_account.json", scope)
-        return gspread.authorize(creds)
-
-gc = authorize_gspread()
-
+TASK_HEADERS = ["ADD_DATE", "TASK", "TARGET_DATE", "TASK_STATUS", "TASK_CATEGORY", "TASK_TYPE", "COMMENTS"]
+STATUSES = ["Pending", "In Progress", "Completed"]
+OPEN_STATUSES = ["Pending", "In Progress"]
+CATEGORIES = ["Personal", "Office"]
+TYPES = ["Urgent", "Important", "Urgent and Important"]
+URGENCY = ["Urgent and Important", "Urgent", "Important"]  # most pressing first, for tasks due the same day
+PAGE_SIZE = 50
+BULK_LIMIT = 500  # rows in the bulk-edit grid; filter to reach the rest
+MAX_CHOICES = 200  # tasks listed in the Modify/Delete pickers; search narrows the rest
+TASK_SCHEMA = {
+    "dates": {"ADD_DATE": "%d-%m-%y", "TARGET_DATE": "%d-%m-%y"},
+    "categories": ["TASK_STATUS", "TASK_CATEGORY", "TASK_TYPE"],
+}
 
 
 # Initialize or Get Task Sheet
-def get_or_create_task_sheet():
+def get_or_create_task_sheet(title="task_tracker"):
+    gc = authorize_gspread()
     sheet = gc.open_by_url(TASK_SHEET_URL)
     try:
-        task_ws = sheet.worksheet("task_tracker")
+        task_ws = sheet.worksheet(title)
     except:
-        task_ws = sheet.add_worksheet(title="task_tracker", rows="100", cols="10")
-        task_ws.append_row([
-            "ADD_DATE", "TASK", "TARGET_DATE", "TASK_STATUS", "TASK_CATEGORY", "TASK_TYPE", "COMMENTS"
-        ])
+        task_ws = sheet.add_worksheet(title=title, rows="100", cols="10")
+        task_ws.append_row(TASK_HEADERS + META_COLUMNS)
     return task_ws
 
-task_ws = get_or_create_task_sheet()
+task_store = get_store("task_tracker", TASK_HEADERS, get_or_create_task_sheet,
+                       index_on=["ADD_DATE", "TASK_STATUS"], schema=TASK_SCHEMA)
 
 # Core Data Ops
 def get_tasks():
-    records = task_ws.get_all_records()
-    return pd.DataFrame(records)
+    prefetch.wait("task_tracker")
+    return task_store.get_frame()
 
 def add_task(entry):
-    task_ws.append_row(entry)
+    task_store.append_row(entry)
 
-def update_task(row_idx, updated_row):
-    task_ws.update(f'A{row_idx}:G{row_idx}', [updated_row])
+def update_task(task_id, updated_row, expected_rev=None):
+    task_store.update_row(task_id, updated_row, expected_rev)
 
-def delete_task(row_idx):
-    task_ws.delete_rows(row_idx)
+def delete_task(task_id):
+    task_store.delete_row(task_id)
 
-# UI Components
-def task_tracker_ui():
-    st.title("🗂️ Task Tracker")
+# Dashboard Views
+def group_open_tasks(df):
+    # One filter, one sort and one groupby for all categories, in first-seen order.
+    df = df[df["TASK_STATUS"].isin(OPEN_STATUSES)].sort_values(by="TASK_TYPE").drop(columns=[ID_COLUMN])
+    return {category: group for category, group in df.groupby("TASK_CATEGORY", observed=True, sort=False)}
 
-    action = st.sidebar.radio("Action", ["📋 Dashboard", "➕ Add Task", "✏️ Modify Task", "❌ Delete Task"])
+def get_dashboard_views():
+    prefetch.wait("task_tracker")
+    return task_store.derived("dashboard_views", group_open_tasks)
 
-    df = get_tasks()
+# Search
+@st.cache_resource
+def get_task_search():
+    index = SearchIndex(["TASK", "COMMENTS"], ["TASK_STATUS", "TASK_CATEGORY", "TASK_TYPE"],
+                        {col: TASK_SCHEMA["dates"][col] for col in ("TARGET_DATE", "ADD_DATE")})
+    task_store.subscribe(index.on_event)
+    return index
 
-    if action == "📋 Dashboard":
-        st.subheader("📊 Task Dashboard")
-        if df.empty:
-            st.info("No tasks available.")
+def find_task_records(text="", statuses=(), categories=(), types=(), due=None, added=None, limit=None):
+    """Matching task records, soonest target date first."""
+    index = get_task_search()
+    ids = index.query(text, {"TASK_STATUS": statuses, "TASK_CATEGORY": categories, "TASK_TYPE": types},
+                      {"TARGET_DATE": due, "ADD_DATE": added}, limit=limit)
+    return index.get(ids)
+
+def find_tasks(**filters):
+    """Matching tasks as a typed DataFrame, soonest target date first."""
+    return task_frame(find_task_records(**filters))
+
+def task_frame(records):
+    # A typed frame of just these records, instead of filtering the whole table's.
+    return load_frame(records, [h for h in task_store.headers if h != REV_COLUMN], TASK_SCHEMA)
+
+def date_span(value):
+    # st.date_input in range mode returns (), (start,) or (start, end).
+    value = tuple(value or ())
+    return (value + (None, None))[:2] if value else None
+
+def search_filters():
+    """Search box and filters; returns find_tasks() arguments, or None if left at the defaults."""
+    text = st.text_input("🔍 Search tasks", placeholder="Words from the task or its comments")
+    with st.expander("Filters"):
+        statuses = st.multiselect("Status", STATUSES, default=OPEN_STATUSES)
+        categories = st.multiselect("Category", CATEGORIES)
+        types = st.multiselect("Type", TYPES)
+        due = date_span(st.date_input("Target date between", value=(), format="DD-MM-YYYY"))
+        added = date_span(st.date_input("Added between", value=(), format="DD-MM-YYYY"))
+    if not text and statuses == OPEN_STATUSES and not (categories or types or due or added):
+        return None
+    return dict(text=text, statuses=statuses, categories=categories, types=types, due=due, added=added)
+
+def pick_task(label):
+    """Selectbox over the tasks matching a search box, instead of every task at once."""
+    text = st.text_input("🔍 Find task", key=f"find_{label}")
+    index = get_task_search()
+    ids = index.query(text, limit=MAX_CHOICES + 1)
+    names = {r[ID_COLUMN]: r["TASK"] for r in index.get(ids[:MAX_CHOICES])}
+    if len(ids) > MAX_CHOICES:
+        st.caption(f"Showing the first {MAX_CHOICES} matches; type more to narrow them down.")
+    return st.selectbox(label, list(names), format_func=names.get)
+
+# Due Dates
+@st.cache_resource
+def get_due_dates():
+    due = DueDates("TARGET_DATE", TASK_SCHEMA["dates"]["TARGET_DATE"], "TASK_STATUS", closed=["Completed"],
+                   type_column="TASK_TYPE", type_order=URGENCY)
+    task_store.subscribe(due.on_event)
+    due.start_checking()
+    return due
+
+def show_overdue_notices(due):
+    # Only toast tasks that became overdue after this session started.
+    last_seen = st.session_state.setdefault("seen_overdue", due._seq)
+    for seq, _, records in list(due.notices):
+        if seq > last_seen:
+            st.toast(f"⏰ {len(records)} task(s) just became overdue: " + ", ".join(r["TASK"] for r in records[:3]))
+            st.session_state["seen_overdue"] = seq
+
+@prefetch.fragment("task_tracker")
+def show_due_dates(due):
+    counts = due.counts()
+    overdue_col, week_col, open_col = st.columns(3)
+    overdue_col.metric("Overdue", counts["overdue"])
+    week_col.metric("Due this week", counts["this_week"])
+    open_col.metric("Open with a target date", counts["open"])
+    n = st.number_input("Upcoming tasks to show", min_value=1, max_value=100, value=10)
+    for title, records, key in [("🔴 Overdue", due.overdue(), "page_overdue"),
+                                ("📅 Due this week", due.due_this_week(), "page_week"),
+                                (f"⏭️ Next {n}", due.upcoming(n), "page_next")]:
+        st.markdown(f"### {title}")
+        if records:
+            show_paginated(task_frame(records).drop(columns=[ID_COLUMN]), key=key)
         else:
-            # Filter
-            df = df[df["TASK_STATUS"].isin(["Pending", "In Progress"])]
-            df = df.sort_values(by="TASK_TYPE")
+            st.caption("Nothing here.")
+    if counts["undated"]:
+        st.caption(f"{counts['undated']} tasks have no readable target date.")
 
-            categories = df["TASK_CATEGORY"].unique()
-            for category in categories:
-                st.markdown(f"### 📌 {category}")
-                st.dataframe(df[df["TASK_CATEGORY"] == category])
+# Archive
+@st.cache_resource
+def get_task_archiver():
+    # Old Completed tasks move to the "task_archive" worksheet, in the background as well.
+    archive = open_archive("task_archive", TASK_HEADERS, lambda: get_or_create_task_sheet("task_archive"))
+    archiver = Archiver(task_store, archive, "TASK_STATUS", ["Completed"], "TARGET_DATE", TASK_SCHEMA["dates"]["TARGET_DATE"])
+    archiver.start()
+    return archiver
 
-    elif action == "➕ Add Task":
-        st.subheader("➕ Add New Task")
-        with st.form("add_task_form"):
-            add_date = st.date_input("Add Date", value=datetime.today())
-            task = st.text_input("Task")
-            target_date = st.date_input("Target Date", value=datetime.today())
-            task_status = st.selectbox("Status", ["Pending", "In Progress", "Completed"])
-            task_category = st.selectbox("Category", ["Personal", "Office"])
-            task_type = st.selectbox("Type", ["Urgent", "Important", "Urgent and Important"])
-            comments = st.text_area("Comments")
-
-            if st.form_submit_button("Add Task"):
-                add_task([
+@prefetch.fragment("task_tracker")
+def show_archive(archiver):
+    ready = len(archiver.due())
+    st.write(f"{ready} completed tasks are more than {archiver.after_days} days past their target date.")
+    if ready and st.button("Archive now"):
+        bar = st.progress(0.0)
+        moved = archiver.run(progress=lambda done, total: bar.progress(done / total))
+        st.success(f"✅ Archived {moved} tasks.")
+
+    st.markdown("### 🗄️ Archived Tasks")
+    text = st.text_input("🔍 Search the archive")
+    if text:
+        found = archiver.find(text)
+        st.caption(f"{len(found)} matches" + (" (first page only; be more specific for the rest)" if len(found) >= PAGE_SIZE else ""))
+        if found:
+            st.dataframe(task_frame(found).drop(columns=[ID_COLUMN]), hide_index=True)
+        return
+    total = archiver.count()
+    pages = max(1, math.ceil(total / PAGE_SIZE))
+    page = st.number_input(f"Page (of {pages})", min_value=1, max_value=pages, value=1, key="page_archive")
+    records = archiver.page(page, PAGE_SIZE)
+    if records:
+        st.dataframe(task_frame(records).drop(columns=[ID_COLUMN]), hide_index=True)
+    st.caption(f"{total} archived tasks, newest first")
+
+# Bulk Edit
+BULK_COLUMNS = ["TASK_STATUS", "TASK_CATEGORY", "TASK_TYPE"]
+
+def bulk_changes(records, edited, set_to):
+    """{task ID: data row} for every task whose editable columns changed in the grid or by set_to."""
+    updates = {}
+    for record in records:
+        entry_id = record[ID_COLUMN]
+        row = edited.loc[entry_id]
+        values = {col: row[col] for col in BULK_COLUMNS}
+        if row["Select"]:
+            values.update(set_to)
+        if any(str(values[col]) != str(record[col]) for col in BULK_COLUMNS):
+            updates[entry_id] = [values.get(h, record[h]) for h in TASK_HEADERS]
+    return updates
+
+@prefetch.fragment("task_tracker")
+def show_bulk_edit():
+    result = st.session_state.pop("bulk_result", None)  # from the commit before the rerun
+    if result is not None:
+        getattr(st, result[0])(result[1])
+
+    filters = search_filters() or dict(statuses=OPEN_STATUSES)
+    # The grid's rows are pinned until the next commit or filter change: the editor
+    # tracks edits by row position, and saves must be checked against the REVs shown.
+    generation = st.session_state.setdefault("bulk_generation", 0)
+    grid_key = f"bulk_grid_{generation}_{abs(hash(repr(sorted(filters.items()))))}"
+    pinned = st.session_state.get("bulk_rows")
+    if pinned is None or pinned[0] != grid_key:
+        pinned = st.session_state["bulk_rows"] = (grid_key, find_task_records(**filters, limit=BULK_LIMIT))
+    records = pinned[1]
+    if not records:
+        st.info("No tasks match.")
+        return
+    if len(records) == BULK_LIMIT:
+        st.caption(f"Showing the first {BULK_LIMIT} matches; filter to reach the rest.")
+
+    import pandas as pd
+
+    grid = pd.DataFrame(
+        [{"Select": False, **{h: r[h] for h in ["TASK", "TARGET_DATE"] + BULK_COLUMNS}} for r in records],
+        index=pd.Index([r[ID_COLUMN] for r in records], name=ID_COLUMN),
+    )
+    edited = st.data_editor(grid, key=grid_key, hide_index=True, disabled=["TASK", "TARGET_DATE"],
+                            column_config={
+                                "Select": st.column_config.CheckboxColumn("✔"),
+                                "TASK_STATUS": st.column_config.SelectboxColumn("Status", options=STATUSES),
+                                "TASK_CATEGORY": st.column_config.SelectboxColumn("Category", options=CATEGORIES),
+                                "TASK_TYPE": st.column_config.SelectboxColumn("Type", options=TYPES),
+                            })
+    selected = edited.index[edited["Select"]].tolist()
+
+    keep = "(no change)"
+    status_col, category_col, type_col = st.columns(3)
+    set_to = {col: value for col, value in [
+        ("TASK_STATUS", status_col.selectbox("Set status of selected", [keep] + STATUSES)),
+        ("TASK_CATEGORY", category_col.selectbox("Set category of selected", [keep] + CATEGORIES)),
+        ("TASK_TYPE", type_col.selectbox("Set type of selected", [keep] + TYPES)),
+    ] if value != keep}
+
+    updates = bulk_changes(records, edited, set_to)
+    save_col, delete_col = st.columns(2)
+    if save_col.button(f"💾 Save {len(updates)} changed tasks", disabled=not updates):
+        # One batch_update for every row; each is written only if unchanged since the grid was shown.
+        refused = task_store.batch_update(updates, {r[ID_COLUMN]: r[REV_COLUMN] for r in records if r[ID_COLUMN] in updates})
+        st.session_state["bulk_result"] = ("success", f"✅ Saved {len(updates) - len(refused)} tasks.")
+        if refused:
+            st.session_state["bulk_result"] = ("warning", f"⚠️ {len(refused)} of {len(updates)} tasks were changed by "
+                                                          "someone else and were not saved; they now show the current version.")
+        st.session_state["bulk_generation"] += 1
+        st.rerun()
+    if delete_col.button(f"❌ Delete {len(selected)} selected tasks", disabled=not selected):
+        # One request; adjacent rows are deleted as ranges, bottom-up.
+        task_store.delete_rows(selected)
+        st.session_state["bulk_result"] = ("success", f"✅ Deleted {len(selected)} tasks.")
+        st.session_state["bulk_generation"] += 1
+        st.rerun()
+
+def show_paginated(df, key, page_size=PAGE_SIZE):
+    # Only one page of rows is sent to the browser, however big the group gets.
+    pages = max(1, math.ceil(len(df) / page_size))
+    page = 1
+    if pages > 1:
+        page = st.number_input(f"Page (of {pages})", min_value=1, max_value=pages, value=1, key=key)
+    st.dataframe(df.iloc[(page - 1) * page_size:page * page_size], hide_index=True)
+    st.caption(f"{len(df)} tasks")
+
+# UI Components
+@prefetch.fragment("task_tracker")
+def show_dashboard():
+    st.subheader("📊 Task Dashboard")
+    if not len(get_task_search()):
+        st.info("No tasks available.")
+        return
+    filters = search_filters()
+    if filters is None:
+        views = get_dashboard_views()
+    else:
+        found = find_tasks(**filters).drop(columns=[ID_COLUMN])
+        views = {category: group for category, group in found.groupby("TASK_CATEGORY", observed=True)}
+        if not views:
+            st.info("No tasks match.")
+    for category, group in views.items():
+        st.markdown(f"### 📌 {category}")
+        show_paginated(group, key=f"page_{category}")
+
+@prefetch.fragment()
+def show_add_task():
+    st.subheader("➕ Add New Task")
+    with st.form("add_task_form"):
+        add_date = st.date_input("Add Date", value=datetime.today())
+        task = st.text_input("Task")
+        target_date = st.date_input("Target Date", value=datetime.today())
+        task_status = st.selectbox("Status", ["Pending", "In Progress", "Completed"])
+        task_category = st.selectbox("Category", ["Personal", "Office"])
+        task_type = st.selectbox("Type", ["Urgent", "Important", "Urgent and Important"])
+        comments = st.text_area("Comments")
+
+        if st.form_submit_button("Add Task"):
+            add_task([
+                add_date.strftime("%d-%m-%y"),
+                task,
+                target_date.strftime("%d-%m-%y"),
+                task_status,
+                task_category,
+                task_type,
+                comments
+            ])
+            st.success("✅ Task Added!")
+
+@prefetch.fragment("task_tracker")
+def show_modify_task():
+    st.subheader("✏️ Modify Task")
+    if not len(get_task_search()):
+        st.info("No tasks to modify.")
+        return
+    task_id = pick_task("Select Task to Edit")
+    if task_id is None:
+        st.info("No tasks match.")
+        return
+    show_edit_task_form(task_id)
+
+@prefetch.fragment()
+def show_edit_task_form(task_id):
+    row = task_store.cached_record(task_id)
+    if row is None:
+        st.info("This task no longer exists.")
+        return
+    add_day = parse_date(row["ADD_DATE"], TASK_SCHEMA["dates"]["ADD_DATE"])
+    target_day = parse_date(row["TARGET_DATE"], TASK_SCHEMA["dates"]["TARGET_DATE"])
+    with st.form("edit_task_form"):
+        task = st.text_input("Task", value=row["TASK"])
+        # None means the sheet cell was unreadable.
+        add_date = st.date_input("Add Date", add_day or datetime.today())
+        target_date = st.date_input("Target Date", target_day or datetime.today())
+        task_status = st.selectbox("Status", ["Pending", "In Progress", "Completed"], index=["Pending", "In Progress", "Completed"].index(row["TASK_STATUS"]))
+        task_category = st.selectbox("Category", ["Personal", "Office"], index=["Personal", "Office"].index(row["TASK_CATEGORY"]))
+        task_type = st.selectbox("Type", ["Urgent", "Important", "Urgent and Important"], index=["Urgent", "Important", "Urgent and Important"].index(row["TASK_TYPE"]))
+        comments = st.text_area("Comments", value=row["COMMENTS"])
+
+        if st.form_submit_button("Update Task"):
+            try:
+                # Saved only if nobody changed the task since this form was shown.
+                update_task(task_id, [
                     add_date.strftime("%d-%m-%y"),
                     task,
                     target_date.strftime("%d-%m-%y"),
@@ -100,49 +367,55 @@ def task_tracker_ui():
                     task_category,
                     task_type,
                     comments
-                ])
-                st.success("✅ Task Added!")
+                ], st.session_state.get("shown_task_rev", {}).get(task_id))
+                st.success("✅ Task Updated!")
+            except ConflictError:
+                st.warning("⚠️ This task was changed by someone else, so your edit was not saved. "
+                           "Review the current version and try again.")
+    current = task_store.cached_record(task_id)
+    st.session_state["shown_task_rev"] = {task_id: current[REV_COLUMN]} if current is not None else {}
+
+@prefetch.fragment("task_tracker")
+def show_delete_task():
+    st.subheader("❌ Delete Task")
+    if not len(get_task_search()):
+        st.info("No tasks to delete.")
+        return
+    task_id = pick_task("Select Task to Delete")
+
+    if task_id is not None and st.button("Delete Task"):
+        delete_task(task_id)
+        st.success("✅ Task Deleted!")
+
+@timed_page
+def task_tracker_ui():
+    st.title("🗂️ Task Tracker")
+
+    action = st.sidebar.radio("Action", ["📋 Dashboard", "⏰ Due Dates", "➕ Add Task", "✏️ Modify Task", "❌ Delete Task", "🧰 Bulk Edit", "🗄️ Archive"])
+
+    show_overdue_notices(get_due_dates())
+    archiver = get_task_archiver()  # also starts the background archiving
+
+    if action == "📋 Dashboard":
+        show_dashboard()
+
+    elif action == "⏰ Due Dates":
+        st.subheader("⏰ Due Dates")
+        show_due_dates(get_due_dates())
+
+    elif action == "➕ Add Task":
+        show_add_task()
 
     elif action == "✏️ Modify Task":
-        st.subheader("✏️ Modify Task")
-        if df.empty:
-            st.info("No tasks to modify.")
-        else:
-            task_list = df["TASK"].tolist()
-            selected_task = st.selectbox("Select Task to Edit", task_list)
-            task_index = df.index[df["TASK"] == selected_task][0] + 2  # +2 due to header and 0-indexing
-
-            row = df[df["TASK"] == selected_task].iloc[0]
-            with st.form("edit_task_form"):
-                task = st.text_input("Task", value=row["TASK"])
-                add_date = st.date_input("Add Date", datetime.strptime(row["ADD_DATE"], "%d-%m-%y"))
-                target_date = st.date_input("Target Date", datetime.strptime(row["TARGET_DATE"], "%d-%m-%y"))
-                task_status = st.selectbox("Status", ["Pending", "In Progress", "Completed"], index=["Pending", "In Progress", "Completed"].index(row["TASK_STATUS"]))
-                task_category = st.selectbox("Category", ["Personal", "Office"], index=["Personal", "Office"].index(row["TASK_CATEGORY"]))
-                task_type = st.selectbox("Type", ["Urgent", "Important", "Urgent and Important"], index=["Urgent", "Important", "Urgent and Important"].index(row["TASK_TYPE"]))
-                comments = st.text_area("Comments", value=row["COMMENTS"])
-
-                if st.form_submit_button("Update Task"):
-                    update_task(task_index, [
-                        add_date.strftime("%d-%m-%y"),
-                        task,
-                        target_date.strftime("%d-%m-%y"),
-                        task_status,
-                        task_category,
-                        task_type,
-                        comments
-                    ])
-                    st.success("✅ Task Updated!")
+        show_modify_task()
 
     elif action == "❌ Delete Task":
-        st.subheader("❌ Delete Task")
-        if df.empty:
-            st.info("No tasks to delete.")
-        else:
-            task_list = df["TASK"].tolist()
-            selected_task = st.selectbox("Select Task to Delete", task_list)
-            task_index = df.index[df["TASK"] == selected_task][0] + 2
+        show_delete_task()
+
+    elif action == "🧰 Bulk Edit":
+        st.subheader("🧰 Bulk Edit")
+        show_bulk_edit()
 
-            if st.button("Delete Task"):
-                delete_task(task_index)
-                st.success("✅ Task Deleted!")
+    elif action == "🗄️ Archive":
+        st.subheader("🗄️ Archive")
+        show_archive(archiver)
@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Mon Oct 19 11:02:26 2026
+
+Shared fixtures: random task rows, a reload harness for views kept
+current by change events, and stores on top of fake_sheets.
+
+@author: shyamdk
+"""
+import os
+import random
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fake_sheets import FakeSpreadsheet, FakeWorksheet  # noqa: E402
+from row_index import META_COLUMNS, new_id, new_rev  # noqa: E402
+from storage import SheetStore  # noqa: E402
+
+WORDS = ["report", "quarterly", "call", "dentist", "invoice", "review", "plan", "renew", "tax", "gym"]
+STATUSES = ["Pending", "In Progress", "Completed"]
+TYPES = ["Urgent and Important", "Urgent", "Important"]
+HEADERS = ["TASK", "TASK_STATUS"] + META_COLUMNS
+
+
+def random_task(rng, entry_id=None):
+    def day():
+        return rng.choice([f"{rng.randint(1, 28):02d}-{rng.randint(1, 12):02d}-26", "", "soon"])
+    return {"ID": entry_id or new_id(), "REV": new_rev(),
+            "TASK": " ".join(rng.sample(WORDS, rng.randint(1, 3))), "COMMENTS": rng.choice(WORDS + [""]),
+            "TASK_STATUS": rng.choice(STATUSES), "TASK_TYPE": rng.choice(TYPES),
+            "TARGET_DATE": day(), "ADD_DATE": day()}
+
+
+@pytest.fixture
+def reloaded():
+    """
+    reloaded(make_view, seed) yields (view, fresh) 200 times: view was loaded,
+    then reloaded after random deletes, edits and appends; fresh was built
+    once from the final rows. The two should be indistinguishable.
+    """
+    def rounds(make_view, seed, count=200):
+        rng = random.Random(seed)
+        for _ in range(count):
+            rows = [random_task(rng) for _ in range(rng.randint(0, 40))]
+            view = make_view()
+            view.on_event("reload", rows)
+
+            rows = [r for r in rows if rng.random() > 0.1]  # some deleted
+            for i in rng.sample(range(len(rows)), min(len(rows), rng.randint(0, 6))):
+                rows[i] = random_task(rng, rows[i]["ID"])  # some edited
+            rows += [random_task(rng) for _ in range(rng.randint(0, 6))]  # some new
+            rng.shuffle(rows)
+            view.on_event("reload", rows)
+
+            fresh = make_view()
+            fresh.on_event("reload", rows)
+            yield view, fresh
+    return rounds
+
+
+@pytest.fixture
+def worksheet():
+    """A fake task worksheet holding task1..task5, in a spreadsheet so batch deletes work."""
+    ws = FakeWorksheet([HEADERS] + [[f"do {i}", "Pending", f"task{i}", "v1"] for i in range(1, 6)])
+    FakeSpreadsheet({"Sheet1": ws})
+    return ws
+
+
+@pytest.fixture
+def sheet_store(worksheet):
+    return SheetStore(worksheet, HEADERS)
@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Mon Oct 19 11:20:48 2026
+
+CachedStore writes on top of a SheetStore over a fake worksheet: each one
+reaches the sheet, patches the cached rows without a re-read and tells
+subscribers about it.
+
+@author: shyamdk
+"""
+import pytest
+
+from cache import CachedStore
+from row_index import ConflictError
+
+
+@pytest.fixture
+def store(sheet_store):
+    store = CachedStore(sheet_store, name="tasks")
+    store.get_all_records()
+    return store
+
+
+@pytest.fixture
+def events(store):
+    seen = []
+    store.subscribe(lambda event, *args: seen.append((event,) + args))
+    seen.clear()  # subscribing replays the current rows
+    return seen
+
+
+def test_writes_patch_the_cache_without_rereading(store, worksheet, events):
+    worksheet.stats.reset()
+    new = store.append_row(["file taxes", "Pending"])
+    store.update_row("task2", ["call dentist", "Completed"])
+    store.delete_row("task4")
+
+    assert [r["ID"] for r in store.get_all_records()] == ["task1", "task2", "task3", "task5", new]
+    assert store.cached_record("task2")["TASK_STATUS"] == "Completed"
+    assert [row[:3] for row in worksheet.data[1:]] == [
+        ["do 1", "Pending", "task1"], ["call dentist", "Completed", "task2"], ["do 3", "Pending", "task3"],
+        ["do 5", "Pending", "task5"], ["file taxes", "Pending", new],
+    ]
+    assert "get_all_records" not in worksheet.stats.calls
+    assert [e[0] for e in events] == ["append", "update", "delete"]
+
+
+def test_every_write_gets_a_new_rev(store):
+    before = store.cached_record("task1")["REV"]
+    store.update_row("task1", ["do 1", "In Progress"])
+    assert store.cached_record("task1")["REV"] not in ("", before)
+
+
+def test_stale_edit_is_refused_and_the_cache_shows_the_current_row(store, worksheet):
+    worksheet.data[2][1] = "Completed"  # task2, edited in the sheet by someone else
+    worksheet.data[2][3] = "v2"
+
+    with pytest.raises(ConflictError) as refused:
+        store.update_row("task2", ["mine", "In Progress"], expected_rev="v1")
+    assert refused.value.current["REV"] == "v2"
+    assert store.cached_record("task2")["TASK_STATUS"] == "Completed"
+    assert worksheet.data[2][:2] == ["do 2", "Completed"]
+
+
+def test_batch_update_writes_only_unchanged_rows(store, worksheet):
+    worksheet.data[3][3] = "v2"  # task3 moved on in the sheet
+
+    refused = store.batch_update({"task1": ["one", "Completed"], "task3": ["three", "Completed"]},
+                                 {"task1": "v1", "task3": "v1"})
+    assert list(refused) == ["task3"]
+    assert worksheet.data[1][:2] == ["one", "Completed"]
+    assert worksheet.data[3][:2] == ["do 3", "Pending"]
+    assert store.cached_record("task3")["REV"] == "v2"
+
+
+def test_delete_rows_tells_subscribers_about_each_row(store, worksheet, events):
+    store.delete_rows(["task2", "task3", "task5"])
+    assert [r["ID"] for r in store.get_all_records()] == ["task1", "task4"]
+    assert sorted(e[1]["ID"] for e in events) == ["task2", "task3", "task5"]
+    assert [row[2] for row in worksheet.data[1:]] == ["task1", "task4"]
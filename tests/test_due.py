@@ -0,0 +1,32 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Mon Oct 19 10:31:05 2026
+
+A DueDates schedule kept current through reloads must end up exactly like
+one built from scratch on the same rows.
+
+@author: shyamdk
+"""
+from datetime import date
+
+from due import DueDates
+
+TODAY = date(2026, 6, 15)
+
+
+def make_schedule():
+    return DueDates("TARGET_DATE", "%d-%m-%y", "TASK_STATUS", closed=["Completed"],
+                    type_column="TASK_TYPE", type_order=["Urgent and Important", "Urgent", "Important"])
+
+
+def state(due):
+    return due.entries, due.keys, due.undated, {i: r["REV"] for i, r in due.records.items()}
+
+
+def test_reload_matches_a_fresh_schedule(reloaded):
+    for due, fresh in reloaded(make_schedule, seed=20):
+        assert state(due) == state(fresh)
+        assert due.overdue(TODAY) == fresh.overdue(TODAY)
+        assert due.upcoming(5, TODAY) == fresh.upcoming(5, TODAY)
+        assert due.flagged <= set(due.records)
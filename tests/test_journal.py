@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Mon Oct 19 13:37:52 2026
+
+JournaledStore replaying to a fake worksheet through a WriteQueue: in
+batches, without duplicates, and past a torn last line.
+
+@author: shyamdk
+"""
+import json
+import os
+
+import pytest
+
+from journal import JournaledStore
+from write_queue import WriteQueue
+
+
+@pytest.fixture
+def open_journal(sheet_store, tmp_path):
+    def open_():
+        return JournaledStore(WriteQueue(sheet_store, "tasks", max_delay=60), "tasks",
+                              directory=str(tmp_path), interval=3600)
+    return open_
+
+
+def replay_all(journal):
+    while journal.flush():
+        pass
+
+
+def ids(ws):
+    return [row[2] for row in ws.data[1:]]
+
+
+def test_a_big_import_goes_out_in_one_append_per_batch(open_journal, worksheet):
+    journal = open_journal()
+    with journal._replay_lock:  # the worker replays once the test has set up
+        journal.append_rows([[f"import {i}", "Pending", f"new{i}", "v1"] for i in range(500)])
+        worksheet.stats.reset()
+    replay_all(journal)
+    assert len(ids(worksheet)) == 505
+    assert worksheet.stats.calls["append_rows"] == 3  # REPLAY_BATCH is 200
+    assert worksheet.stats.calls["col_values"] == 3
+
+
+def test_edits_and_deletes_in_a_batch_are_folded(open_journal, worksheet):
+    journal = open_journal()
+    with journal._replay_lock:
+        journal.append_row(["draft", "Pending", "new1", "v1"])
+        journal.update_row("new1", ["final", "Pending", "new1", "v2"])
+        journal.append_row(["scrap", "Pending", "new2", "v1"])
+        journal.delete_row("new2")
+        journal.batch_update({"task1": ["one", "Completed", "task1", "v2"], "task2": ["two", "Completed", "task2", "v2"]},
+                             {"task1": "v1", "task2": "v1"})
+        journal.delete_rows(["task2", "task3"])
+        worksheet.stats.reset()
+    replay_all(journal)
+
+    assert ids(worksheet) == ["task1", "task4", "task5", "new1"]
+    assert worksheet.data[1][:2] == ["one", "Completed"] and worksheet.data[-1][0] == "final"
+    assert worksheet.stats.calls["append_rows"] == 1
+    assert worksheet.stats.calls["batch_update"] == 1
+    assert worksheet.stats.calls["delete_rows"] == 1
+
+
+def test_replay_after_a_lost_checkpoint_adds_nothing_twice(open_journal, worksheet):
+    journal = open_journal()
+    rows = [["new", "Pending", f"new{i}", "v1"] for i in range(3)]
+    with journal._replay_lock:
+        journal.append_rows(rows)
+        journal.delete_row("task5")
+        # The sheet got the writes but the process died before the ".synced" checkpoint.
+        worksheet.data = [r for r in worksheet.data if r[2] != "task5"] + rows
+
+    replay_all(journal)
+    assert ids(worksheet) == ["task1", "task2", "task3", "task4", "new0", "new1", "new2"]
+
+
+def test_torn_last_line_is_dropped_and_the_rest_replayed(open_journal, worksheet, tmp_path):
+    path = os.path.join(str(tmp_path), "tasks.journal")
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(json.dumps(JournaledStore._entry("append", "new1", ["kept", "Pending", "new1", "v1"])) + "\n")
+        f.write('{"key": "abc", "op": "app')  # the process died mid-write
+
+    journal = open_journal()
+    with journal._replay_lock:
+        assert [entry["id"] for entry in journal._pending] == ["new1"]
+        with open(path, encoding="utf-8") as f:
+            assert f.read().endswith("\n")
+    replay_all(journal)
+    assert ids(worksheet)[-1] == "new1"
@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Mon Oct 19 11:41:13 2026
+
+Which failed Sheets calls quota_client() repeats: 429s always, 5xx only
+where sending the request twice can't add or remove the wrong rows.
+
+@author: shyamdk
+"""
+import pytest
+from gspread.exceptions import APIError
+
+import quota
+from fake_sheets import FakeClient, FakeSpreadsheet, FakeWorksheet, RequestStats, _Response
+
+URL = "https://sheets.example/book"
+
+
+class FlakyStats(RequestStats):
+    """Fails the next calls of a method with the given HTTP statuses, before they take effect."""
+
+    def __init__(self):
+        super().__init__()
+        self.failures = {}  # method -> [status, ...]
+
+    def request(self, method, payload=None):
+        if self.failures.get(method):
+            self.calls[f"failed {method}"] += 1
+            raise APIError(_Response(self.failures[method].pop(0), "injected"))
+        return super().request(method, payload)
+
+
+@pytest.fixture
+def stats(monkeypatch):
+    monkeypatch.setattr(quota, "BACKOFF_BASE", 0.0)
+    return FlakyStats()
+
+
+@pytest.fixture
+def sheet(stats):
+    book = FakeSpreadsheet({"Sheet1": FakeWorksheet([["TASK"], ["a"], ["b"], ["c"]])})
+    client = quota.quota_client(FakeClient({URL: book}, stats=stats))
+    return client.open_by_url(URL).worksheet("Sheet1")
+
+
+def test_429_is_retried_even_on_appends(sheet, stats):
+    stats.failures["append_row"] = [429, 429]
+    sheet.append_row(["d"])
+    assert stats.calls["append_row"] == 1
+    assert sheet.col_values(1) == ["TASK", "a", "b", "c", "d"]
+
+
+def test_5xx_is_retried_on_value_writes(sheet, stats):
+    stats.failures["update"] = [503]
+    sheet.update("A2", [["x"]])
+    assert stats.calls["failed update"] == 1
+    assert stats.calls["update"] == 1
+
+
+@pytest.mark.parametrize("method, call", [
+    ("append_rows", lambda ws: ws.append_rows([["d"]])),
+    ("delete_rows", lambda ws: ws.delete_rows(2)),
+    ("spreadsheet.batch_update", lambda ws: ws.spreadsheet.batch_update({"requests": []})),
+])
+def test_5xx_is_not_retried_where_a_repeat_could_hit_other_rows(sheet, stats, method, call):
+    stats.failures[method] = [500]
+    with pytest.raises(APIError):
+        call(sheet)
+    assert stats.calls[f"failed {method}"] == 1
+    assert stats.calls[method] == 0
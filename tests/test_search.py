@@ -0,0 +1,26 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Mon Oct 19 10:12:40 2026
+
+A SearchIndex kept current through reloads must end up exactly like one
+built from scratch on the same rows.
+
+@author: shyamdk
+"""
+from search import SearchIndex
+
+
+def make_index():
+    return SearchIndex(["TASK", "COMMENTS"], ["TASK_STATUS"], {"TARGET_DATE": "%d-%m-%y", "ADD_DATE": "%d-%m-%y"})
+
+
+def state(index):
+    return (index.postings, index.vocab, index.facets, index.dates, index.keys,
+            {i: r["REV"] for i, r in index.records.items()})
+
+
+def test_reload_matches_a_fresh_index(reloaded):
+    for index, fresh in reloaded(make_index, seed=19):
+        assert state(index) == state(fresh)
+        assert index.query("re") == fresh.query("re")
@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Mon Oct 19 12:05:31 2026
+
+SheetStore against a fake worksheet: claiming the ID/REV header cells,
+and finding rows by ID even when the sheet changed since it was read.
+
+@author: shyamdk
+"""
+import pytest
+
+from fake_sheets import FakeWorksheet
+from row_index import RowIndex, runs
+from storage import SheetStore
+
+HEADERS = ["TASK", "TASK_STATUS", "ID", "REV"]
+
+
+def test_blank_worksheet_gets_the_whole_header_row():
+    ws = FakeWorksheet([])
+    store = SheetStore(ws, HEADERS)
+    assert ws.data == [HEADERS]
+    assert store.get_all_records() == []
+
+
+def test_free_cells_after_the_data_headers_are_claimed():
+    ws = FakeWorksheet([["TASK", "TASK_STATUS"], ["do 1", "Pending"]])
+    SheetStore(ws, HEADERS)
+    assert ws.data[0] == HEADERS
+
+
+def test_headers_of_another_layout_are_left_alone():
+    ws = FakeWorksheet([["DATE", "WEIGHT", "STEPS", "NOTES"]])
+    with pytest.raises(ValueError):
+        SheetStore(ws, HEADERS)
+    assert ws.data[0] == ["DATE", "WEIGHT", "STEPS", "NOTES"]
+
+
+# === ROW POSITIONS ===
+def ids(ws):
+    return [row[2] for row in ws.data[1:]]
+
+
+def test_row_index_renumbers_after_deletes():
+    index = RowIndex(["a", "b", "c", "d", "e"])
+    assert index.row_of("a") == 2
+    assert index.on_delete("b") == 1
+    assert index.row_of("c") == 3
+    assert index.on_delete_many(["a", "d"]) == [0, 2]
+    assert [index.row_of(i) for i in ("c", "e")] == [2, 3]
+    index.on_append("f")
+    assert index.row_of("f") == 4 and "b" not in index
+
+
+def test_runs_groups_consecutive_numbers():
+    assert runs([9, 2, 4, 3]) == [(2, 4), (9, 9)]
+    assert runs([]) == []
+
+
+def test_delete_rows_sends_adjacent_rows_as_one_range(sheet_store, worksheet):
+    sheet_store.get_all_records()
+    worksheet.stats.reset()
+    sheet_store.delete_rows(["task2", "task3", "task5"])
+    assert ids(worksheet) == ["task1", "task4"]
+    assert worksheet.stats.calls["spreadsheet.batch_update"] == 1
+    assert [sheet_store.index.row_of(i) for i in ("task1", "task4")] == [2, 3]
+
+
+def test_row_removed_in_the_sheet_does_not_misdirect_a_delete(sheet_store, worksheet):
+    sheet_store.get_all_records()
+    del worksheet.data[1]  # task1, deleted by hand
+
+    sheet_store.delete_row("task2")
+    assert ids(worksheet) == ["task3", "task4", "task5"]
+    sheet_store.delete_rows(["task3", "task5"])
+    assert ids(worksheet) == ["task4"]
+
+
+def test_row_added_in_the_sheet_does_not_misdirect_a_write(sheet_store, worksheet):
+    sheet_store.get_all_records()
+    worksheet.data.insert(1, ["by hand", "Pending", "task0", "v1"])
+
+    sheet_store.update_row("task3", ["do 3", "Completed", "task3", "v2"])
+    assert sheet_store.batch_update({"task4": ["do 4", "Completed", "task4", "v2"]}) == {}
+    assert [row[1] for row in worksheet.data[1:]] == ["Pending", "Pending", "Pending", "Completed", "Completed", "Pending"]
+    assert ids(worksheet) == ["task0", "task1", "task2", "task3", "task4", "task5"]
+
+
+def test_rows_deleted_elsewhere_are_skipped_or_refused(sheet_store, worksheet):
+    sheet_store.get_all_records()
+    del worksheet.data[2]  # task2
+
+    sheet_store.delete_rows(["task2", "task4"])
+    assert ids(worksheet) == ["task1", "task3", "task5"]
+    with pytest.raises(KeyError):
+        sheet_store.delete_row("task2")
+    with pytest.raises(KeyError):
+        sheet_store.update_row("task2", ["do 2", "Completed", "task2", "v2"])
+    assert sheet_store.batch_update({"task2": ["do 2", "Completed", "task2", "v2"]}) == {"task2": None}
+    assert ids(worksheet) == ["task1", "task3", "task5"]
+
+
+def test_a_current_index_costs_one_read_per_write(sheet_store, worksheet):
+    sheet_store.get_all_records()
+    worksheet.stats.reset()
+    sheet_store.delete_rows(["task1", "task2"])
+    sheet_store.update_row("task3", ["do 3", "Completed", "task3", "v2"], expected_rev="v1")
+    assert worksheet.stats.calls["batch_get"] == 2
+    assert "col_values" not in worksheet.stats.calls
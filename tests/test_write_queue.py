@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Mon Oct 19 12:48:19 2026
+
+WriteQueue in front of a SheetStore on a fake worksheet: what it buffers,
+when it flushes and how many calls that takes.
+
+@author: shyamdk
+"""
+import pytest
+from gspread.exceptions import APIError
+
+from cache import CachedStore
+from fake_sheets import FakeWorksheet, _Response
+from storage import SheetStore
+from write_queue import WriteQueue
+
+HEADERS = ["TASK", "TASK_STATUS", "ID", "REV"]
+
+
+@pytest.fixture
+def worksheet():
+    return FakeWorksheet([HEADERS] + [[f"do {i}", "Pending", f"task{i}", "v1"] for i in range(200)])
+
+
+@pytest.fixture
+def queue(worksheet):
+    queue = WriteQueue(SheetStore(worksheet, HEADERS), "tasks", max_batch=20, max_delay=60)
+    yield queue
+    queue.flush()  # also stops the timer
+
+
+def test_appends_wait_for_a_full_batch(queue, worksheet):
+    for i in range(19):
+        queue.append_row([f"new {i}", "Pending", f"new{i}", "v1"])
+    assert len(worksheet.data) == 201
+    queue.append_row(["new 19", "Pending", "new19", "v1"])
+    assert len(worksheet.data) == 221
+    assert worksheet.stats.calls["append_rows"] == 1
+
+
+def test_edits_and_deletes_of_pending_appends_never_reach_the_sheet(queue, worksheet):
+    queue.append_row(["draft", "Pending", "new1", "v1"])
+    queue.append_row(["scrap", "Pending", "new2", "v1"])
+    queue.update_row("new1", ["final", "Pending", "new1", "v2"])
+    queue.delete_row("new2")
+    queue.flush()
+    assert worksheet.data[-1] == ["final", "Pending", "new1", "v2"]
+    assert len(worksheet.data) == 202
+    assert "batch_update" not in worksheet.stats.calls
+
+
+def test_bulk_save_is_one_batch_update(worksheet, queue):
+    store = CachedStore(queue, name="tasks")
+    records = store.get_all_records()
+    worksheet.stats.reset()
+
+    refused = store.batch_update({r["ID"]: [r["TASK"], "Completed"] for r in records[:100]},
+                                 {r["ID"]: r["REV"] for r in records[:100]})
+    assert refused == {}
+    assert dict(worksheet.stats.calls) == {"batch_get": 1, "batch_update": 1}
+    assert all(row[1] == "Completed" for row in worksheet.data[1:101])
+
+
+def test_bulk_save_returns_the_rows_it_could_not_save(worksheet, queue):
+    store = CachedStore(queue, name="tasks")
+    records = store.get_all_records()
+    worksheet.data[3][1:] = ["Completed", "task2", "v2"]  # edited in the sheet meanwhile
+
+    refused = store.batch_update({r["ID"]: [r["TASK"], "In Progress"] for r in records[:5]},
+                                 {r["ID"]: r["REV"] for r in records[:5]})
+    assert list(refused) == ["task2"]
+    assert refused["task2"]["REV"] == "v2"
+    assert store.cached_record("task2")["TASK_STATUS"] == "Completed"
+    assert [row[1] for row in worksheet.data[1:6]] == ["In Progress", "In Progress", "Completed", "In Progress", "In Progress"]
+    assert queue.acks[-1].updated == 4
+
+
+def test_append_that_failed_after_reaching_the_sheet_is_not_repeated(queue, worksheet, monkeypatch):
+    landed = worksheet.append_rows
+
+    def lost_response(rows, **kwargs):
+        landed(rows, **kwargs)
+        raise APIError(_Response(503, "backend error"))
+
+    monkeypatch.setattr(worksheet, "append_rows", lost_response)
+    queue.append_row(["new", "Pending", "new1", "v1"])
+    queue.append_row(["edited later", "Pending", "new2", "v1"])
+    with pytest.raises(APIError):
+        queue.flush()
+    assert queue._timer is not None  # retried even if nothing else is written
+    monkeypatch.undo()
+
+    queue.update_row("new2", ["edited", "Pending", "new2", "v2"])
+    queue.append_row(["newer", "Pending", "new3", "v1"])
+    queue.flush()
+    assert [row[2] for row in worksheet.data[201:]] == ["new1", "new2", "new3"]
+    assert worksheet.data[202] == ["edited", "Pending", "new2", "v2"]
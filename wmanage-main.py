@@ -55,38 +55,43 @@ rm .streamlit/secrets.toml
 '''
 
 import streamlit as st
-import gspread
-import pandas as pd
-import matplotlib.pyplot as plt
 from datetime import datetime
-from oauth2client.service_account import ServiceAccountCredentials
 
-# ------------------ AUTH ------------------
-def authorize_gspread():
-    try:
-        scope = ["https://spreadsheets.google.com/feeds", "https://www.googleapis.com/auth/drive"]
-        creds_dict = st.secrets["gcp_service_account"]
-        creds = ServiceAccountCredentials.from_json_keyfile_dict(creds_dict, scope)
-        return gspread.authorize(creds)
-    except Exception:
-        scope = ["https://spreadsheets.google.com/feeds", "https://www.googleapis.com/auth/drive"]
-        creds = ServiceAccountCredentials.from_json_keyfile_name("gspread_service_account.json", scope)
-        return gspread.authorize(creds)
-
-gc = authorize_gspread()
+import prefetch
+from row_index import REV_COLUMN, ConflictError
+from storage import authorize_gspread, get_store
+from write_queue import show_write_status
 
 # ------------------ SHEET INIT ------------------
 SHEET_URL = "https://docs.google.com/spreadsheets/d/1ah_-_4cDJx-jKgBbSKBroyesnInBPxi0ow-dssnFVRg/edit#gid=0"
-sheet = gc.open_by_url(SHEET_URL)
-daily_ws = sheet.sheet1
+DAILY_HEADERS = ["DATE", "TARGET_WEIGHT", "CURRENT_WEIGHT", "STEPS", "YOGA", "BREATHING",
+                 "BLOOD_PRESSURE", "FASTING_SUGAR", "MOOD_JOURNAL", "COMMENTS"]
+TASK_HEADERS = ["ADD_DATE", "TASK", "TARGET_DATE", "TASK_CATEGORY", "TASK_TYPE", "STATUS", "COMMENTS"]
+DAILY_SCHEMA = {
+    "dates": {"DATE": "%Y-%m-%d"},
+    "categories": ["YOGA", "BREATHING"],
+    "numbers": {"TARGET_WEIGHT": "float64", "CURRENT_WEIGHT": "float64", "STEPS": "Int64"},
+}
+TASK_SCHEMA = {
+    "dates": {"ADD_DATE": "%Y-%m-%d", "TARGET_DATE": "%Y-%m-%d"},
+    "categories": ["TASK_CATEGORY", "TASK_TYPE", "STATUS"],
+}
+
+def open_sheet():
+    return authorize_gspread().open_by_url(SHEET_URL)
+
+def get_daily_sheet():
+    return open_sheet().sheet1
 
 # 🛠️ Auto-create Task Tracker sheet if not present
-def get_or_create_task_sheet(sheet):
-    expected_headers = ["ADD_DATE", "TASK", "TARGET_DATE", "TASK_CATEGORY", "TASK_TYPE", "STATUS", "COMMENTS"]
+def get_or_create_task_sheet():
+    sheet = open_sheet()
+    expected_headers = TASK_HEADERS
     try:
         task_ws = sheet.worksheet("Task Tracker")
         headers = task_ws.row_values(1)
-        if headers != expected_headers:
+        # The trailing ID column is added by the store, so only compare the data columns.
+        if headers[:len(expected_headers)] != expected_headers:
             task_ws.clear()
             task_ws.append_row(expected_headers)
     except:
@@ -94,54 +99,71 @@ def get_or_create_task_sheet(sheet):
         task_ws.append_row(expected_headers)
     return task_ws
 
-task_ws = get_or_create_task_sheet(sheet)
+# Built once per process: this script re-runs top to bottom on every interaction, and
+# fresh stores would re-open and re-read both sheets each time.
+@st.cache_resource
+def get_stores():
+    daily = get_store("wmanage_daily", DAILY_HEADERS, get_daily_sheet, index_on=["DATE"], schema=DAILY_SCHEMA)
+    tasks = get_store("wmanage_tasks", TASK_HEADERS, get_or_create_task_sheet, index_on=["ADD_DATE"], schema=TASK_SCHEMA)
+    return daily, tasks
+
+daily_store, task_store = get_stores()
+
+# Fetch both sheets at once instead of one after the other.
+prefetch.start({"wmanage_daily": daily_store, "wmanage_tasks": task_store})
 
 # ------------------ DAILY TRACKER UTILS ------------------
+# Rows are addressed by their ID column; the UI finds the ID from the loaded DataFrame.
 def get_daily_data():
-    return pd.DataFrame(daily_ws.get_all_records())
+    prefetch.wait("wmanage_daily")
+    return daily_store.get_frame()
 
 def add_daily_entry(entry):
-    daily_ws.append_row(entry)
-
-def update_daily_entry(date, updated_entry):
-    data = daily_ws.get_all_values()
-    for i, row in enumerate(data[1:], start=2):
-        if row[0] == date:
-            daily_ws.update(f'A{i}:J{i}', [updated_entry])
-            return True
-    return False
-
-def delete_daily_entry(date):
-    data = daily_ws.get_all_values()
-    for i, row in enumerate(data[1:], start=2):
-        if row[0] == date:
-            daily_ws.delete_rows(i)
-            return True
-    return False
+    daily_store.append_row(entry)
+
+def update_daily_entry(entry_id, updated_entry, expected_rev=None):
+    # Raises ConflictError if the entry changed since expected_rev was read.
+    try:
+        daily_store.update_row(entry_id, updated_entry, expected_rev)
+        return True
+    except KeyError:
+        return False
+
+def delete_daily_entry(entry_id):
+    try:
+        daily_store.delete_row(entry_id)
+        return True
+    except KeyError:
+        return False
 
 # ------------------ TASK TRACKER UTILS ------------------
 def get_task_data():
-    records = task_ws.get_all_records()
-    return pd.DataFrame(records)
+    prefetch.wait("wmanage_tasks")
+    return task_store.get_frame()
 
 def add_task(task_entry):
-    task_ws.append_row(task_entry)
-
-def modify_task(add_date, updated_task):
-    data = task_ws.get_all_values()
-    for i, row in enumerate(data[1:], start=2):
-        if row[0] == add_date:
-            task_ws.update(f'A{i}:G{i}', [updated_task])
-            return True
-    return False
-
-def delete_task(add_date):
-    data = task_ws.get_all_values()
-    for i, row in enumerate(data[1:], start=2):
-        if row[0] == add_date:
-            task_ws.delete_rows(i)
-            return True
-    return False
+    task_store.append_row(task_entry)
+
+def modify_task(task_id, updated_task, expected_rev=None):
+    # Raises ConflictError if the task changed since expected_rev was read.
+    try:
+        task_store.update_row(task_id, updated_task, expected_rev)
+        return True
+    except KeyError:
+        return False
+
+def delete_task(task_id):
+    try:
+        task_store.delete_row(task_id)
+        return True
+    except KeyError:
+        return False
+
+def find_id(df, column, value):
+    if df.empty:
+        return None
+    matches = df.loc[df[column] == value, "ID"]
+    return matches.iloc[0] if len(matches) else None
 
 # ------------------ UI ------------------
 st.set_page_config(page_title="Health & Task Tracker", layout="wide")
@@ -151,23 +173,16 @@ menu_section = st.sidebar.selectbox("Main Menu", ["📅 Daily Tracker", "📝 Ta
 
 # ========== DAILY TRACKER ==========
 if menu_section == "📅 Daily Tracker":
-    sub_menu = st.sidebar.radio("Daily Tracker", ["📈 Dashboard", "➕ Add Entry", "✏️ Update Entry", "❌ Delete Entry"])
+    sub_menu = st.sidebar.radio("Daily Tracker", ["📈 Dashboard", "➕ Add Entry", "✏️ Update Entry", "❌ Delete Entry", "📥 Import CSV"])
     df = get_daily_data()
 
     if sub_menu == "📈 Dashboard":
         st.subheader("📊 Progress Overview")
         st.dataframe(df)
         if not df.empty:
-            df["DATE"] = pd.to_datetime(df["DATE"])
+            from charts import weight_chart_png  # matplotlib only loads once the chart is drawn
             df = df.sort_values("DATE")
-            fig, ax = plt.subplots()
-            ax.plot(df["DATE"], df["TARGET_WEIGHT"], label="Target Weight", linestyle="--")
-            ax.plot(df["DATE"], df["CURRENT_WEIGHT"], label="Current Weight", marker="o")
-            ax.set_xlabel("Date")
-            ax.set_ylabel("Weight (kg)")
-            ax.set_title("Progress vs Target")
-            ax.legend()
-            st.pyplot(fig)
+            st.image(weight_chart_png(df))
         else:
             st.info("No data to display yet.")
 
@@ -206,6 +221,7 @@ if menu_section == "📅 Daily Tracker":
             row = df[df["DATE"] == date_to_update]
             if not row.empty:
                 row = row.iloc[0]
+                loaded_rev = daily_store.get_record(row["ID"])[REV_COLUMN]
                 with st.form("update_entry"):
                     target_weight = st.number_input("Target Weight", value=float(row["TARGET_WEIGHT"]))
                     current_weight = st.number_input("Current Weight", value=float(row["CURRENT_WEIGHT"]))
@@ -217,25 +233,43 @@ if menu_section == "📅 Daily Tracker":
                     mood = st.text_input("Mood/Journal", value=row["MOOD_JOURNAL"])
                     comments = st.text_area("Comments", value=row["COMMENTS"])
                     if st.form_submit_button("Update"):
-                        success = update_daily_entry(date_to_update, [
-                            date_to_update,
-                            target_weight,
-                            current_weight,
-                            steps,
-                            "Yes" if yoga else "No",
-                            "Yes" if breathing else "No",
-                            bp,
-                            sugar,
-                            mood,
-                            comments
-                        ])
-                        st.success("✅ Entry updated." if success else "❌ Entry not found.")
+                        try:
+                            success = update_daily_entry(row["ID"], [
+                                date_to_update,
+                                target_weight,
+                                current_weight,
+                                steps,
+                                "Yes" if yoga else "No",
+                                "Yes" if breathing else "No",
+                                bp,
+                                sugar,
+                                mood,
+                                comments
+                            ], loaded_rev)
+                            st.success("✅ Entry updated." if success else "❌ Entry not found.")
+                        except ConflictError:
+                            st.warning("⚠️ Someone else changed this entry after you loaded it; reload it and try again.")
 
     elif sub_menu == "❌ Delete Entry":
         st.subheader("Delete Entry")
         date_to_delete = st.text_input("Enter Date to Delete (YYYY-MM-DD)")
         if st.button("Delete Entry"):
-            st.success("✅ Entry deleted.") if delete_daily_entry(date_to_delete) else st.error("❌ Entry not found.")
+            entry_id = find_id(df, "DATE", date_to_delete)
+            st.success("✅ Entry deleted.") if entry_id and delete_daily_entry(entry_id) else st.error("❌ Entry not found.")
+
+    elif sub_menu == "📥 Import CSV":
+        st.subheader("Import Daily Entries")
+        uploaded = st.file_uploader("CSV file (Date, Weight (kg), Steps, Mood, Notes, ...)", type="csv")
+        if uploaded is not None and st.button("Import"):
+            from importer import import_csv
+            try:
+                result = import_csv(uploaded, daily_store, "wide")
+            except ValueError as e:
+                st.error(f"❌ Could not import this file: {e}")
+            else:
+                st.success(f"✅ Imported {result.imported} days ({result.existing} already present).")
+                if result.rejected:
+                    st.warning(f"⚠️ {result.rejected} lines had an invalid date or number and were skipped.")
 
 # ========== TASK TRACKER ==========
 elif menu_section == "📝 Task Tracker":
@@ -279,16 +313,20 @@ elif menu_section == "📝 Task Tracker":
         if st.button("Load Task"):
             if not task_row.empty:
                 task_row = task_row.iloc[0]
+                loaded_rev = task_store.get_record(task_row["ID"])[REV_COLUMN]
                 with st.form("modify_task"):
                     task = st.text_input("Task", value=task_row["TASK"])
-                    target_date = st.date_input("Target Date", value=pd.to_datetime(task_row["TARGET_DATE"]))
+                    target_date = st.date_input("Target Date", value=task_row["TARGET_DATE"])  # already a date, via TASK_SCHEMA
                     category = st.text_input("Category", value=task_row["TASK_CATEGORY"])
                     task_type = st.selectbox("Task Type", ["Important and Urgent", "Important", "Urgent", "Optional"], index=0)
                     status = st.selectbox("Status", ["Pending", "In Progress", "Done"], index=0)
                     comments = st.text_area("Comments", value=task_row["COMMENTS"])
                     if st.form_submit_button("Update Task"):
-                        updated = modify_task(add_date, [add_date, task, target_date.strftime("%Y-%m-%d"), category, task_type, status, comments])
-                        st.success("✅ Task updated." if updated else "❌ Task not found.")
+                        try:
+                            updated = modify_task(task_row["ID"], [add_date, task, target_date.strftime("%Y-%m-%d"), category, task_type, status, comments], loaded_rev)
+                            st.success("✅ Task updated." if updated else "❌ Task not found.")
+                        except ConflictError:
+                            st.warning("⚠️ Someone else changed this task after you loaded it; reload it and try again.")
             else:
                 st.error("❌ No task found.")
 
@@ -296,4 +334,7 @@ elif menu_section == "📝 Task Tracker":
         st.subheader("Delete Task")
         add_date = st.text_input("Enter ADD_DATE of Task to Delete (YYYY-MM-DD)")
         if st.button("Delete Task"):
-            st.success("✅ Task deleted.") if delete_task(add_date) else st.error("❌ Task not found.")
+            task_id = find_id(task_df, "ADD_DATE", add_date)
+            st.success("✅ Task deleted.") if task_id and delete_task(task_id) else st.error("❌ Task not found.")
+
+show_write_status()
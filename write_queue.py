@@ -0,0 +1,268 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 11:48:05 2026
+
+Write-behind queue that batches appends and updates for a storage backend.
+
+Appends are buffered and sent with one append_rows() call; updates are
+buffered per row ID (the last edit wins) and sent with one batch_update()
+call. An edit to a row that is still waiting to be appended is folded into
+the append, and deleting such a row just drops it. A flush happens when
+FLUSH_SIZE writes are pending, FLUSH_DELAY seconds after the first
+buffered write, and before any read. batch_update() flushes straight away,
+so a bulk save is a single call and its caller hears about refusals.
+
+A flush that fails keeps its writes and is retried on a timer, backing off
+to RETRY_MAX. Rows from a failed append_rows() whose IDs turn out to be in
+the sheet after all are not appended again.
+
+Edits made with an expected REV are checked against the sheet when they
+are flushed; refused ones are kept in `conflicts` and passed to the
+conflict listeners.
+
+@author: shyamdk
+"""
+import logging
+import os
+import threading
+import time
+from collections import deque, namedtuple
+
+import streamlit as st
+
+from row_index import ID_COLUMN
+
+logger = logging.getLogger(__name__)
+
+# === CONFIGURATION ===
+FLUSH_SIZE = int(os.environ.get("TRACKER_FLUSH_SIZE", "20"))
+FLUSH_DELAY = float(os.environ.get("TRACKER_FLUSH_DELAY", "2.0"))  # seconds
+RETRY_MAX = 60.0  # seconds between retries of a failing flush, at most
+
+# refused: {entry_id: current record} of the edits the backend turned down.
+FlushAck = namedtuple("FlushAck", ["seq", "table", "appended", "updated", "calls", "at", "refused"], defaults=[{}])
+
+QUEUES = {}  # table name -> WriteQueue, for the sidebar status panel
+
+
+class WriteQueue:
+    def __init__(self, store, table, max_batch=FLUSH_SIZE, max_delay=FLUSH_DELAY):
+        self.store = store
+        self.table = table
+        self.headers = store.headers
+        self.id_pos = self.headers.index(ID_COLUMN)
+        self.max_batch = max_batch
+        self.max_delay = max_delay
+        self.lock = threading.RLock()
+        self.acks = deque(maxlen=20)
+        self.last_error = None
+        self._appends = {}  # entry_id -> row, in append order
+        self._updates = {}  # entry_id -> row
+        self._expected = {}  # entry_id -> REV the pending update was based on
+        self._unconfirmed = {}  # entry_id -> row, of appends whose append_rows() call failed
+        self.conflicts = deque(maxlen=20)  # (flush seq, entry_id, current record) of edits refused
+        self.conflict_listeners = []  # called as listener(entry_id, current record)
+        self._timer = None
+        self._failures = 0  # flushes failed in a row
+        self._seq = 0
+        QUEUES[table] = self
+
+    def pending(self):
+        with self.lock:
+            return len(self._appends) + len(self._updates)
+
+    # === READS ===
+    def get_all_records(self):
+        with self.lock:
+            self._flush_locked()
+            return self.store.get_all_records()
+
+    def has_row(self, entry_id):
+        with self.lock:
+            return entry_id in self._appends or self.store.has_row(entry_id)
+
+    def present(self, entry_ids):
+        """Those of entry_ids that are queued to be appended or are in the sheet now."""
+        with self.lock:
+            entry_ids = list(entry_ids)
+            queued = [entry_id for entry_id in entry_ids if entry_id in self._appends]
+            rest = [entry_id for entry_id in entry_ids if entry_id not in self._appends]
+            return queued + (self.store.present(rest) if rest else [])
+
+    def sync(self, records):
+        with self.lock:
+            self._flush_locked()
+            if not hasattr(self.store, "sync"):
+                return None
+            return self.store.sync(records)
+
+    # === WRITES ===
+    def append_row(self, row):
+        with self.lock:
+            self._appends[row[self.id_pos]] = list(row)
+            self._schedule()
+
+    def append_rows(self, rows):
+        with self.lock:
+            for row in rows:
+                self._appends[row[self.id_pos]] = list(row)
+            self._schedule()
+
+    def _buffer_update(self, entry_id, row, expected_rev):
+        if entry_id in self._appends:
+            self._appends[entry_id] = list(row)
+        else:
+            self._updates[entry_id] = list(row)
+            if expected_rev is not None:
+                # Checked against the sheet at flush time; the first edit's base is what the sheet holds.
+                self._expected.setdefault(entry_id, expected_rev)
+
+    def update_row(self, entry_id, row, expected_rev=None):
+        with self.lock:
+            self._buffer_update(entry_id, row, expected_rev)
+            self._schedule()
+
+    def batch_update(self, updates, expected=None):
+        """
+        Send several edits now, as one batch_update whatever their number,
+        and return {entry_id: current record} for the ones the sheet refused.
+        """
+        expected = expected or {}
+        with self.lock:
+            for entry_id, row in updates.items():
+                self._buffer_update(entry_id, row, expected.get(entry_id))
+            ack = self._flush_locked()
+            refused = ack.refused if ack is not None else {}
+            return {entry_id: refused[entry_id] for entry_id in updates if entry_id in refused}
+
+    def delete_row(self, entry_id):
+        with self.lock:
+            if entry_id in self._unconfirmed:
+                self._settle_unconfirmed()
+            if self._appends.pop(entry_id, None) is not None:
+                return  # never reached the backend
+            self._updates.pop(entry_id, None)
+            self._expected.pop(entry_id, None)
+            self.store.delete_row(entry_id)
+
+    def delete_rows(self, entry_ids):
+        with self.lock:
+            if self._unconfirmed.keys() & set(entry_ids):
+                self._settle_unconfirmed()
+            sent = []
+            for entry_id in entry_ids:
+                if self._appends.pop(entry_id, None) is None:
+                    self._updates.pop(entry_id, None)
+                    self._expected.pop(entry_id, None)
+                    sent.append(entry_id)
+            if sent:
+                self.store.delete_rows(sent)
+
+    # === FLUSHING ===
+    def _schedule(self):
+        if self.pending() >= self.max_batch:
+            self._flush_locked()
+        else:
+            self._arm(self.max_delay)
+
+    def _arm(self, delay):
+        if self._timer is None:
+            self._timer = threading.Timer(delay, self._timed_flush)
+            self._timer.daemon = True
+            self._timer.start()
+
+    def _timed_flush(self):
+        try:
+            self.flush()
+        except Exception:
+            logger.exception("Background flush failed for %s", self.table)
+
+    def flush(self):
+        with self.lock:
+            return self._flush_locked()
+
+    def _settle_unconfirmed(self):
+        # A failed append_rows() may still have reached the sheet (a 5xx doesn't say), and sending
+        # the rows again would add them twice. One read of the ID column tells which ones did.
+        for entry_id in self.store.present(self._unconfirmed):
+            row = self._appends.pop(entry_id, None)
+            if row is not None and row != self._unconfirmed[entry_id]:
+                self._updates[entry_id] = row  # edited since; overwrite the copy that got through
+        self._unconfirmed = {}
+
+    def _flush_locked(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        if not self._appends and not self._updates:
+            return None
+
+        calls = 0
+        refused = {}
+        try:
+            if self._unconfirmed:
+                self._settle_unconfirmed()
+                calls += 1
+            appends, updates = self._appends, self._updates
+            if appends:
+                self._unconfirmed = dict(appends)
+                self.store.append_rows(list(appends.values()))
+                self._appends, self._unconfirmed = {}, {}
+                calls += 1
+            if updates:
+                refused = self.store.batch_update(updates, self._expected) or {}
+                self._updates, self._expected = {}, {}
+                calls += 1
+                for entry_id, current in refused.items():
+                    logger.warning("Edit to %s in %s refused: the row changed in the sheet", entry_id, self.table)
+                    self.conflicts.append((self._seq + 1, entry_id, current))
+                    for listener in self.conflict_listeners:
+                        listener(entry_id, current)
+        except Exception as e:
+            # Whatever did not go out stays buffered, and is tried again even if nothing else is written.
+            self.last_error = e
+            self._failures += 1
+            self._arm(min(self.max_delay * 2 ** self._failures, RETRY_MAX))
+            raise
+
+        self.last_error = None
+        self._failures = 0
+        self._seq += 1
+        ack = FlushAck(self._seq, self.table, len(appends), len(updates) - len(refused), calls, time.time(), refused)
+        self.acks.append(ack)
+        return ack
+
+
+# === UI ===
+def show_write_status():
+    """Sidebar panel with pending writes, a flush button and toasts for new flushes."""
+    if not QUEUES:
+        return
+    seen = st.session_state.setdefault("seen_flush_acks", {})
+    pending = {name: q.pending() for name, q in QUEUES.items()}
+
+    with st.sidebar.expander(f"💾 Pending writes: {sum(pending.values())}"):
+        for name, count in pending.items():
+            st.write(f"{name}: {count}")
+            err = QUEUES[name].last_error
+            if err is not None:
+                st.error(f"Last flush failed: {err}")
+        if st.button("Sync now"):
+            for q in QUEUES.values():
+                try:
+                    q.flush()
+                except Exception:
+                    pass  # kept in q.last_error and shown above on rerun
+            st.rerun()
+
+    for name, q in QUEUES.items():
+        # Only toast flushes that happen after this session first saw the queue.
+        last_seen = seen.setdefault(name, q._seq)
+        for seq, entry_id, _ in list(getattr(q, "conflicts", ())):
+            if seq > last_seen:
+                st.toast(f"⚠️ {name}: an edit to {entry_id} was not saved, someone else changed that row first")
+        for ack in list(q.acks):
+            if ack.seq > last_seen:
+                st.toast(f"☁️ {name}: saved {ack.appended} new and {ack.updated} edited rows")
+                seen[name] = ack.seq